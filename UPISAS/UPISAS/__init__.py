@@ -1,11 +1,19 @@
+import array
+import json
+import struct
+import sys
 import jsonschema
 import requests
 import logging
 
 from UPISAS.exceptions import ServerNotReachable, IncompleteJSONSchema
+from UPISAS.http_client import get_session
 
 pull_image_tasks = {}
 
+# mimetype of the packed binary payloads an exemplar can send instead of JSON (see unpack_payload())
+PACKED_MIMETYPE = "application/vnd.wildfire.packed"
+
 
 def show_progress(line, progress):
     """ Show task progress (red for download, green for extract). Used when pulling images."""
@@ -22,17 +30,62 @@ def show_progress(line, progress):
         progress.update(pull_image_tasks[id], completed=line['progressDetail']['current'])
 
 
-def get_response_for_get_request(url):
+def get_response_for_get_request(url, headers=None):
     try:
         logging.info("GET request to " + str(url))
-        response = requests.get(url)
+        response = get_session().get(url, headers=headers)
         return response
-    except requests.exceptions.ConnectionError as e:
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
         logging.error(e)
         logging.error("Please check that the server is reachable and retry.")
         raise ServerNotReachable
 
 
+def get_response_for_event_stream(url):
+    try:
+        logging.info("GET event stream request to " + str(url))
+        response = get_session().get(url, stream=True, headers={"Accept": "text/event-stream"})
+        return response
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        logging.error(e)
+        logging.error("Please check that the server is reachable and retry.")
+        raise ServerNotReachable
+
+
+class ServerSentEventParser:
+    """ Incremental parser of the lines of a server-sent event stream, so that synchronous and asynchronous streamed
+    responses can share it. feed() returns each complete event as an (event, data) tuple, with the data decoded as JSON,
+    and None otherwise. Comments (e.g. keep-alives) are skipped."""
+
+    def __init__(self):
+        self.event, self.data = "message", []
+
+    def feed(self, line):
+        if line:
+            if not line.startswith(":"):
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    self.event = value
+                elif field == "data":
+                    self.data.append(value)
+        elif self.data:
+            parsed = self.event, json.loads("\n".join(self.data))
+            self.event, self.data = "message", []
+            return parsed
+        return None
+
+
+def iter_server_sent_events(response):
+    """ Parse the server-sent events of a streamed response, yielding each of them as an (event, data) tuple (see
+    ServerSentEventParser)."""
+    parser = ServerSentEventParser()
+    for line in response.iter_lines(decode_unicode=True):
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
+
+
 def validate_schema(json_instance, json_schema):
     try:
         incomplete_warning_message = "No complete JSON Schema provided for validation"
@@ -55,3 +108,48 @@ def validate_schema(json_instance, json_schema):
         logging.error(f"SchemaError in validating JSON object with JSON Schema: {error}")
         raise
 
+
+def apply_delta(previous, changes):
+    """ Apply the changed values of a delta monitor payload to the previous values, and return the updated values.
+    Lists of objects with an "id" are updated object by object (only the fields that changed are sent for each one),
+    any other value is replaced."""
+    updated = dict(previous)
+    for key, value in changes.items():
+        previous_value = updated.get(key)
+        if isinstance(value, list) and isinstance(previous_value, list) and \
+                all(isinstance(item, dict) and "id" in item for item in value + previous_value):
+            items = {item["id"]: item for item in previous_value}
+            for item in value:
+                items[item["id"]] = {**items.get(item["id"], {}), **item}
+            updated[key] = list(items.values())
+        else:
+            updated[key] = value
+    return updated
+
+
+def unpack_payload(content):
+    """ Decode a packed binary payload: a little-endian uint32 with the length of a JSON header, the JSON header, and the
+    cell coordinates of the "packed" fields of its UAV details, as little-endian int16 (x, y) pairs. It returns the same
+    data the JSON payload would hold."""
+    header_length, = struct.unpack_from("<I", content)
+    data = json.loads(content[4:4 + header_length])
+    coordinates = array.array("h")
+    coordinates.frombytes(content[4 + header_length:])
+    if sys.byteorder == "big":
+        coordinates.byteswap()
+
+    packed_fields = data.pop("packed")
+    start = 0
+    for uav in data.get("dynamicValues", data).get("uavDetails", []):
+        for field in packed_fields:
+            end = start + 2 * uav[field]
+            uav[field] = list(map(list, zip(coordinates[start:end:2], coordinates[start + 1:end:2])))
+            start = end
+    return data
+
+
+def decode_response(response):
+    """ Decode the body of a response, either JSON or a packed binary payload."""
+    if response.headers.get("Content-Type", "").startswith(PACKED_MIMETYPE):
+        return unpack_payload(response.content)
+    return response.json()
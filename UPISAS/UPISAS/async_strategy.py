@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+
+from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
+from UPISAS.http_client import DEFAULT_TIMEOUT, DEFAULT_POOL_SIZE
+from UPISAS.strategy import Strategy
+from UPISAS import unpack_payload, ServerSentEventParser, PACKED_MIMETYPE
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, only needed to create the HTTP sessions of AsyncStrategy
+    aiohttp = None
+
+def create_session(timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+    """ Create an aiohttp ClientSession that keeps connections alive (at most pool_size per host), with the same
+    (connect, read) timeouts as the synchronous client. It must be created within a running event loop, and can be
+    shared by many AsyncStrategy instances."""
+    if aiohttp is None:
+        raise ImportError("AsyncStrategy needs aiohttp, install it with 'pip install aiohttp'")
+    connect_timeout, read_timeout = timeout
+    return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                                 connector=aiohttp.TCPConnector(limit_per_host=pool_size))
+
+
+async def iter_server_sent_events(response):
+    """ Asynchronous counterpart of UPISAS.iter_server_sent_events(), for a streamed aiohttp response."""
+    parser = ServerSentEventParser()
+    async for line in response.content:
+        parsed = parser.feed(line.decode().rstrip("\r\n"))
+        if parsed is not None:
+            yield parsed
+
+
+class AsyncStrategy(Strategy):
+    """ Asynchronous counterpart of Strategy: monitor(), execute(), step(), the schema getters and run_loop() are
+    coroutines using an aiohttp session, so that one event loop can drive the MAPE-K loops of many exemplars (e.g. many
+    wildfire containers, or many /envs/<id> environments of one container) concurrently. The knowledge and the
+    analyze() and plan() hooks are the same as in Strategy, so an existing strategy can be made asynchronous by
+    deriving from both, e.g. class AsyncAvoidance(AsyncStrategy, WildfireAvoidanceStrategy). The /envs/<id> endpoints
+    don't serve schemas, so the schemas of such a strategy must be fetched from the container itself beforehand."""
+
+    def __init__(self, exemplar, session=None):
+        super().__init__(exemplar)
+        self.session = session
+        self.owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.unsubscribe()
+        if self.owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = create_session()
+        return self.session
+
+    async def ping(self):
+        ping_res = await self._perform_get_request(self.exemplar.base_endpoint)
+        logging.info(f"ping result: {ping_res}")
+
+    async def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False):
+        fresh_data = await self._perform_get_request(endpoint_suffix)
+        if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+        if with_validation:
+            if(not self.knowledge.monitor_schema): await self.get_monitor_schema()
+        self._store_fresh_data(fresh_data, verbose)
+        return True
+
+    async def monitor_delta(self, endpoint_suffix="monitor/delta", constants_endpoint_suffix="constants",
+                            verbose=False):
+        """ Same as monitor(), but only the values that changed since the last monitored step are requested, see
+        Strategy.monitor_delta()."""
+        constants = self.knowledge.fresh_data.get("constants")
+        if constants is None:
+            constants = await self._perform_cached_get_request(constants_endpoint_suffix)
+        delta = await self._perform_get_request(self._delta_endpoint(endpoint_suffix))
+        self._store_delta(delta, constants, verbose)
+        return True
+
+    async def monitor_events(self, endpoint_suffix="events", verbose=False):
+        """ Same as monitor(), but the monitor data is pushed by the server as server-sent events, see
+        Strategy.monitor_events(). The stream is kept open between calls, and closed by unsubscribe() or close()."""
+        if self.event_stream is None:
+            url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+            response = await self._open_event_stream(url)
+            if response.status == 404:
+                response.close()
+                logging.error("Please check that the endpoint you are trying to reach actually exists.")
+                raise EndpointNotReachable
+            self.event_stream = (response, iter_server_sent_events(response))
+        async for event, fresh_data in self.event_stream[1]:
+            if event == "step":
+                if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+                self._store_fresh_data(fresh_data, verbose)
+                return True
+            if event == "end":
+                break
+        self.unsubscribe()
+        return False
+
+    async def execute(self, adaptation=None, endpoint_suffix="execute", with_validation=True):
+        if(not adaptation): adaptation= self.knowledge.plan_data
+        if with_validation:
+            if(not self.knowledge.execute_schema): await self.get_execute_schema()
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        status, _, _, _ = await self._request("PUT", url, adaptation)
+        print("[Execute]\tposted configuration: " + str(adaptation))
+        if status == 404:
+            logging.error("Cannot execute adaptation on remote system, check that the execute endpoint exists.")
+            raise EndpointNotReachable
+        return True
+
+    async def step(self, adaptation=None, endpoint_suffix="step", with_validation=True, verbose=False):
+        """ execute() and monitor() in a single round trip, see Strategy.step()."""
+        if(not adaptation): adaptation= self.knowledge.plan_data
+        if with_validation:
+            if(not self.knowledge.execute_schema): await self.get_execute_schema()
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        status, content_type, body, _ = await self._request("PUT", url, adaptation, self._accept_headers())
+        if(verbose): print("[Execute]\tposted configuration: " + str(adaptation))
+        if status == 404:
+            logging.error("Cannot step the remote system, check that the step endpoint exists.")
+            raise EndpointNotReachable
+        if status == 504:
+            logging.error("The remote system did not complete the next step in time.")
+            return False
+        fresh_data = self._decode(content_type, body)
+        if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+        self._store_fresh_data(fresh_data, verbose)
+        return True
+
+    async def run_loop(self, max_steps=None, max_seconds=None, mode="step", poll_interval=0.05, on_step=None,
+                       verbose=False):
+        """ Drive monitor -> analyze -> plan -> execute once per step of the managed system, see Strategy.run_loop().
+        Waiting for the next step yields to the event loop, so many loops can be gathered, e.g. with
+        run_concurrently()."""
+        calls = self._loop_calls(max_steps, max_seconds, mode, poll_interval, on_step, verbose)
+        try:
+            method, kwargs = next(calls)
+            while True:
+                method, kwargs = calls.send(await method(**kwargs))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _poll_next_step(self, current_step, poll_interval, deadline, verbose=False):
+        while deadline is None or time.monotonic() < deadline:
+            fresh_data = await self._perform_get_request("monitor")
+            if fresh_data.get("currentStep") != current_step:
+                if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+                self._store_fresh_data(fresh_data, verbose)
+                return True
+            await asyncio.sleep(poll_interval)
+        return False
+
+    async def get_adaptation_options(self, endpoint_suffix: "API Endpoint" = "adaptation_options", with_validation=True):
+        self.knowledge.adaptation_options = await self._perform_get_request(endpoint_suffix)
+        if with_validation:
+            if(not self.knowledge.adaptation_options_schema): await self.get_adaptation_options_schema()
+
+    async def get_monitor_schema(self, endpoint_suffix = "monitor_schema"):
+        self.knowledge.monitor_schema = await self._perform_cached_get_request(endpoint_suffix)
+
+    async def get_execute_schema(self, endpoint_suffix = "execute_schema"):
+        self.knowledge.execute_schema = await self._perform_cached_get_request(endpoint_suffix)
+
+    async def get_adaptation_options_schema(self, endpoint_suffix: "API Endpoint" = "adaptation_options_schema"):
+        self.knowledge.adaptation_options_schema = await self._perform_cached_get_request(endpoint_suffix)
+
+    async def _perform_get_request(self, endpoint_suffix: "API Endpoint"):
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        status, content_type, body, _ = await self._request("GET", url, headers=self._accept_headers())
+        if status == 404:
+            logging.error("Please check that the endpoint you are trying to reach actually exists.")
+            raise EndpointNotReachable
+        return self._decode(content_type, body)
+
+    async def _perform_cached_get_request(self, endpoint_suffix: "API Endpoint"):
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        fresh = self.response_cache.fresh(url)
+        if fresh:
+            return fresh[1]
+        cached = self.response_cache.get(url)
+        status, content_type, body, headers = await self._request("GET", url,
+                                                                  headers=self._revalidation_headers(cached))
+        return self._cached_response_data(url, cached, status, headers, lambda: self._decode(content_type, body))
+
+    async def _request(self, method, url, payload=None, headers=None):
+        """ Perform a request, returning its status, content type, body and headers."""
+        session = self._get_session()
+        try:
+            logging.info(f"{method} request to {url}")
+            async with session.request(method, url, json=payload, headers=headers) as response:
+                body = await response.read()
+                return response.status, response.headers.get("Content-Type", ""), body, response.headers
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            logging.error(e)
+            logging.error("Please check that the server is reachable and retry.")
+            raise ServerNotReachable
+
+    async def _open_event_stream(self, url):
+        """ Open a streamed response of server-sent events. Its read timeout is the one of the session, which is longer
+        than the time between the keep-alives of the server."""
+        session = self._get_session()
+        try:
+            logging.info(f"GET event stream request to {url}")
+            return await session.get(url, headers={"Accept": "text/event-stream"})
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            logging.error(e)
+            logging.error("Please check that the server is reachable and retry.")
+            raise ServerNotReachable
+
+    @staticmethod
+    def _decode(content_type, body):
+        if content_type.startswith(PACKED_MIMETYPE):
+            return unpack_payload(body)
+        return json.loads(body)
+
+
+async def run_concurrently(strategies, **loop_kwargs):
+    """ Run the MAPE-K loops of many AsyncStrategy instances concurrently in the current event loop (see
+    AsyncStrategy.run_loop() for the loop arguments), returning the number of steps each of them handled."""
+    return await asyncio.gather(*(strategy.run_loop(**loop_kwargs) for strategy in strategies))
@@ -1,4 +1,5 @@
 from UPISAS.exemplar import Exemplar
+from UPISAS.http_client import get_session
 import requests
 import logging
 
@@ -15,7 +16,7 @@ class WildFireExemplar(Exemplar):
     def monitor_fire_status(self):
         url = f"{self.base_endpoint}/monitor"
         try:
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=10)
             response.raise_for_status()
             logging.info("Fetched fire status successfully.")
             return response.json()
@@ -26,7 +27,7 @@ class WildFireExemplar(Exemplar):
     def execute_fire_control(self, directions):
         url = f"{self.base_endpoint}/execute"
         try:
-            response = requests.put(url, json={"uavDetails": directions}, timeout=10)
+            response = get_session().put(url, json={"uavDetails": directions}, timeout=10)
             response.raise_for_status()
             logging.info("Fire control action executed successfully.")
             return response.json()
@@ -37,7 +38,7 @@ class WildFireExemplar(Exemplar):
     def get_adaptation_options(self):
         url = f"{self.base_endpoint}/adaptation_options"
         try:
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=10)
             response.raise_for_status()
             logging.info("Fetched adaptation options successfully.")
             return response.json()
@@ -48,7 +49,7 @@ class WildFireExemplar(Exemplar):
     def get_monitor_schema(self):
         url = f"{self.base_endpoint}/monitor_schema"
         try:
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -58,7 +59,7 @@ class WildFireExemplar(Exemplar):
     def get_execute_schema(self):
         url = f"{self.base_endpoint}/execute_schema"
         try:
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -68,7 +69,7 @@ class WildFireExemplar(Exemplar):
     def get_adaptation_options_schema(self):
         url = f"{self.base_endpoint}/adaptation_options_schema"
         try:
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
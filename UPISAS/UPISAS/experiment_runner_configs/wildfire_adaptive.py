@@ -8,13 +8,20 @@ from ProgressManager.Output.OutputProcedure import OutputProcedure as output
 from datetime import datetime
 
 from typing import Dict, Any, Optional
+from collections.abc import Sequence
 from pathlib import Path
 from os.path import dirname, realpath
 import time
 
 from UPISAS.exemplars.wildfire_exemplar import WildFireExemplar
+from UPISAS.recorder import ColumnarRecorder
 from UPISAS.strategies.adaptive_strategy import WildfireAvoidanceStrategy
 
+# recorded instead of the integrity or the x and y of a UAV missing them, since the recorded columns are numeric (grid
+# positions are never negative)
+MISSING_INTEGRITY = float("nan")
+MISSING_POSITION = -1
+
 
 class RunnerConfig:
     ROOT_DIR = Path(dirname(realpath(__file__)))
@@ -32,6 +39,9 @@ class RunnerConfig:
     """The time Experiment Runner will wait after a run completes."""
     time_between_runs_in_ms: int = 1000
 
+    """The wall-clock budget of the MAPE-K loop of a run, in seconds."""
+    max_seconds_per_run: int = 90
+
     exemplar = None
     strategy = None
 
@@ -49,7 +59,7 @@ class RunnerConfig:
             (RunnerEvents.AFTER_EXPERIMENT, self.after_experiment)
         ])
         self.run_table_model = None  # Initialized later
-        self.stepwise_data = []  
+        self.recorder = None
         output.console_log("WildFire config loaded")
 
     def create_run_table_model(self) -> RunTableModel:
@@ -57,7 +67,8 @@ class RunnerConfig:
         self.run_table_model = RunTableModel(
             factors=[],
             exclude_variations=[],
-            data_columns=['MR1_total', 'MR2_max', 'stepwise_data']  
+            # stepwise_data holds the directory of the run step recording, see ColumnarRecorder and load_recording()
+            data_columns=['MR1_total', 'MR2_max', 'stepwise_data']
         )
         return self.run_table_model
 
@@ -72,6 +83,9 @@ class RunnerConfig:
 
     def start_run(self, context: RunnerContext) -> None:
         """Configure strategy and prepare for the run."""
+        self.recorder = ColumnarRecorder(context.run_dir / "stepwise_data",
+                                         typecodes={"step": "q", "MR1": "d", "MR2": "q", "Integrity": "d",
+                                                    "positions": "q"})
         output.console_log("Config.start_run() called!")
 
     def start_measurement(self, context: RunnerContext) -> None:
@@ -79,20 +93,16 @@ class RunnerConfig:
 
     def interact(self, context: RunnerContext) -> None:
         """Interact with the WildFireExemplar system."""
-        time_slept = 0
         self.strategy.get_monitor_schema()
         self.strategy.get_adaptation_options_schema()
         self.strategy.get_execute_schema()
 
-        while time_slept < 90:
-            self.strategy.monitor(verbose=True)
-            step_data = self._record_step_data()  
-            self.stepwise_data.append(step_data)  
-            if self.strategy.analyze():
-                if self.strategy.plan():
-                    self.strategy.execute()
-            time.sleep(3)
-            time_slept += 3
+        # one MAPE-K iteration per simulation step, as fast as the simulation runs, until it finishes (or the budget
+        # runs out)
+        steps = self.strategy.run_loop(max_seconds=self.max_seconds_per_run, mode="step",
+                                       on_step=lambda strategy: self.recorder.record(self._record_step_data()),
+                                       verbose=True)
+        output.console_log(f"{steps} steps handled")
 
         output.console_log("Config.interact() called!")
 
@@ -100,6 +110,7 @@ class RunnerConfig:
         output.console_log("Config.stop_measurement() called!")
 
     def stop_run(self, context: RunnerContext) -> None:
+        self.recorder.close()
         output.console_log("Config.stop_run() called! (no container termination)")
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, SupportsStr]]:
@@ -113,9 +124,9 @@ class RunnerConfig:
         MR2_max = 0
 
         dynamic_values = monitored_data.get("dynamicValues", [])
-        if not isinstance(dynamic_values, list):
+        if not isinstance(dynamic_values, Sequence):
             output.console_log("Invalid dynamicValues format!")
-            return {"MR1_total": MR1_total, "MR2_max": MR2_max, "stepwise_data": self.stepwise_data}
+            return {"MR1_total": MR1_total, "MR2_max": MR2_max, "stepwise_data": self.recorder.directory}
 
         # Process each item in dynamicValues
         for data in dynamic_values:
@@ -139,11 +150,11 @@ class RunnerConfig:
                 output.console_log(f"Invalid MR2 format: {MR2}")
 
         output.console_log(f"Final MR1_total: {MR1_total}, MR2_max: {MR2_max}")
-        return {"MR1_total": MR1_total, "MR2_max": MR2_max, "stepwise_data": self.stepwise_data}
+        return {"MR1_total": MR1_total, "MR2_max": MR2_max, "stepwise_data": self.recorder.directory}
 
     def _record_step_data(self) -> Dict[str, Any]:
         """
-        Record MR1, MR2, and Integrity(MR3) for the current step.
+        Record MR1, MR2, Integrity(MR3) and UAV positions for the current step.
         """
         fresh_data = self.strategy.knowledge.fresh_data
         dynamic_values = fresh_data.get("dynamicValues", {})
@@ -151,14 +162,20 @@ class RunnerConfig:
         MR1 = dynamic_values.get("MR1", [])
         MR2 = dynamic_values.get("MR2", 0)
         Integrity = [
-            uav.get("Integrity(MR3)", None)
+            uav.get("Integrity(MR3)", MISSING_INTEGRITY)
+            for uav in dynamic_values.get("uavDetails", [])
+        ]
+        positions = [
+            [uav.get("x", MISSING_POSITION), uav.get("y", MISSING_POSITION)]
             for uav in dynamic_values.get("uavDetails", [])
         ]
 
         step_data = {
+            "step": fresh_data.get("currentStep", 0),
             "MR1": MR1,
             "MR2": MR2,
-            "Integrity": Integrity
+            "Integrity": Integrity,
+            "positions": positions
         }
 
         output.console_log(f"Recorded step data: {step_data}")
@@ -0,0 +1,64 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds. The read timeout is longer than the time the wildfire /step endpoint waits for
+# the next time step, so that a slow step is reported by the server instead of timing out on the client
+DEFAULT_TIMEOUT = (3.05, 75)
+# retries of a failed request (connection errors, and 502/503 responses of idempotent requests), with an exponential
+# backoff of backoff_factor * 2 ** (retry - 1) seconds between them
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.2
+# connections kept alive per host
+DEFAULT_POOL_SIZE = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """ An HTTPAdapter that applies a default timeout to the requests that don't set their own."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                   pool_size=DEFAULT_POOL_SIZE):
+    """ Create a requests Session that keeps connections alive, with a default timeout and bounded retries. Only
+    idempotent methods are retried after the request was sent, since e.g. retrying a wildfire PUT /step would advance
+    the simulation twice."""
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(502, 503),
+                  allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}), raise_on_status=False)
+    adapter = TimeoutHTTPAdapter(timeout=timeout, max_retries=retry, pool_connections=pool_size,
+                                 pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """ Return the Session shared by strategies and exemplars, creating it with the default settings on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def configure_session(**kwargs):
+    """ Replace the shared Session with one created with other settings (see create_session())."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = create_session(**kwargs)
+        return _session
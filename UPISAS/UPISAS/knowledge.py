@@ -1,4 +1,123 @@
+from array import array
+from collections import deque
+from collections.abc import Sequence
 from dataclasses import dataclass, field
+import functools
+import math
+import numpy as np
+
+# number of monitored values kept per key, unless a strategy sets its own history_depth
+DEFAULT_HISTORY_DEPTH = 1024
+
+
+@functools.total_ordering
+class NumericSeries(Sequence):
+    """ A bounded series of numbers, stored in a typed array used as a ring buffer: appending is O(1), and once maxlen
+    values are held, each new value replaces the oldest one. Integers are stored as int64 until a float is appended,
+    and then all of them as doubles. It behaves as a read-only list of the values, from the oldest to the newest."""
+
+    def __init__(self, maxlen=None, values=()):
+        self.maxlen = maxlen
+        self._values = array("q")
+        self._start = 0
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        """ Append a number. TypeError if it isn't an int or a float, OverflowError if it doesn't fit in int64."""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"NumericSeries only holds numbers, got {value!r}")
+        if isinstance(value, float) and self._values.typecode == "q":
+            self._values = array("d", self._values)
+        if self.maxlen is None or len(self._values) < self.maxlen:
+            self._values.append(value)
+        else:
+            self._values[self._start] = value
+            self._start = (self._start + 1) % self.maxlen
+
+    def to_array(self):
+        """ Return the values, from the oldest to the newest, as an array.array (which numpy.frombuffer() can wrap)."""
+        return self._values[self._start:] + self._values[:self._start]
+
+    def tolist(self):
+        return self.to_array().tolist()
+
+    def _view(self):
+        # the ring buffer order doesn't matter to the aggregates. The view must not outlive them, since the array can't
+        # be resized while it is exported
+        return np.frombuffer(self._values, dtype=np.int64 if self._values.typecode == "q" else np.float64)
+
+    def sum(self):
+        return self._view().sum().item()
+
+    def mean(self):
+        """ The mean of the values, or nan if there are none."""
+        if not self._values:
+            return math.nan
+        return self._view().mean().item()
+
+    def min(self):
+        return self._view().min().item()
+
+    def max(self):
+        return self._view().max().item()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.tolist()[index]
+        length = len(self._values)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("NumericSeries index out of range")
+        return self._values[(self._start + index) % length]
+
+    def __iter__(self):
+        return iter(self.to_array())
+
+    def __eq__(self, other):
+        if isinstance(other, (NumericSeries, list, deque)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (NumericSeries, list, deque)):
+            return self.tolist() < list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"NumericSeries({self.tolist()!r})"
+
+
+class MonitoredData(dict):
+    """ The values monitored so far, by key, keeping at most depth values per key (all of them if depth is None). A key
+    whose values are numbers is held in a NumericSeries, and any other key in a deque, so they can be read as the lists
+    monitored_data used to hold."""
+
+    def __init__(self, depth=DEFAULT_HISTORY_DEPTH):
+        super().__init__()
+        self.depth = depth
+
+    def record(self, fresh_data):
+        """ Append the value of each key of a monitored payload to its series."""
+        for key, value in fresh_data.items():
+            series = self.get(key)
+            if series is None:
+                series = self[key] = self._new_series(value)
+            try:
+                series.append(value)
+            except (TypeError, OverflowError):
+                # a numeric series that gets any other value is kept as a deque from then on
+                self[key] = deque(series, maxlen=self.depth)
+                self[key].append(value)
+
+    def _new_series(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return NumericSeries(self.depth)
+        return deque(maxlen=self.depth)
 
 
 @dataclass
@@ -13,5 +132,4 @@ class Knowledge:
     execute_schema: dict
     adaptation_options_schema: dict
 
-    fresh_data: dict 
-        
+    fresh_data: dict
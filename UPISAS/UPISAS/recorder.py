@@ -0,0 +1,122 @@
+from array import array
+import json
+import logging
+import os
+import sys
+
+RECORDING_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+# numpy dtype of each array typecode a column can be stored with
+DTYPES = {"q": "i8", "d": "f8"}
+
+
+def _flatten(value):
+    """ Flatten a number or a (nested) list of numbers, returning its values and its shape."""
+    if not isinstance(value, (list, tuple)):
+        return [value], []
+    if not value:
+        return [], [0]
+    flattened = [_flatten(item) for item in value]
+    shape = flattened[0][1]
+    if any(item_shape != shape for _, item_shape in flattened):
+        raise ValueError(f"Ragged values can't be recorded: {value}")
+    return [number for values, _ in flattened for number in values], [len(value)] + shape
+
+
+class ColumnarRecorder:
+    """ Append-only recorder of the per-step metrics of a run (e.g. MR1, MR2, integrity and UAV positions) in a
+    directory with one raw binary file per column, plus a manifest with the dtype and shape of each column and the
+    number of recorded steps. Each step holds a number or a fixed-shape (nested) list of numbers per column, so that
+    every column can be memory-mapped as a (steps, *shape) array by load_recording(), with no CSV or JSON round trip.
+
+    Column typecodes ("q" for int64, "d" for float64) can be given, otherwise they are inferred from the first recorded
+    step. Steps are buffered and written every flush_every steps, and on close()."""
+
+    def __init__(self, directory, typecodes=None, flush_every=64):
+        self.directory = str(directory)
+        self.typecodes = dict(typecodes or {})
+        self.flush_every = flush_every
+        self.shapes = {}
+        self.buffers = {}
+        self.steps = 0
+        self.buffered_steps = 0
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(os.path.join(self.directory, MANIFEST_FILENAME)):
+            raise FileExistsError(f"{self.directory} already holds a recording")
+
+    def record(self, step_data):
+        """ Append the values of a step, as a dict with a value per column. Every step must hold the same columns."""
+        if not self.shapes:
+            self._create_columns(step_data)
+        if step_data.keys() != self.shapes.keys():
+            raise ValueError(f"Expected the columns {sorted(self.shapes)}, got {sorted(step_data)}")
+        for name, value in step_data.items():
+            values, shape = _flatten(value)
+            if shape != self.shapes[name]:
+                raise ValueError(f"Column {name} has shape {self.shapes[name]}, got {shape}")
+            self.buffers[name].extend(values)
+        self.steps += 1
+        self.buffered_steps += 1
+        if self.buffered_steps >= self.flush_every:
+            self.flush()
+
+    def _create_columns(self, step_data):
+        for name, value in step_data.items():
+            values, shape = _flatten(value)
+            if name not in self.typecodes:
+                self.typecodes[name] = "d" if any(isinstance(number, float) for number in values) else "q"
+            self.shapes[name] = shape
+            self.buffers[name] = array(self.typecodes[name])
+
+    def flush(self):
+        """ Write the buffered steps to the column files, and then the manifest, which only counts the steps that were
+        completely written."""
+        for name, buffer in self.buffers.items():
+            with open(os.path.join(self.directory, f"{name}.bin"), "ab") as f:
+                buffer.tofile(f)
+            del buffer[:]
+        self.buffered_steps = 0
+        self._write_manifest()
+
+    def _write_manifest(self):
+        byte_order = "<" if sys.byteorder == "little" else ">"
+        manifest = {
+            "version": RECORDING_VERSION,
+            "steps": self.steps,
+            "columns": {name: {"file": f"{name}.bin", "dtype": byte_order + DTYPES[self.typecodes[name]],
+                               "shape": self.shapes[name]} for name in self.shapes},
+        }
+        path = os.path.join(self.directory, MANIFEST_FILENAME)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def close(self):
+        self.flush()
+        logging.info(f"Recorded {self.steps} steps in {self.directory}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_recording(directory):
+    """ Memory-map the columns of a recording made by ColumnarRecorder, returning a dict with a read-only numpy array,
+    shaped (steps, *shape), per column. Requires numpy."""
+    import numpy
+
+    with open(os.path.join(directory, MANIFEST_FILENAME)) as f:
+        manifest = json.load(f)
+    if manifest["version"] != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version: {manifest['version']}")
+    columns = {}
+    for name, column in manifest["columns"].items():
+        shape = (manifest["steps"], *column["shape"])
+        path = os.path.join(directory, column["file"])
+        if manifest["steps"] == 0 or 0 in column["shape"]:
+            columns[name] = numpy.empty(shape, dtype=column["dtype"])
+        else:
+            columns[name] = numpy.memmap(path, dtype=column["dtype"], mode="r", shape=shape)
+    return columns
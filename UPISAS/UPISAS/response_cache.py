@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+# directory of the response cache, unless UPISAS_CACHE_DIR is set
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "upisas")
+
+
+def parse_max_age(cache_control):
+    """ The max-age of a Cache-Control header, in seconds, or None if the response must be revalidated every time."""
+    directives = {}
+    for directive in (cache_control or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-cache" in directives or "no-store" in directives:
+        return None
+    try:
+        return int(directives["max-age"])
+    except (KeyError, ValueError):
+        return None
+
+
+class ResponseCache:
+    """ Persistent on-disk cache of JSON responses (e.g. schemas), one file per URL, holding the response body, its
+    ETag and, if the server gave it a max-age, when it expires. Until then, the cached response is used without a
+    request (see fresh()). After that, it is revalidated with If-None-Match, so an unchanged one costs an empty 304
+    response."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get("UPISAS_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def _load(self, url):
+        try:
+            with open(self._path(url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "etag" in entry and "body" in entry else None
+
+    def get(self, url):
+        """ Return the (etag, body) cached for a URL, or None if there is none (or it can't be read)."""
+        entry = self._load(url)
+        return (entry["etag"], entry["body"]) if entry else None
+
+    def fresh(self, url):
+        """ Return the (etag, body) cached for a URL if it hasn't expired yet, so it can be used without a request, or
+        None otherwise."""
+        entry = self._load(url)
+        if entry and entry.get("expires") is not None and time.time() < entry["expires"]:
+            return entry["etag"], entry["body"]
+        return None
+
+    def put(self, url, etag, body, max_age=None):
+        """ Cache the body and ETag of a response, fresh for max_age seconds if given. The cache file is replaced
+        atomically, so that concurrent runs never read a partially written one."""
+        path = self._path(url)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        expires = time.time() + max_age if max_age is not None else None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary_path, "w") as f:
+                json.dump({"url": url, "etag": etag, "body": body, "expires": expires}, f)
+            os.replace(temporary_path, path)
+        except OSError as e:
+            logging.warning(f"Cannot cache the response of {url}: {e}")
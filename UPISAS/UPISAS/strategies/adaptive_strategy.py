@@ -1,11 +1,30 @@
-import math
+import functools
+import numpy as np
 from UPISAS.strategy import Strategy
 import logging
 
+# (dx, dy) of the moves east, south, west, north and stay
+DIRECTION_VECTORS = np.array([(1, 0), (0, 1), (-1, 0), (0, -1), (0, 0)])
+
+
+@functools.lru_cache(maxsize=8)
+def window_distance_field(radius):
+    """
+    Distances from each move target to every cell of the (2 * radius + 1) ** 2 window centred on a UAV, shaped
+    (5, window cells), with the cells in row-major (dx, dy) order.
+    """
+    cell_offsets = np.arange(-radius, radius + 1)
+    cells = np.stack(np.meshgrid(cell_offsets, cell_offsets, indexing="ij"), axis=-1).reshape(-1, 2)
+    return np.sqrt(((DIRECTION_VECTORS[:, np.newaxis, :] - cells[np.newaxis, :, :]) ** 2).sum(axis=-1))
+
 class WildfireAvoidanceStrategy(Strategy):
     def __init__(self, exemplar):
         super().__init__(exemplar)
         self.smoke_density_threshold = 50  # Smoke density threshold
+        # score moves with a distance field of the window around each UAV instead of the distance to every danger
+        # position, which pays off with hundreds of smoke positions, at the cost of exact tie-breaking
+        self.use_distance_field = False
+        self.distance_field_radius = 8  # UAV observation radius, window of the distance field
 
     def analyze(self):
 
@@ -42,59 +61,51 @@ class WildfireAvoidanceStrategy(Strategy):
         first_direction = constants.get("firstDirection", "south")
         second_direction = constants.get("secondDirection", "east")
 
-        for index, uav in enumerate(self.knowledge.fresh_data.get("dynamicValues", {}).get("uavDetails", [])):
-            uav_id = uav.get("id")
-            x = uav.get("x", 0)
-            y = uav.get("y", 0)
-            current_direction = uav.get("direction", 0)
+        uav_details = self.knowledge.fresh_data.get("dynamicValues", {}).get("uavDetails", [])
+        new_directions = [None] * len(uav_details)
+        # UAVs that avoid danger, whose directions are found together below
+        avoiding = []
 
+        for index, uav in enumerate(uav_details):
             # Initial dispersion phase
             if index == 0:
                 if current_step < 15:
                     # The first UAV moves along the first wind direction
-                    new_direction = self.convert_direction_to_int(first_direction)
+                    new_directions[index] = self.convert_direction_to_int(first_direction)
                 elif current_step < 20:
                     # After 10 steps, switch to the second wind direction
-                    new_direction = self.convert_direction_to_int(second_direction)
+                    new_directions[index] = self.convert_direction_to_int(second_direction)
                 else:
-                    danger_positions = avoidance_data.get(uav_id, [])
-                    other_uav_positions = [
-                        (other_uav.get("x", 0), other_uav.get("y", 0))
-                        for other_uav in self.knowledge.fresh_data.get("dynamicValues", {}).get("uavDetails", [])
-                        if other_uav.get("id") != uav_id
-                    ]
-                    new_direction = self.find_safe_direction(x, y, current_direction, danger_positions, other_uav_positions)
+                    avoiding.append(index)
 
             elif current_step < 5:
                 if index == 1:
                     # The second UAV moves along the second wind direction
-                    new_direction = self.convert_direction_to_int(second_direction)
+                    new_directions[index] = self.convert_direction_to_int(second_direction)
                 elif index == 2 and current_step < 2:
                     # The third UAV chooses another direction
-                    new_direction = (set([0, 1, 2, 3]) - {
+                    new_directions[index] = (set([0, 1, 2, 3]) - {
                         self.convert_direction_to_int(first_direction),
                         self.convert_direction_to_int(second_direction)
                     }).pop()
                 else:
-                    danger_positions = avoidance_data.get(uav_id, [])
-                    other_uav_positions = [
-                        (other_uav.get("x", 0), other_uav.get("y", 0))
-                        for other_uav in self.knowledge.fresh_data.get("dynamicValues", {}).get("uavDetails", [])
-                        if other_uav.get("id") != uav_id
-                    ]
-                    new_direction = self.find_safe_direction(x, y, current_direction, danger_positions, other_uav_positions)
+                    avoiding.append(index)
 
             else:
-                danger_positions = avoidance_data.get(uav_id, [])
-                other_uav_positions = [
-                    (other_uav.get("x", 0), (other_uav.get("y", 0)))
-                    for other_uav in self.knowledge.fresh_data.get("dynamicValues", {}).get("uavDetails", [])
-                    if other_uav.get("id") != uav_id
-                ]
-                new_direction = self.find_safe_direction(x, y, current_direction, danger_positions, other_uav_positions)
-
+                avoiding.append(index)
+
+        if avoiding:
+            safe_directions = self.find_safe_directions(
+                [(uav_details[index].get("x", 0), uav_details[index].get("y", 0)) for index in avoiding],
+                [avoidance_data.get(uav_details[index].get("id"), []) for index in avoiding],
+                [[(other_uav.get("x", 0), other_uav.get("y", 0)) for other_uav in uav_details
+                  if other_uav.get("id") != uav_details[index].get("id")] for index in avoiding])
+            for index, direction in zip(avoiding, safe_directions):
+                new_directions[index] = direction
+
+        for uav, new_direction in zip(uav_details, new_directions):
             plan_data["uavDetails"].append({
-                "id": uav_id,
+                "id": uav.get("id"),
                 "action": "move",
                 "direction": new_direction
             })
@@ -104,49 +115,93 @@ class WildfireAvoidanceStrategy(Strategy):
 
     def find_safe_direction(self, x, y, current_direction, danger_positions, other_uav_positions):
         """
-        Find the safest direction to move by considering the total score from all danger positions.
+        Find the safest direction to move by considering the total score from all danger positions. The scores are
+        always finite, so one of the moves always beats current_direction, which is only kept for compatibility.
         """
-        possible_directions = [0, 1, 2, 3, 4]  
-        direction_vectors = {
-            0: (1, 0),   # east
-            1: (0, 1),   # south
-            2: (-1, 0),  # west
-            3: (0, -1),  # north
-            4: (0, 0)    # stay
-        }
-
-        if not danger_positions:
-            return 4  
-
-        max_score = -math.inf  
-        best_direction = current_direction  
-
-        for direction in possible_directions:
-            dx, dy = direction_vectors[direction]
-            new_x, new_y = x + dx, y + dy
-
-            # calculate the total distance to all danger positions
-            total_distance_to_danger = sum(
-                math.sqrt((new_x - danger_x) ** 2 + (new_y - danger_y) ** 2)
-                for danger_x, danger_y in danger_positions
-            )
-
-            # calculate the total distance to other UAV
-            total_distance_to_other_uav = sum(
-                math.sqrt((new_x - other_x) ** 2 + (new_y - other_y) ** 2)
-                for other_x, other_y in other_uav_positions
-            )
+        return self.find_safe_directions([(x, y)], [danger_positions], [other_uav_positions])[0]
 
-            if total_distance_to_other_uav < 10 * len(other_uav_positions):
-                total_distance_to_danger -= (10 * len(other_uav_positions) - total_distance_to_other_uav)
-
-            score = total_distance_to_danger
-
-            if score > max_score:
-                max_score = score
-                best_direction = direction
-
-        return best_direction
+    def find_safe_directions(self, positions, danger_positions, other_uav_positions):
+        """
+        Find the safest direction of several UAVs at once: the 5 possible moves of every UAV are scored against its
+        danger positions and the positions of the other UAVs in one NumPy broadcast, padding the per UAV lists.
+        The distances are summed in the same order as a Python loop would, so the scores are exactly the same.
+        """
+        uav_count = len(positions)
+        targets = np.asarray(positions, dtype=np.int64).reshape(uav_count, 1, 2) + DIRECTION_VECTORS
+
+        if self.use_distance_field:
+            total_distance_to_danger = self.danger_distance_totals_from_field(positions, danger_positions)
+        else:
+            danger, danger_mask = self.pad_positions(danger_positions)
+            total_distance_to_danger = self.distance_totals(targets, danger, danger_mask)
+
+        # calculate the total distance to other UAV
+        others, others_mask = self.pad_positions(other_uav_positions)
+        total_distance_to_other_uav = self.distance_totals(targets, others, others_mask)
+
+        other_uav_counts = others_mask.sum(axis=1, keepdims=True)
+        too_close = total_distance_to_other_uav < 10 * other_uav_counts
+        scores = np.where(too_close, total_distance_to_danger - (10 * other_uav_counts - total_distance_to_other_uav),
+                          total_distance_to_danger)
+
+        # the first best direction wins ties, and a UAV without danger stays
+        best_directions = np.argmax(scores, axis=1)
+        return [int(best_direction) if len(danger) else 4
+                for best_direction, danger in zip(best_directions, danger_positions)]
+
+    @staticmethod
+    def pad_positions(position_lists):
+        """
+        Stack lists of (x, y) positions of different lengths into an (n, longest, 2) array, and a mask of the
+        positions that aren't padding.
+        """
+        longest = max((len(position_list) for position_list in position_lists), default=0)
+        padded = np.zeros((len(position_lists), longest, 2), dtype=np.int64)
+        mask = np.zeros((len(position_lists), longest), dtype=bool)
+        for index, position_list in enumerate(position_lists):
+            if len(position_list):
+                padded[index, :len(position_list)] = position_list
+                mask[index, :len(position_list)] = True
+        return padded, mask
+
+    @staticmethod
+    def distance_totals(targets, positions, mask):
+        """
+        Sum of the distances from each of the (n, 5) move targets to the positions of its UAV, shaped (n, 5).
+        """
+        offsets = targets[:, :, np.newaxis, :] - positions[:, np.newaxis, :, :]
+        distances = np.where(mask[:, np.newaxis, :], np.sqrt((offsets ** 2).sum(axis=-1)), 0.0)
+        if distances.shape[-1] == 0:
+            return np.zeros(targets.shape[:2])
+        # cumsum adds the distances one after the other, like sum(), whereas sum() would add them pairwise
+        return np.cumsum(distances, axis=-1)[..., -1]
+
+    def danger_distance_totals_from_field(self, positions, danger_positions):
+        """
+        Same as distance_totals() for the danger positions, using a precomputed distance field: the danger positions
+        of every UAV are counted per cell of the window of distance_field_radius around it (in one bincount), and the
+        totals of the 5 move targets are the product of these counts with the distances from the targets to the window
+        cells. The cost per UAV is one count per danger position plus a fixed (5, window cells) product, instead of 5
+        distances per danger position. Danger positions out of the window are added one by one. The totals are only
+        equal up to rounding, so exact ties may be broken differently.
+        """
+        radius = self.distance_field_radius
+        side = 2 * radius + 1
+        uav_count = len(positions)
+        origins = np.asarray(positions, dtype=np.int64).reshape(uav_count, 1, 2)
+        danger, danger_mask = self.pad_positions(danger_positions)
+        offsets = danger - origins
+        inside = danger_mask & (np.abs(offsets) <= radius).all(axis=-1)
+
+        uav_indices = np.broadcast_to(np.arange(uav_count)[:, np.newaxis], inside.shape)
+        cells = uav_indices * side * side + (offsets[..., 0] + radius) * side + offsets[..., 1] + radius
+        counts = np.bincount(cells[inside], minlength=uav_count * side * side).reshape(uav_count, side * side)
+        totals = counts @ window_distance_field(radius).T
+
+        outside = danger_mask & ~inside
+        if outside.any():
+            totals += self.distance_totals(origins + DIRECTION_VECTORS, danger, outside)
+        return totals
 
     def convert_direction_to_int(self, direction_str):
         """
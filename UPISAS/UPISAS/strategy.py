@@ -1,20 +1,33 @@
 from abc import ABC, abstractmethod
-import requests
 import pprint
+import time
 
 from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
-from UPISAS.knowledge import Knowledge
-from UPISAS import validate_schema, get_response_for_get_request
+from UPISAS.knowledge import Knowledge, MonitoredData, DEFAULT_HISTORY_DEPTH
+from UPISAS.http_client import get_session
+from UPISAS.response_cache import ResponseCache, parse_max_age
+from UPISAS import validate_schema, get_response_for_get_request, get_response_for_event_stream, \
+    iter_server_sent_events, apply_delta, decode_response, PACKED_MIMETYPE
 import logging
 
 pp = pprint.PrettyPrinter(indent=4)
 
+# ways run_loop() can learn that the managed system has advanced a step
+LOOP_MODES = ("step", "events", "poll")
+
 
 class Strategy(ABC):
+    # whether monitored data is requested as packed binary payloads instead of JSON (if the exemplar supports them)
+    packed_payloads = False
+    # on-disk cache of the responses that rarely change between runs (schemas and constants), shared by all strategies
+    response_cache = ResponseCache()
+    # number of values kept per key in knowledge.monitored_data (None keeps all of them)
+    history_depth = DEFAULT_HISTORY_DEPTH
 
     def __init__(self, exemplar):
         self.exemplar = exemplar
-        self.knowledge = Knowledge(dict(), dict(), dict(), dict(), dict(), dict(), dict(), dict())
+        self.knowledge = Knowledge(MonitoredData(self.history_depth), dict(), dict(), dict(), dict(), dict(), dict(), dict())
+        self.event_stream = None
 
     def ping(self):
         ping_res = self._perform_get_request(self.exemplar.base_endpoint)
@@ -27,14 +40,64 @@ class Strategy(ABC):
         if with_validation:
             if(not self.knowledge.monitor_schema): self.get_monitor_schema()
             #validate_schema(fresh_data, self.knowledge.monitor_schema)
+        self._store_fresh_data(fresh_data, verbose)
+        return True
+
+    def monitor_delta(self, endpoint_suffix="monitor/delta", constants_endpoint_suffix="constants", verbose=False):
+        """ Same as monitor(), but only the values that changed since the last monitored step are requested. Constants
+        are requested once, and fresh_data is rebuilt as the full monitor payload, so analyze() and plan() are unaware
+        of the difference."""
+        constants = self.knowledge.fresh_data.get("constants")
+        if constants is None:
+            constants = self._perform_cached_get_request(constants_endpoint_suffix)
+        delta = self._perform_get_request(self._delta_endpoint(endpoint_suffix))
+        self._store_delta(delta, constants, verbose)
+        return True
+
+    def _delta_endpoint(self, endpoint_suffix):
+        since = self.knowledge.fresh_data.get("currentStep")
+        return endpoint_suffix if since is None else f"{endpoint_suffix}?since={since}"
+
+    def _store_delta(self, delta, constants, verbose=False):
+        """ Rebuild the full monitor payload from a delta and the previous one, and store it as monitor() does."""
+        if(verbose): print("[Monitor]\tgot delta: " + str(delta))
+        if delta["full"]:
+            dynamic_values = delta["dynamicValues"]
+        else:
+            dynamic_values = apply_delta(self.knowledge.fresh_data.get("dynamicValues", {}), delta["dynamicValues"])
+        fresh_data = {"currentStep": delta["currentStep"], "constants": constants, "dynamicValues": dynamic_values}
+        self._store_fresh_data(fresh_data, verbose)
+
+    def monitor_events(self, endpoint_suffix="events", verbose=False):
+        """ Same as monitor(), but instead of polling, it waits for the monitor data the server pushes (as server-sent
+        events) as soon as each time step is completed. The first call subscribes to the events, and the next calls get
+        the following time steps. It returns False, and unsubscribes, once the simulation has finished."""
+        if self.event_stream is None:
+            url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+            response = get_response_for_event_stream(url)
+            if response.status_code == 404:
+                logging.error("Please check that the endpoint you are trying to reach actually exists.")
+                raise EndpointNotReachable
+            self.event_stream = (response, iter_server_sent_events(response))
+        for event, fresh_data in self.event_stream[1]:
+            if event == "step":
+                if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+                self._store_fresh_data(fresh_data, verbose)
+                return True
+            if event == "end":
+                break
+        self.unsubscribe()
+        return False
+
+    def unsubscribe(self):
+        if self.event_stream is not None:
+            self.event_stream[0].close()
+            self.event_stream = None
+
+    def _store_fresh_data(self, fresh_data, verbose=False):
         self.knowledge.fresh_data = fresh_data
-        data = self.knowledge.monitored_data
-        for key in list(fresh_data.keys()):
-            if key not in data:
-                data[key] = []
-            data[key].append(fresh_data[key])
+        self.knowledge.monitored_data.record(fresh_data)
         if(verbose): print("[Knowledge]\tdata monitored so far: " + str(self.knowledge.monitored_data))
-        return True
         
     """ 
     def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False):
@@ -61,13 +124,107 @@ class Strategy(ABC):
             if(not self.knowledge.execute_schema): self.get_execute_schema()
             #validate_schema(adaptation, self.knowledge.execute_schema)
         url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
-        response = requests.put(url, json=adaptation)
+        response = get_session().put(url, json=adaptation)
         print("[Execute]\tposted configuration: " + str(adaptation))
         if response.status_code == 404:
             logging.error("Cannot execute adaptation on remote system, check that the execute endpoint exists.")
             raise EndpointNotReachable
         return True
 
+    def step(self, adaptation=None, endpoint_suffix="step", with_validation=True, verbose=False):
+        """ execute() and monitor() in a single round trip: the adaptation is sent, and the monitor data of the time step
+        it was applied in is returned by the server once the step is completed, and stored as monitor() does."""
+        if(not adaptation): adaptation= self.knowledge.plan_data
+        if with_validation:
+            if(not self.knowledge.execute_schema): self.get_execute_schema()
+            #validate_schema(adaptation, self.knowledge.execute_schema)
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        response = get_session().put(url, json=adaptation, headers=self._accept_headers())
+        if(verbose): print("[Execute]\tposted configuration: " + str(adaptation))
+        if response.status_code == 404:
+            logging.error("Cannot step the remote system, check that the step endpoint exists.")
+            raise EndpointNotReachable
+        if response.status_code == 504:
+            logging.error("The remote system did not complete the next step in time.")
+            return False
+        fresh_data = decode_response(response)
+        if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+        self._store_fresh_data(fresh_data, verbose)
+        return True
+
+    def run_loop(self, max_steps=None, max_seconds=None, mode="step", poll_interval=0.05, on_step=None,
+                 verbose=False):
+        """ Drive monitor -> analyze -> plan -> execute once per step of the managed system, as fast as it advances,
+        until max_steps steps were handled, max_seconds went by, or the system stops advancing (e.g. its run finished;
+        in "poll" mode, only max_seconds ends the wait for a step that never comes). At least one budget must be given.
+        The mode sets how the loop waits for the next step:
+            - "step": the adaptation is executed and the next step monitored in a single request (see step()). When
+              nothing was planned, the last adaptation (or an empty one) is sent, since the system only advances on a
+              request.
+            - "events": the next step is pushed by the server (see monitor_events()).
+            - "poll": monitor() is polled every poll_interval seconds until the step counter ("currentStep") advances.
+        Each step is handled once: on_step(self), if given, is called with its fresh data (e.g. to record it) before
+        analyze(). It returns the number of steps handled."""
+        calls = self._loop_calls(max_steps, max_seconds, mode, poll_interval, on_step, verbose)
+        try:
+            method, kwargs = next(calls)
+            while True:
+                method, kwargs = calls.send(method(**kwargs))
+        except StopIteration as stop:
+            return stop.value
+
+    def _loop_calls(self, max_steps, max_seconds, mode, poll_interval, on_step, verbose):
+        """ The decisions of run_loop(), shared by the synchronous and asynchronous strategies: a generator yielding the
+        (method, kwargs) calls that request the managed system, which is sent the result of each call, and returns the
+        number of steps handled."""
+        if mode not in LOOP_MODES:
+            raise ValueError(f"Unknown loop mode {mode!r}, expected one of {LOOP_MODES}")
+        if max_steps is None and max_seconds is None:
+            raise ValueError("run_loop() needs max_steps, max_seconds or both")
+        deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+
+        if mode == "events":
+            advanced = yield self.monitor_events, {"verbose": verbose}
+        else:
+            advanced = yield self.monitor, {"verbose": verbose}
+        steps = 0
+        while advanced and (max_steps is None or steps < max_steps) and \
+                (deadline is None or time.monotonic() < deadline):
+            current_step = self.knowledge.fresh_data.get("currentStep")
+            if on_step is not None:
+                on_step(self)
+            steps += 1
+
+            planned = self.analyze() and self.plan()
+            if mode == "step":
+                adaptation = self.knowledge.plan_data or {"uavDetails": []}
+                advanced = (yield self.step, {"adaptation": adaptation, "verbose": verbose}) and \
+                    self.knowledge.fresh_data.get("currentStep") != current_step
+            else:
+                if planned:
+                    yield self.execute, {}
+                if mode == "events":
+                    advanced = yield self.monitor_events, {"verbose": verbose}
+                else:
+                    advanced = yield self._poll_next_step, {"current_step": current_step,
+                                                            "poll_interval": poll_interval, "deadline": deadline,
+                                                            "verbose": verbose}
+        if mode == "events":
+            self.unsubscribe()
+        return steps
+
+    def _poll_next_step(self, current_step, poll_interval, deadline, verbose=False):
+        """ Poll the monitor endpoint until the step counter moves past current_step, and only store the data of the
+        new step. False if the deadline passes first."""
+        while deadline is None or time.monotonic() < deadline:
+            fresh_data = self._perform_get_request("monitor")
+            if fresh_data.get("currentStep") != current_step:
+                if(verbose): print("[Monitor]\tgot fresh_data: " + str(fresh_data))
+                self._store_fresh_data(fresh_data, verbose)
+                return True
+            time.sleep(poll_interval)
+        return False
+
     def get_adaptation_options(self, endpoint_suffix: "API Endpoint" = "adaptation_options", with_validation=True):
         self.knowledge.adaptation_options = self._perform_get_request(endpoint_suffix)
         if with_validation:
@@ -77,27 +234,64 @@ class Strategy(ABC):
         pp.pprint(self.knowledge.adaptation_options)
 
     def get_monitor_schema(self, endpoint_suffix = "monitor_schema"):
-        self.knowledge.monitor_schema = self._perform_get_request(endpoint_suffix)
+        self.knowledge.monitor_schema = self._perform_cached_get_request(endpoint_suffix)
         logging.info("monitor_schema set to: ")
         pp.pprint(self.knowledge.monitor_schema)
 
     def get_execute_schema(self, endpoint_suffix = "execute_schema"):
-        self.knowledge.execute_schema = self._perform_get_request(endpoint_suffix)
+        self.knowledge.execute_schema = self._perform_cached_get_request(endpoint_suffix)
         logging.info("execute_schema set to: ")
         pp.pprint(self.knowledge.execute_schema)
 
     def get_adaptation_options_schema(self, endpoint_suffix: "API Endpoint" = "adaptation_options_schema"):
-        self.knowledge.adaptation_options_schema = self._perform_get_request(endpoint_suffix)
+        self.knowledge.adaptation_options_schema = self._perform_cached_get_request(endpoint_suffix)
         logging.info("adaptation_options_schema set to: ")
         pp.pprint(self.knowledge.adaptation_options_schema)
 
     def _perform_get_request(self, endpoint_suffix: "API Endpoint"):
         url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
-        response = get_response_for_get_request(url)
+        response = get_response_for_get_request(url, self._accept_headers())
         if response.status_code == 404:
             logging.error("Please check that the endpoint you are trying to reach actually exists.")
             raise EndpointNotReachable
-        return response.json()
+        return decode_response(response)
+
+    def _perform_cached_get_request(self, endpoint_suffix: "API Endpoint"):
+        url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
+        fresh = self.response_cache.fresh(url)
+        if fresh:
+            logging.info(f"{url} still fresh, using the cached response")
+            return fresh[1]
+        cached = self.response_cache.get(url)
+        response = get_response_for_get_request(url, self._revalidation_headers(cached))
+        return self._cached_response_data(url, cached, response.status_code, response.headers, response.json)
+
+    @staticmethod
+    def _revalidation_headers(cached):
+        return {"If-None-Match": cached[0]} if cached else None
+
+    def _cached_response_data(self, url, cached, status_code, headers, decode):
+        """ The data of a revalidated response: the cached data if it was not modified (304), and otherwise the data
+        decode() returns, which is cached when the response has an ETag. Either way, the cached response is used
+        without a request for the max-age of the response, if it has one."""
+        max_age = parse_max_age(headers.get("Cache-Control"))
+        if status_code == 304 and cached:
+            logging.info(f"{url} not modified, using the cached response")
+            if max_age is not None:
+                self.response_cache.put(url, cached[0], cached[1], max_age)
+            return cached[1]
+        if status_code == 404:
+            logging.error("Please check that the endpoint you are trying to reach actually exists.")
+            raise EndpointNotReachable
+        data = decode()
+        if headers.get("ETag"):
+            self.response_cache.put(url, headers["ETag"], data, max_age)
+        return data
+
+    def _accept_headers(self):
+        if self.packed_payloads:
+            return {"Accept": f"{PACKED_MIMETYPE}, application/json;q=0.9, */*;q=0.8"}
+        return None
 
     @abstractmethod
     def analyze(self):
@@ -0,0 +1,77 @@
+import math
+import random
+import unittest
+from UPISAS.strategies.adaptive_strategy import WildfireAvoidanceStrategy
+
+
+def find_safe_direction_loop(x, y, current_direction, danger_positions, other_uav_positions):
+    """
+    The scoring of the moves one at a time, that the vectorized scoring must reproduce exactly.
+    """
+    if not danger_positions:
+        return 4
+    max_score = -math.inf
+    best_direction = current_direction
+    for direction, (dx, dy) in enumerate([(1, 0), (0, 1), (-1, 0), (0, -1), (0, 0)]):
+        new_x, new_y = x + dx, y + dy
+        score = sum(math.sqrt((new_x - danger_x) ** 2 + (new_y - danger_y) ** 2)
+                    for danger_x, danger_y in danger_positions)
+        total_distance_to_other_uav = sum(math.sqrt((new_x - other_x) ** 2 + (new_y - other_y) ** 2)
+                                          for other_x, other_y in other_uav_positions)
+        if total_distance_to_other_uav < 10 * len(other_uav_positions):
+            score -= (10 * len(other_uav_positions) - total_distance_to_other_uav)
+        if score > max_score:
+            max_score = score
+            best_direction = direction
+    return best_direction
+
+
+class TestFindSafeDirections(unittest.TestCase):
+    """
+    Test cases for the vectorized scoring of the moves of WildfireAvoidanceStrategy.
+    """
+
+    def setUp(self):
+        self.strategy = WildfireAvoidanceStrategy(None)
+        rng = random.Random(7)
+        self.cases = []
+        for _ in range(300):
+            x, y = rng.randrange(50), rng.randrange(50)
+            danger = [(x + rng.randint(-8, 8), y + rng.randint(-8, 8)) for _ in range(rng.choice([0, 1, 4, 300]))]
+            others = [(x + rng.randint(-6, 6), y + rng.randint(-6, 6)) for _ in range(rng.choice([0, 1, 2]))]
+            self.cases.append(((x, y), rng.randrange(5), danger, others))
+
+    def test_matches_the_loop(self):
+        for (x, y), direction, danger, others in self.cases:
+            self.assertEqual(self.strategy.find_safe_direction(x, y, direction, danger, others),
+                             find_safe_direction_loop(x, y, direction, danger, others))
+
+    def test_batch_matches_single_uavs(self):
+        positions, _, dangers, others = map(list, zip(*self.cases))
+        self.assertEqual(self.strategy.find_safe_directions(positions, dangers, others),
+                         [find_safe_direction_loop(x, y, *case) for (x, y), *case in self.cases])
+
+    def test_ties_go_to_the_first_direction(self):
+        danger = [(11, 11), (9, 11), (11, 9), (9, 9)]
+        self.assertEqual(self.strategy.find_safe_direction(10, 10, 3, danger, []),
+                         find_safe_direction_loop(10, 10, 3, danger, []))
+
+    def test_distance_field_scores(self):
+        self.strategy.use_distance_field = True
+        positions, _, dangers, _ = zip(*self.cases)
+        totals = self.strategy.danger_distance_totals_from_field(positions, dangers)
+        for ((x, y), _, danger, _), total in zip(self.cases, totals):
+            for (dx, dy), distance in zip([(1, 0), (0, 1), (-1, 0), (0, -1), (0, 0)], total):
+                self.assertAlmostEqual(distance, sum(math.dist((x + dx, y + dy), position) for position in danger))
+
+    def test_distance_field_with_danger_out_of_the_window(self):
+        self.strategy.distance_field_radius = 3
+        positions, _, dangers, _ = zip(*self.cases)
+        totals = self.strategy.danger_distance_totals_from_field(positions, dangers)
+        for ((x, y), _, danger, _), total in zip(self.cases, totals):
+            for (dx, dy), distance in zip([(1, 0), (0, 1), (-1, 0), (0, -1), (0, 0)], total):
+                self.assertAlmostEqual(distance, sum(math.dist((x + dx, y + dy), position) for position in danger))
+
+
+if __name__ == '__main__':
+    unittest.main()
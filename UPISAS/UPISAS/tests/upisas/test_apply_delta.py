@@ -0,0 +1,30 @@
+import unittest
+from UPISAS import apply_delta
+
+
+class TestApplyDelta(unittest.TestCase):
+    """
+    Test cases for applying /monitor/delta payloads to the previous monitored values.
+    """
+
+    def setUp(self):
+        self.previous = {"MR1": [1.0, 2.0],
+                         "uavDetails": [{"id": 2500, "position": [1, 1], "direction": 0},
+                                        {"id": 2501, "position": [2, 2], "direction": 3}]}
+
+    def test_unchanged_values_are_kept(self):
+        self.assertEqual(apply_delta(self.previous, {}), self.previous)
+
+    def test_plain_values_are_replaced(self):
+        updated = apply_delta(self.previous, {"MR1": [3.0, 4.0]})
+        self.assertEqual(updated["MR1"], [3.0, 4.0])
+        self.assertEqual(self.previous["MR1"], [1.0, 2.0])
+
+    def test_objects_are_updated_by_id(self):
+        updated = apply_delta(self.previous, {"uavDetails": [{"id": 2501, "direction": 1}]})
+        self.assertEqual(updated["uavDetails"], [{"id": 2500, "position": [1, 1], "direction": 0},
+                                                 {"id": 2501, "position": [2, 2], "direction": 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
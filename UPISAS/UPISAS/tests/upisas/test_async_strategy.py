@@ -0,0 +1,159 @@
+import asyncio
+import json
+import tempfile
+import types
+import unittest
+from UPISAS.async_strategy import AsyncStrategy, run_concurrently
+from UPISAS.response_cache import ResponseCache
+
+
+class FakeResponse:
+
+    def __init__(self, status, data, headers=None):
+        self.status = status
+        self.headers = {"Content-Type": "text/json", **(headers or {})}
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        await asyncio.sleep(0)
+        return json.dumps(self.data).encode()
+
+
+class FakeEventStream:
+
+    def __init__(self, last_step):
+        self.status = 200
+        self.content = self.lines(last_step)
+        self.closed = False
+
+    @staticmethod
+    async def lines(last_step):
+        yield b": keep-alive\n"
+        yield b"\n"
+        for step in range(last_step + 1):
+            for line in (f"id: {step}", "event: step", f"data: {{\"currentStep\": {step}}}", ""):
+                yield f"{line}\r\n".encode()
+        for line in (f"id: {last_step}", "event: end", "data: {}", ""):
+            yield f"{line}\n".encode()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """
+    An aiohttp-like session serving /monitor, /step, /events and revalidated schemas of managed systems that are step
+    counters, until last_step.
+    """
+
+    def __init__(self, last_step):
+        self.last_step = last_step
+        self.steps = {}
+        self.streams = []
+        self.not_modified = 0
+        self.schema_requests = 0
+        self.schema_max_age = None
+
+    def request(self, method, url, json=None, headers=None):
+        system, endpoint = url.rsplit("/", 1)
+        if endpoint.endswith("_schema"):
+            self.schema_requests += 1
+            cache_control = {"Cache-Control": f"max-age={self.schema_max_age}"} if self.schema_max_age else {}
+            if headers and headers.get("If-None-Match") == endpoint:
+                self.not_modified += 1
+                return FakeResponse(304, None, cache_control)
+            return FakeResponse(200, {"title": endpoint}, {"ETag": endpoint, **cache_control})
+        if endpoint == "step":
+            self.steps[system] = min(self.steps.get(system, 0) + 1, self.last_step)
+        return FakeResponse(200, {"currentStep": self.steps.get(system, 0)})
+
+    async def get(self, url, headers=None):
+        self.streams.append(FakeEventStream(self.last_step))
+        return self.streams[-1]
+
+
+class CountingStrategy(AsyncStrategy):
+
+    def __init__(self, base_endpoint, session):
+        super().__init__(types.SimpleNamespace(base_endpoint=base_endpoint), session)
+        self.analyzed = []
+
+    def analyze(self):
+        self.analyzed.append(self.knowledge.fresh_data["currentStep"])
+        return True
+
+    def plan(self):
+        self.knowledge.plan_data = {"uavDetails": []}
+        return True
+
+
+class TestAsyncStrategy(unittest.TestCase):
+    """
+    Test cases for the asynchronous MAPE-K loop of AsyncStrategy.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        CountingStrategy.response_cache = ResponseCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_run_concurrently(self):
+        session = FakeSession(last_step=20)
+        strategies = [CountingStrategy(f"http://localhost/envs/{env}", session) for env in range(5)]
+        steps = asyncio.run(run_concurrently(strategies, max_seconds=5))
+        self.assertEqual(steps, [21] * 5)
+        for strategy in strategies:
+            self.assertEqual(strategy.analyzed, list(range(21)))
+
+    def test_step_budget(self):
+        strategy = CountingStrategy("http://localhost", FakeSession(last_step=20))
+        self.assertEqual(asyncio.run(strategy.run_loop(max_steps=3)), 3)
+        self.assertEqual(strategy.analyzed, [0, 1, 2])
+
+    def test_step_mode_steps_when_nothing_is_planned(self):
+        strategy = CountingStrategy("http://localhost", FakeSession(last_step=20))
+        strategy.plan = lambda: False
+        self.assertEqual(asyncio.run(strategy.run_loop(max_steps=3, max_seconds=60)), 3)
+        self.assertEqual(strategy.analyzed, [0, 1, 2])
+
+    def test_events(self):
+        session = FakeSession(last_step=5)
+        strategy = CountingStrategy("http://localhost", session)
+        self.assertEqual(asyncio.run(strategy.run_loop(max_steps=10, mode="events")), 6)
+        self.assertEqual(strategy.analyzed, list(range(6)))
+        self.assertEqual(len(session.streams), 1)
+        self.assertTrue(session.streams[0].closed)
+        self.assertIsNone(strategy.event_stream)
+
+    def test_ping(self):
+        strategy = CountingStrategy("http://localhost", FakeSession(last_step=5))
+        asyncio.run(strategy.ping())
+
+    def test_cached_schemas(self):
+        session = FakeSession(last_step=5)
+        for _ in range(2):
+            strategy = CountingStrategy("http://localhost", session)
+            asyncio.run(strategy.get_monitor_schema())
+            self.assertEqual(strategy.knowledge.monitor_schema, {"title": "monitor_schema"})
+        self.assertEqual(session.not_modified, 1)
+
+    def test_fresh_schemas_are_not_requested(self):
+        session = FakeSession(last_step=5)
+        session.schema_max_age = 60
+        for _ in range(3):
+            strategy = CountingStrategy("http://localhost", session)
+            asyncio.run(strategy.get_monitor_schema())
+            self.assertEqual(strategy.knowledge.monitor_schema, {"title": "monitor_schema"})
+        self.assertEqual(session.schema_requests, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from UPISAS.http_client import create_session, configure_session, get_session
+
+
+class TestHttpClient(unittest.TestCase):
+    """
+    Test cases for the pooled HTTP session shared by strategies and exemplars.
+    """
+
+    def test_session_defaults(self):
+        adapter = create_session(timeout=(1, 2), retries=4).get_adapter("http://localhost:55555")
+        self.assertEqual(adapter.timeout, (1, 2))
+        self.assertEqual(adapter.max_retries.total, 4)
+        self.assertNotIn("PUT", adapter.max_retries.allowed_methods)
+
+    def test_shared_session(self):
+        self.assertIs(get_session(), get_session())
+        session = configure_session(retries=0)
+        self.assertIs(get_session(), session)
+        self.assertEqual(session.get_adapter("http://localhost:55555").max_retries.total, 0)
+        configure_session()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import math
+import unittest
+from collections import deque
+from UPISAS.knowledge import MonitoredData, NumericSeries
+
+
+class TestNumericSeries(unittest.TestCase):
+    """
+    Test cases for the typed ring buffer holding numeric monitored values.
+    """
+
+    def test_keeps_the_newest_values(self):
+        series = NumericSeries(3, range(5))
+        self.assertEqual(series.tolist(), [2, 3, 4])
+        self.assertEqual((series[0], series[-1], len(series)), (2, 4, 3))
+        self.assertEqual(series.sum(), 9)
+
+    def test_floats_widen_the_series(self):
+        series = NumericSeries(3, [1, 2])
+        series.append(2.5)
+        self.assertEqual(series.tolist(), [1.0, 2.0, 2.5])
+        self.assertEqual(series.max(), 2.5)
+
+    def test_aggregates(self):
+        series = NumericSeries(4, [5, 1, 7, 3, 9, 2])
+        self.assertEqual((series.sum(), series.mean(), series.min(), series.max()), (21, 5.25, 2, 9))
+        self.assertIsInstance(series.sum(), int)
+        # the values can still be appended after being aggregated
+        series.append(0.5)
+        self.assertEqual((series.sum(), series.min()), (14.5, 0.5))
+
+    def test_empty_series(self):
+        series = NumericSeries(3)
+        self.assertTrue(math.isnan(series.mean()))
+        self.assertEqual(series.sum(), 0)
+
+    def test_rejects_other_values(self):
+        with self.assertRaises(TypeError):
+            NumericSeries(3).append("1")
+
+
+class TestMonitoredData(unittest.TestCase):
+    """
+    Test cases for the bounded monitored data store of Knowledge.
+    """
+
+    def test_record_is_bounded_per_key(self):
+        data = MonitoredData(depth=2)
+        for step in range(4):
+            data.record({"currentStep": step, "dynamicValues": {"MR2": step}})
+        self.assertIsInstance(data["currentStep"], NumericSeries)
+        self.assertEqual(data["currentStep"], [2, 3])
+        self.assertEqual(list(data["dynamicValues"]), [{"MR2": 2}, {"MR2": 3}])
+
+    def test_numeric_key_with_other_values(self):
+        data = MonitoredData(depth=3)
+        for value in (1, 2, None):
+            data.record({"f": value})
+        self.assertIsInstance(data["f"], deque)
+        self.assertEqual(list(data["f"]), [1, 2, None])
+
+    def test_unbounded_depth(self):
+        data = MonitoredData(depth=None)
+        for step in range(2000):
+            data.record({"currentStep": step})
+        self.assertEqual(len(data["currentStep"]), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import importlib.util
+import json
+import math
+import os
+import tempfile
+import unittest
+from UPISAS.recorder import ColumnarRecorder, load_recording
+
+
+class TestColumnarRecorder(unittest.TestCase):
+    """
+    Test cases for the columnar recorder of per-step run metrics.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "stepwise_data")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record_steps(self, steps, flush_every=64):
+        with ColumnarRecorder(self.path, typecodes={"MR1": "d"}, flush_every=flush_every) as recorder:
+            for step in range(steps):
+                recorder.record({"step": step, "MR1": [0, step / 2], "positions": [[step, 1], [2, step]]})
+
+    def test_manifest(self):
+        self.record_steps(5, flush_every=2)
+        with open(os.path.join(self.path, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["steps"], 5)
+        self.assertEqual(manifest["columns"]["MR1"]["dtype"][1:], "f8")
+        self.assertEqual(manifest["columns"]["step"]["dtype"][1:], "i8")
+        self.assertEqual(manifest["columns"]["positions"]["shape"], [2, 2])
+        self.assertEqual(os.path.getsize(os.path.join(self.path, "positions.bin")), 5 * 4 * 8)
+
+    def test_inconsistent_shape(self):
+        recorder = ColumnarRecorder(self.path)
+        recorder.record({"MR1": [1.0, 2.0]})
+        with self.assertRaises(ValueError):
+            recorder.record({"MR1": [1.0]})
+        with self.assertRaises(ValueError):
+            recorder.record({"MR2": 1})
+
+    def test_existing_recording(self):
+        self.record_steps(1)
+        with self.assertRaises(FileExistsError):
+            ColumnarRecorder(self.path)
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is needed to load recordings")
+    def test_load_recording(self):
+        self.record_steps(100, flush_every=7)
+        columns = load_recording(self.path)
+        self.assertEqual(columns["positions"].shape, (100, 2, 2))
+        self.assertEqual(columns["step"].tolist(), list(range(100)))
+        self.assertEqual(columns["MR1"][:, 1].sum(), sum(range(100)) / 2)
+        self.assertEqual(columns["positions"][42].tolist(), [[42, 1], [2, 42]])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is needed to load recordings")
+    def test_missing_values(self):
+        with ColumnarRecorder(self.path, typecodes={"Integrity": "d", "positions": "q"}) as recorder:
+            recorder.record({"Integrity": [float("nan"), 0.5], "positions": [[-1, -1], [3, 4]]})
+            with self.assertRaises(TypeError):
+                recorder.record({"Integrity": [None, 0.5], "positions": [[-1, -1], [3, 4]]})
+        columns = load_recording(self.path)
+        self.assertTrue(math.isnan(columns["Integrity"][0, 0]))
+        self.assertEqual(columns["positions"][0].tolist(), [[-1, -1], [3, 4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from UPISAS.response_cache import ResponseCache, parse_max_age
+
+
+class TestResponseCache(unittest.TestCase):
+    """
+    Test cases for the on-disk cache of schema and constants responses.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_missing_response(self):
+        self.assertIsNone(self.cache.get("http://localhost:55555/monitor_schema"))
+
+    def test_put_and_get_response(self):
+        self.cache.put("http://localhost:55555/monitor_schema", '"abc"', {"type": "object"})
+        self.assertEqual(self.cache.get("http://localhost:55555/monitor_schema"), ('"abc"', {"type": "object"}))
+        self.assertIsNone(self.cache.get("http://localhost:55555/execute_schema"))
+
+    def test_responses_persist_across_instances(self):
+        self.cache.put("http://localhost:55555/constants", '"def"', {"width": 50})
+        cache = ResponseCache(self.cache.directory)
+        self.assertEqual(cache.get("http://localhost:55555/constants"), ('"def"', {"width": 50}))
+
+    def test_fresh_responses(self):
+        url = "http://localhost:55555/monitor_schema"
+        self.cache.put(url, '"abc"', {"type": "object"})
+        self.assertIsNone(self.cache.fresh(url))
+        self.cache.put(url, '"abc"', {"type": "object"}, max_age=60)
+        self.assertEqual(self.cache.fresh(url), ('"abc"', {"type": "object"}))
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.cache.fresh(url))
+            self.assertEqual(self.cache.get(url), ('"abc"', {"type": "object"}))
+
+    def test_parse_max_age(self):
+        self.assertEqual(parse_max_age("max-age=86400"), 86400)
+        self.assertEqual(parse_max_age("public, Max-Age=60"), 60)
+        self.assertIsNone(parse_max_age("no-cache"))
+        self.assertIsNone(parse_max_age("no-cache, max-age=60"))
+        self.assertIsNone(parse_max_age(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
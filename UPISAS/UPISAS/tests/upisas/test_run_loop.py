@@ -0,0 +1,86 @@
+import types
+import unittest
+from UPISAS.strategy import Strategy
+
+
+class CountingStrategy(Strategy):
+    """
+    A strategy whose managed system is a step counter that advances on each execution, until last_step.
+    """
+
+    def __init__(self, last_step):
+        super().__init__(types.SimpleNamespace(base_endpoint=None))
+        self.last_step = last_step
+        self.system_step = 0
+        self.analyzed = []
+        self.stepped = []
+        self.planning = True
+
+    def monitor(self, endpoint_suffix="monitor", with_validation=True, verbose=False):
+        self._store_fresh_data({"currentStep": self.system_step})
+        return True
+
+    def execute(self, adaptation=None, endpoint_suffix="execute", with_validation=True):
+        self.system_step = min(self.system_step + 1, self.last_step)
+        return True
+
+    def step(self, adaptation=None, endpoint_suffix="step", with_validation=True, verbose=False):
+        self.stepped.append(adaptation)
+        self.execute()
+        return self.monitor()
+
+    def _perform_get_request(self, endpoint_suffix):
+        return {"currentStep": self.system_step}
+
+    def analyze(self):
+        self.analyzed.append(self.knowledge.fresh_data["currentStep"])
+        return True
+
+    def plan(self):
+        if self.planning:
+            self.knowledge.plan_data = {"uavDetails": [{"id": 0, "direction": self.system_step % 5}]}
+        return self.planning
+
+
+class TestRunLoop(unittest.TestCase):
+    """
+    Test cases for the step driven MAPE-K loop of Strategy.
+    """
+
+    def test_stops_when_the_system_stops_advancing(self):
+        strategy = CountingStrategy(last_step=10)
+        self.assertEqual(strategy.run_loop(max_seconds=5), 11)
+        self.assertEqual(strategy.analyzed, list(range(11)))
+
+    def test_step_budget(self):
+        strategy = CountingStrategy(last_step=10)
+        self.assertEqual(strategy.run_loop(max_steps=4), 4)
+        self.assertEqual(strategy.analyzed, [0, 1, 2, 3])
+
+    def test_step_mode_steps_when_nothing_is_planned(self):
+        strategy = CountingStrategy(last_step=10)
+        strategy.planning = False
+        self.assertEqual(strategy.run_loop(max_steps=3, max_seconds=60), 3)
+        self.assertEqual(strategy.stepped, [{"uavDetails": []}] * 3)
+
+        strategy = CountingStrategy(last_step=10)
+        strategy.run_loop(max_steps=2)
+        strategy.planning = False
+        strategy.run_loop(max_steps=2)
+        self.assertEqual(strategy.stepped[2:], [{"uavDetails": [{"id": 0, "direction": 1}]}] * 2)
+
+    def test_poll_mode_handles_each_step_once(self):
+        strategy = CountingStrategy(last_step=3)
+        recorded = []
+        strategy.run_loop(max_seconds=0.5, mode="poll", poll_interval=0.01,
+                          on_step=lambda s: recorded.append(s.knowledge.fresh_data["currentStep"]))
+        self.assertEqual(recorded, [0, 1, 2, 3])
+        self.assertEqual(strategy.knowledge.monitored_data["currentStep"], [0, 1, 2, 3])
+
+    def test_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            CountingStrategy(last_step=1).run_loop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -99,6 +99,11 @@ class CanvasGrid(VisualizationElement):
         for x in range(model.grid.width):
             for y in range(model.grid.height):
                 cell_objects = model.grid.get_cell_list_contents([(x, y)])
+                # with the 'array' fire backend, fire cells are not agents placed in the grid
+                if model.fire_engine is not None:
+                    fire = model.fire_engine.get_cell((x, y))
+                    if fire is not None:
+                        cell_objects = [fire] + cell_objects
                 for obj in cell_objects:
                     portrayal = self.portrayal_method(obj)
                     if portrayal:
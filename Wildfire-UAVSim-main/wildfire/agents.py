@@ -1,24 +1,29 @@
 # python libraries
 
 import mesa
+import numpy
 import functools
 
 # own python modules
 
-from common_fixed_variables import *
+import common_fixed_variables
 
 
 # Class Fire holds methods for managing Fire agents
 class Fire(mesa.Agent):
 
-    # constructor
-    def __init__(self, unique_id, model, burning=False):
+    # constructor. If no fuel is given, it is drawn from the model random stream
+    def __init__(self, unique_id, model, burning=False, fuel=None):
         super().__init__(unique_id, model)
-        self.fuel = random.randint(FUEL_BOTTOM_LIMIT, FUEL_UPPER_LIMIT)
+        if fuel is None:
+            fuel = int(model.rng.integers(common_fixed_variables.FUEL_BOTTOM_LIMIT,
+                                          common_fixed_variables.FUEL_UPPER_LIMIT))
+        self.fuel = fuel
         self.burning = burning
         self.next_burning_state = None
         self.moore = True
         self.radius = 3
+        self.kernel = common_fixed_variables.get_distance_rate_kernel(self.radius)
         self.selected_dir = 0
         self.steps_counter = 0
         self.cell_prob = 0.0
@@ -41,6 +46,8 @@ class Fire(mesa.Agent):
     # function that calculates probability of cell s being burned in next time step (p_t+1(s))
     def probability_of_fire(self):
         probs = []
+        # wind biases the partial probabilities, see Wind.partial_probability()
+        wind = self.model.wind if common_fixed_variables.ACTIVATE_WIND else None
         # if at least cell s has some fuel remaining
         if self.fuel > 0:
             # obtains adjacent cells for a given one (self.pos), based on a radius (self.radius)
@@ -55,14 +62,15 @@ class Fire(mesa.Agent):
                 agents_in_adjacent = self.model.grid.get_cell_list_contents([adjacent])
                 # iterates through each found agent of an adjacent cell
                 for agent in agents_in_adjacent:
-                    if type(agent) is Fire:
-                        adjacent_burning = 1 if agent.is_burning() else 0
+                    # a non burning adjacent cell (s') has no influence (1 - 0 would be appended)
+                    if type(agent) is Fire and agent.is_burning():
+                        offset = (adjacent[0] - self.pos[0], adjacent[1] - self.pos[1])
                         # calculates partial probability of burning cell s (self.pos), being influenced by adjacent (s')
-                        aux_prob = distance_rate(self.pos, adjacent, self.radius) * adjacent_burning
-                        # in this if statement, the wind logic occurs, by biasing the burning cell probability
-                        if ACTIVATE_WIND and (adjacent_burning == 1):
-                            # applies wind to the partial probability
-                            aux_prob = self.model.wind.apply_wind(aux_prob, self.pos, agent.pos)
+                        if wind is not None:
+                            # the wind logic occurs here, by biasing the burning cell probability
+                            aux_prob = wind.partial_probability(self.kernel, offset)
+                        else:
+                            aux_prob = self.kernel.rates.get(offset, 0)
                         probs.append(1 - aux_prob)
             if len(probs) == 0:  # if a low tree density is set, this might happen, so it must be checked
                 P = 0
@@ -76,11 +84,11 @@ class Fire(mesa.Agent):
     def step(self):
         self.steps_counter += 1
         # make fire spread slower
-        if self.steps_counter % FIRE_SPREAD_SPEED == 0:
+        if self.steps_counter % common_fixed_variables.FIRE_SPREAD_SPEED == 0:
             # if self.steps_counter == 26: # to model how the wind can suddenly change direction
             #     self.model.wind.wind_direction = 'south'
             self.cell_prob = self.probability_of_fire()
-            generated = random.random()
+            generated = self.model.rng.random()
             # set next burning state
             if generated < self.cell_prob:
                 self.next_burning_state = True
@@ -88,16 +96,16 @@ class Fire(mesa.Agent):
                 self.next_burning_state = False
             # if possible, subtract BURNING_RATE from fuel of the corresponding cell
             if self.burning and self.fuel > 0:
-                self.fuel = self.fuel - BURNING_RATE
+                self.fuel = self.fuel - common_fixed_variables.BURNING_RATE
             # smoke step
-            if ACTIVATE_SMOKE:
+            if common_fixed_variables.ACTIVATE_SMOKE:
                 self.smoke.smoke_step(self.burning)
 
     # Mesa framework native method, which is overwritten, necessary for executing changes made in step() method. This
     # logic is required to not update the overall grid state until all cells step() method where executed.
     def advance(self):
         # make fire spread slower
-        if self.steps_counter % FIRE_SPREAD_SPEED == 0:
+        if self.steps_counter % common_fixed_variables.FIRE_SPREAD_SPEED == 0:
             self.burning = self.next_burning_state
 
 
@@ -108,7 +116,7 @@ class Smoke:
     def __init__(self, fire_cell_fuel):
         self.smoke = False
         self.dispelling_counter_start_value = fire_cell_fuel
-        self.dispelling_lower_bound_start_value = SMOKE_PRE_DISPELLING_COUNTER
+        self.dispelling_lower_bound_start_value = common_fixed_variables.SMOKE_PRE_DISPELLING_COUNTER
         self.dispelling_lower_bound = self.dispelling_lower_bound_start_value
         self.dispelling_counter = self.dispelling_counter_start_value
 
@@ -128,6 +136,16 @@ class Smoke:
     def subtract_dispelling_counter(self):
         self.dispelling_counter -= 1
 
+    # it gets if smoke_step() would leave smoke state and counters unchanged for a cell that is not burning
+    # | True if nothing would change, False if pre-dispelling counter already started or smoke is active
+    def is_idle(self):
+        if self.smoke:
+            return False
+        if self.dispelling_counter != self.dispelling_counter_start_value:
+            return True
+        return not (0 < self.dispelling_lower_bound < self.dispelling_lower_bound_start_value or
+                    self.dispelling_lower_bound == 0)
+
     # function that updates smoke state and its counters based on certain conditions
     def smoke_step(self, burning):
         # if smoke isn't activated yet:
@@ -156,28 +174,61 @@ class Smoke:
 # Class Wind holds methods for managing wind functionality
 class Wind:
 
-    # constructor
-    def __init__(self):
-        self.wind_direction = WIND_DIRECTION
+    # constructor. rng is the RandomStream of the model, used for changing wind direction
+    def __init__(self, rng):
+        self.rng = rng
+        self.wind_direction = common_fixed_variables.WIND_DIRECTION
+        # precomputed wind biased distance rates, by kernel radius and wind direction (see directional_rates())
+        self.directional_rates_cache = {}
 
     # it allows to change wind direction based on FIRST_DIR_PROB value
     def change_direction(self):
-        if SYSTEM_RANDOM.random() < FIRST_DIR_PROB:
-            self.wind_direction = FIRST_DIR
+        if self.rng.random() < common_fixed_variables.FIRST_DIR_PROB:
+            self.wind_direction = common_fixed_variables.FIRST_DIR
         else:
-            self.wind_direction = SECOND_DIR
+            self.wind_direction = common_fixed_variables.SECOND_DIR
+
+    # function that changes wind direction once per time step, if wind is compound by more than one direction and
+    # WIND_MODE is 'per_tick'. With 'per_neighbour', direction is changed for every burning adjacent cell instead
+    def step(self):
+        if not common_fixed_variables.FIXED_WIND and common_fixed_variables.WIND_MODE == 'per_tick':
+            self.change_direction()
 
     # function to apply wind to partial burning probability of cell s (relative_center_pos),
     # caused by cell s' (adjacent_pos)
     def apply_wind(self, aux_prob, relative_center_pos, adjacent_pos):
         # if wind is compound by more than one direction
-        if not FIXED_WIND:
+        if not common_fixed_variables.FIXED_WIND and common_fixed_variables.WIND_MODE == 'per_neighbour':
             self.change_direction()
             # print("Wind: ", self.wind_direction)
-        if self.is_on_wind_direction(relative_center_pos, adjacent_pos):
-            aux_prob = aux_prob + (MU * (1 - aux_prob))  # part of 1 I- 'aux_prob' probability is added, depending on mu
+        return self.bias(aux_prob, self.is_on_wind_direction(relative_center_pos, adjacent_pos))
+
+    # same as apply_wind(), for the distance rate of an adjacent cell s' at a certain (dx, dy) offset of a kernel, but
+    # looked up in the precomputed wind biased rates of the kernel instead of being calculated
+    def partial_probability(self, kernel, offset):
+        # if wind is compound by more than one direction
+        if not common_fixed_variables.FIXED_WIND and common_fixed_variables.WIND_MODE == 'per_neighbour':
+            self.change_direction()
+        return self.directional_rates(kernel)[offset]
+
+    # function that obtains the distance rates of a kernel biased by the current wind direction, by offset. They are
+    # only calculated the first time each kernel and direction are requested
+    def directional_rates(self, kernel):
+        key = (kernel.radius, self.wind_direction)
+        rates = self.directional_rates_cache.get(key)
+        if rates is None:
+            rates = {offset: self.bias(rate, self.is_on_wind_direction((0, 0), offset))
+                     for offset, rate in kernel.rates.items()}
+            self.directional_rates_cache[key] = rates
+        return rates
+
+    # function that biases a partial burning probability, depending on mu, and on whether cell s is on wind direction
+    def bias(self, aux_prob, on_wind_direction):
+        mu = common_fixed_variables.MU
+        if on_wind_direction:
+            aux_prob = aux_prob + (mu * (1 - aux_prob))  # part of 1 I- 'aux_prob' probability is added, depending on mu
         else:
-            aux_prob = aux_prob - (MU * aux_prob)  # part of 'aux_prob' probability is removed, depending on mu
+            aux_prob = aux_prob - (mu * aux_prob)  # part of 'aux_prob' probability is removed, depending on mu
         return aux_prob
 
     # function that checks if cell located in relative_center_pos is on wind direction, influenced by cell located
@@ -227,68 +278,40 @@ class UAV(mesa.Agent):
         coordinates = []
         for index, value in enumerate(status_list):
             if value == 1:
-                x = index // UAV_OBSERVATION_RADIUS
-                y = index % UAV_OBSERVATION_RADIUS
+                x = index // common_fixed_variables.UAV_OBSERVATION_RADIUS
+                y = index % common_fixed_variables.UAV_OBSERVATION_RADIUS
                 coordinates.append((x, y))
         return coordinates
 
-    # function for obtaining observed cells for the corresponding UAV
+    # function that obtains the grid coordinates of the cells set to 1 in an observation window centered on the
+    # corresponding UAV (see WildFireModel.uav_observation())
+    def window_to_coordinates(self, window, radius):
+        return [(self.pos[0] + int(i) - radius, self.pos[1] + int(j) - radius) for i, j in numpy.argwhere(window)]
+
+    # function for obtaining observed cells for the corresponding UAV, as a flat list of side * side values (1 if its
+    # burning, 0 if it isn't). Cells out of the grid are zero padded
     def surrounding_states(self):
-        surrounding_states = []
-        # obtains adjacent cells s' from a concrete cell s (self.pos)
-        adjacent_cells = self.model.grid.get_neighborhood(
-            self.pos, moore=self.moore, include_center=True, radius=UAV_OBSERVATION_RADIUS
-        )
-        # obtains each fire cell state, in a list (1 if its burning, 0 if it isn't)
-        for cell in adjacent_cells:
-            agents = self.model.grid.get_cell_list_contents([cell])
-            for agent in agents:
-                if type(agent) is Fire:
-                    surrounding_states.append(int(agent.is_burning() is True))
-        return surrounding_states
+        window = self.model.uav_observation(self, common_fixed_variables.UAV_OBSERVATION_RADIUS)["burning"]
+        return window.astype(int).ravel().tolist()
 
     # new fire detection function  --Jialong
     def surrounding_fire(self):
-        surrounding_fire = []
-        fire_coordinates = []
-        adjacent_cells = self.model.grid.get_neighborhood(
-            self.pos, moore=self.moore, include_center=True, radius=2
-        )
-        for cell in adjacent_cells:
-            agents = self.model.grid.get_cell_list_contents([cell])
-            for agent in agents:
-                if isinstance(agent, Fire) and agent.is_burning():
-                    surrounding_fire.append(1)
-                    fire_coordinates.append(cell)
-                else:
-                    surrounding_fire.append(0)
+        radius = 2
+        window = self.model.uav_observation(self, radius)["burning"]
+        fire_coordinates = self.window_to_coordinates(window, radius)
 
         self.integrity -= len(fire_coordinates) * 0.01
 
         self.fire_states = fire_coordinates
 
-        return surrounding_fire
+        return window.astype(int).ravel().tolist()
 
-    
     def surrounding_smoke(self):
-        smoke_states = []
-        smoke_coordinates = []
-        adjacent_cells = self.model.grid.get_neighborhood(
-            self.pos, moore=self.moore, include_center=True, radius=UAV_OBSERVATION_RADIUS
-        )
-        for cell in adjacent_cells:
-            agents = self.model.grid.get_cell_list_contents([cell])
-            for agent in agents:
-                if isinstance(agent, Fire) and agent.smoke.is_smoke_active():
-                    smoke_states.append(1)
-                    smoke_coordinates.append(cell)
-                else:
-                    smoke_states.append(0)
-
-        self.smoke_states = smoke_coordinates
-
-        return smoke_states
+        window = self.model.uav_observation(self, common_fixed_variables.UAV_OBSERVATION_RADIUS)["smoke"]
+
+        self.smoke_states = self.window_to_coordinates(window, common_fixed_variables.UAV_OBSERVATION_RADIUS)
 
+        return window.astype(int).ravel().tolist()
 
     # function for moving UAV over the grid area
     def move(self):
@@ -1,5 +1,7 @@
 import os.path
 import sys
+import hashlib
+from collections import namedtuple
 
 from flask import Flask, Response, request
 from threading import Thread
@@ -10,10 +12,21 @@ import jsonschema
 from wildfire_model import WildFireModel
 import common_fixed_variables as values
 import main
-from agents import UAV
+from environments import EnvironmentPool, EnvironmentNotFound
+from monitor import get_monitor_data, get_monitor_delta, get_constants, get_adaptation_options, get_directions, \
+    pack_payload, PACKED_MIMETYPE
 
 SCHEMAS_PATH = "schemas"
 PAGES_PATH = "pages"
+# a schema or page file, as served from memory: its content, an ETag and its last modification time
+StaticFile = namedtuple("StaticFile", ["content", "etag", "last_modified"])
+
+# seconds clients can use a cached schema without revalidating it. Schemas only change with the API itself
+SCHEMA_MAX_AGE = 24 * 60 * 60
+# seconds an /events stream waits for a new time step before sending a keep-alive comment
+EVENTS_KEEPALIVE_TIMEOUT = 15
+# seconds /step waits for the model to complete the next time step
+STEP_TIMEOUT = 60
 
 
 def create_app(test_config=None):
@@ -24,15 +37,21 @@ def create_app(test_config=None):
     wildfire = Thread(target=main.main, args=(), daemon=True)
     wildfire.start()
 
+    # independent headless models, besides the one of the ModularServer, see the /envs endpoints
+    environments = EnvironmentPool()
+
+    # schemas and pages don't change while the API runs, so they are read once, and served from memory
+    static_files = {
+        "index.html": load_static_file(PAGES_PATH, "index.html"),
+        "monitor_schema.json": load_static_file(SCHEMAS_PATH, "monitor_schema.json"),
+        "execute_schema.json": load_static_file(SCHEMAS_PATH, "execute_schema.json"),
+        "adaptation_options_schema.json": load_static_file(SCHEMAS_PATH, "adaptation_options_schema.json"),
+    }
+
     @app.route("/")
     def index():
         try:
-            page = get_page("index.html")
-            return Response(
-                response=page,
-                status=200,
-                mimetype='text/html'
-            )
+            return static_response(static_files["index.html"], 'text/html')
         except Exception as e:
             return Response(response=e.__str__(),
                             status=500,
@@ -44,6 +63,16 @@ def create_app(test_config=None):
         try:
             print(f"Server is ready: {main.SERVER}")
             data = get_monitor_data(main.SERVER.model)
+            return payload_response(data)
+        except Exception as e:
+            return Response(response=e.__str__(),
+                            status=500,
+                            mimetype='text/html')
+
+    @app.route("/monitor/delta")
+    def monitor_delta():
+        try:
+            data = get_monitor_delta(main.SERVER.model, request.args.get("since", type=int))
             return Response(
                 response=json.dumps(data),
                 status=200,
@@ -54,6 +83,41 @@ def create_app(test_config=None):
                             status=500,
                             mimetype='text/html')
 
+    @app.route("/constants")
+    def constants():
+        try:
+            response = Response(
+                response=json.dumps(get_constants()),
+                status=200,
+                mimetype='text/json'
+            )
+            # constants only change between runs, so clients can keep them and just revalidate them (304 if unchanged)
+            response.add_etag()
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        except Exception as e:
+            return Response(response=e.__str__(),
+                            status=500,
+                            mimetype='text/html')
+
+    @app.route("/events")
+    def events():
+        try:
+            # a reconnecting EventSource sends the id of the last event it got, i.e. the last time step it saw
+            since = request.args.get("since", type=int)
+            if since is None:
+                since = request.headers.get("Last-Event-ID", type=int)
+            return Response(
+                response=step_events(since),
+                status=200,
+                mimetype='text/event-stream',
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        except Exception as e:
+            return Response(response=e.__str__(),
+                            status=500,
+                            mimetype='text/html')
+
     @app.route("/execute", methods=['PUT'])
     def execute():
         try:
@@ -67,15 +131,25 @@ def create_app(test_config=None):
                             status=500,
                             mimetype='text/html')
 
+    @app.route("/step", methods=['PUT'])
+    def step():
+        try:
+            data = step_uav_directions(request.json, main.SERVER.model)
+            if data is None:
+                return Response(response="Timed out waiting for the next time step",
+                                status=504,
+                                mimetype='text/html')
+            return payload_response(data)
+        except Exception as e:
+            return Response(response=e.__str__(),
+                            status=500,
+                            mimetype='text/html')
+
     @app.route("/adaptation_options")
     def adaptation_options():
         try:
             data = get_adaptation_options(main.SERVER.model)
-            return Response(
-                response=json.dumps(data),
-                status=200,
-                mimetype='text/json'
-            )
+            return payload_response(data)
         except Exception as e:
             return Response(response=e.__str__(),
                             status=500,
@@ -84,12 +158,7 @@ def create_app(test_config=None):
     @app.route("/monitor_schema")
     def monitor_schema():
         try:
-            schema = get_schema("monitor_schema.json")
-            return Response(
-                response=schema,
-                status=200,
-                mimetype='text/json'
-            )
+            return static_response(static_files["monitor_schema.json"], 'text/json', SCHEMA_MAX_AGE)
         except Exception as e:
             return Response(response=e.__str__(),
                             status=500,
@@ -98,12 +167,7 @@ def create_app(test_config=None):
     @app.route("/execute_schema")
     def execute_schema():
         try:
-            schema = get_schema("execute_schema.json")
-            return Response(
-                response=schema,
-                status=200,
-                mimetype='text/json'
-            )
+            return static_response(static_files["execute_schema.json"], 'text/json', SCHEMA_MAX_AGE)
         except Exception as e:
             return Response(response=e.__str__(),
                             status=500,
@@ -112,123 +176,181 @@ def create_app(test_config=None):
     @app.route("/adaptation_options_schema")
     def adaptation_options_schema():
         try:
-            schema = get_schema("adaptation_options_schema.json")
-            return Response(
-                response=schema,
-                status=200,
-                mimetype='text/json'
-            )
+            return static_response(static_files["adaptation_options_schema.json"], 'text/json', SCHEMA_MAX_AGE)
         except Exception as e:
             return Response(response=e.__str__(),
                             status=500,
                             mimetype='text/html')
 
-    return app
+    @app.route("/envs", methods=['GET', 'POST'])
+    def envs():
+        try:
+            if request.method == 'GET':
+                return json_response({"envs": environments.get_ids()})
+            settings = request.get_json(silent=True) or {}
+            env_id = environments.create(settings.get("fireBackend"), settings.get("seed"))
+            return json_response({"id": env_id}, status=201)
+        except Exception as e:
+            return error_response(e)
 
+    @app.route("/envs/<int:env_id>", methods=['DELETE'])
+    def destroy_env(env_id):
+        try:
+            environments.destroy(env_id)
+            return Response(status=204)
+        except Exception as e:
+            return error_response(e)
 
-def get_monitor_data(model: WildFireModel):
-    monitor_data = {
-        "currentStep": model.evaluation_timesteps_counter,
-        "constants": {
-            "fixedWind": values.FIXED_WIND,
-            "activateSmoke": values.ACTIVATE_SMOKE,
-            "activateWind": values.ACTIVATE_WIND,
-            "windDirection": values.WIND_DIRECTION,
-            "firstDirection": values.FIRST_DIR,
-            "secondDirection": values.SECOND_DIR,
-            "firstDirStrength": values.FIRST_DIR_PROB,
-            "windVelocity": values.MU,
-            "simulationDuration": values.BATCH_SIZE,
-            "width": values.WIDTH,
-            "height": values.HEIGHT,
-            "burningRate": values.BURNING_RATE,
-            "fireSpreadSpeed": values.FIRE_SPREAD_SPEED,
-            "fuelUpperLimit": values.FUEL_UPPER_LIMIT,
-            "fuelBottomLimit": values.FUEL_BOTTOM_LIMIT,
-            "densityProbability": values.DENSITY_PROB,
-            "smokePreDispellingCounter": values.SMOKE_PRE_DISPELLING_COUNTER,
-            "numUAV": values.NUM_AGENTS,
-            "observationRadius": values.UAV_OBSERVATION_RADIUS,
-            "securityDistance": values.SECURITY_DISTANCE
-        },
-        "dynamicValues": {
-            "MR1": model.MR1_LIST,
-            "MR2": model.MR2_VALUE,
-            "uavDetails": get_uav_details(model)[1]
-        }
-    }
+    @app.route("/envs/<int:env_id>/reset", methods=['POST'])
+    def reset_env(env_id):
+        try:
+            settings = request.get_json(silent=True) or {}
+            return json_response(environments.reset(env_id, settings.get("seed")))
+        except Exception as e:
+            return error_response(e)
 
-    return monitor_data
+    @app.route("/envs/<int:env_id>/monitor")
+    def env_monitor(env_id):
+        try:
+            return payload_response(get_monitor_data(environments.get(env_id)))
+        except Exception as e:
+            return error_response(e)
 
+    @app.route("/envs/<int:env_id>/monitor/delta")
+    def env_monitor_delta(env_id):
+        try:
+            return json_response(get_monitor_delta(environments.get(env_id), request.args.get("since", type=int)))
+        except Exception as e:
+            return error_response(e)
 
-def get_adaptation_options(model: WildFireModel):
-    all_details = get_uav_details(model)[1]
-    relevant_details = []
-    for uav in all_details:
-        uav.pop("x")
-        uav.pop("y")
-        relevant_details.append(uav)
+    @app.route("/envs/<int:env_id>/adaptation_options")
+    def env_adaptation_options(env_id):
+        try:
+            return payload_response(get_adaptation_options(environments.get(env_id)))
+        except Exception as e:
+            return error_response(e)
 
-    adaptation_opt = {
-        "uavDetails": relevant_details
-    }
-    return adaptation_opt
-
-
-def get_uav_details(model: WildFireModel) -> tuple[list[UAV], list[dict]]:
-    uavs = [agent for agent in model.schedule.agents if type(agent) is UAV]
-    uav_details = []
-    for uav in uavs:
-        uav_details.append({
-            "id": uav.unique_id,
-            "x": uav.pos[0],
-            "y": uav.pos[1],
-            "direction": uav.selected_dir,
-            "fireStates": uav.fire_states,
-            "smokeStates": uav.smoke_states,
-            "Integrity(MR3)": round(uav.integrity, 2),
-        })
-    return uavs, uav_details
-
-
-def get_schema(filename: str) -> str:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    schemas_dir = os.path.join(current_dir, SCHEMAS_PATH)
-    schema_file = os.path.join(schemas_dir, filename)
-    with open(schema_file) as f:
-        schema = f.read()
-    return schema
+    @app.route("/envs/<int:env_id>/step", methods=['PUT'])
+    def env_step(env_id):
+        try:
+            return payload_response(environments.step(env_id, request.get_json(silent=True)))
+        except Exception as e:
+            return error_response(e)
+
+    @app.route("/envs/step", methods=['PUT'])
+    def envs_step():
+        try:
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict) or "envs" not in body:
+                raise ValueError("The request body must be a JSON object with an \"envs\" list")
+            return json_response({"envs": environments.step_many(body["envs"])})
+        except Exception as e:
+            return error_response(e)
 
-def get_page(filename: str) -> str:
+    return app
+
+
+def json_response(data, status=200) -> Response:
+    return Response(
+        response=json.dumps(data),
+        status=status,
+        mimetype='text/json'
+    )
+
+
+# responds with the data as JSON, or in its packed binary form (see pack_payload()) if the client prefers it
+def payload_response(data) -> Response:
+    if request.accept_mimetypes.best_match(['text/json', PACKED_MIMETYPE]) == PACKED_MIMETYPE:
+        return Response(
+            response=pack_payload(data),
+            status=200,
+            mimetype=PACKED_MIMETYPE
+        )
+    return json_response(data)
+
+
+# unknown environments are reported as 404, and invalid requests (e.g. a malformed body, or a full environment pool)
+# as 400
+def error_response(e: Exception) -> Response:
+    if isinstance(e, EnvironmentNotFound):
+        status = 404
+    elif isinstance(e, ValueError):
+        status = 400
+    else:
+        status = 500
+    return Response(response=e.__str__(),
+                    status=status,
+                    mimetype='text/html')
+
+
+def load_static_file(directory: str, filename: str) -> StaticFile:
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    pages_dir = os.path.join(current_dir, PAGES_PATH)
-    page_file = os.path.join(pages_dir, filename)
-    with open(page_file) as f:
-        page = f.read()
-    return page
+    static_file = os.path.join(current_dir, directory, filename)
+    with open(static_file) as f:
+        content = f.read()
+    return StaticFile(content, hashlib.sha1(content.encode()).hexdigest(), int(os.path.getmtime(static_file)))
+
+
+# responds with a schema or page, which clients can keep and just revalidate (304 if unchanged), either by its ETag
+# (If-None-Match) or by its last modification time (If-Modified-Since). With a max_age, clients don't even revalidate
+# it for max_age seconds
+def static_response(static_file: StaticFile, mimetype: str, max_age=None) -> Response:
+    response = Response(
+        response=static_file.content,
+        status=200,
+        mimetype=mimetype
+    )
+    response.set_etag(static_file.etag)
+    response.last_modified = static_file.last_modified
+    if max_age is None:
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.max_age = max_age
+    return response.make_conditional(request)
 
 
 def set_uav_directions(adaptation: list[dict], model: WildFireModel):
-    uavs : list[UAV] = [agent for agent in model.schedule.agents if type(agent) is UAV]
-    directions = []
     with (model.next_step_available):
-        for model_uav in uavs:
-            found = False
-            # Try to find the direction in the adaptation execute
-            for exec_uav in adaptation["uavDetails"]:
-                if exec_uav["id"] == model_uav.unique_id:
-                    found = True
-                    directions.append(exec_uav["direction"])
-
-            # otherwise let it keep its current direction
-            if not found:
-                directions.append(model_uav.selected_dir)
-
-        model.new_direction = directions
+        model.new_direction = get_directions(adaptation, model)
         model.last_step_seen = model.evaluation_timesteps_counter
         model.next_step_available.notify_all()
 
 
+# function that sets the UAV directions of an adaptation (as /execute does), waits until the model completes the time
+# step they are applied in, and returns the monitor data of the new time step, or None if it takes over timeout seconds.
+# If the simulation has already finished, the monitor data of its last time step is returned straight away
+def step_uav_directions(adaptation: list[dict], model: WildFireModel, timeout=STEP_TIMEOUT):
+    with model.next_step_available:
+        step = model.evaluation_timesteps_counter
+        set_uav_directions(adaptation, model)
+        stepped = model.next_step_available.wait_for(lambda: model.finished() or model.last_step_completed > step,
+                                                     timeout=timeout)
+    return get_monitor_data(model) if stepped else None
+
+
+# generator of the server-sent events of an /events stream: a "step" event with the monitor data (as returned by
+# /monitor) as soon as each time step is completed, starting with the current one unless it is the time step since. The
+# stream ends with an "end" event when the simulation has finished
+def step_events(since=None):
+    last_sent = since
+    while True:
+        # the model is looked up on each time step, since the ModularServer replaces it when it is reset
+        model = main.SERVER.model
+        with model.next_step_available:
+            completed = model.next_step_available.wait_for(lambda: model.last_step_completed != last_sent,
+                                                           timeout=EVENTS_KEEPALIVE_TIMEOUT)
+            step = model.last_step_completed
+        if not completed:
+            yield ": keep-alive\n\n"
+            continue
+        data = get_monitor_data(model)
+        last_sent = step
+        yield f"id: {step}\nevent: step\ndata: {json.dumps(data)}\n\n"
+        if model.finished():
+            yield f"id: {step}\nevent: end\ndata: {{}}\n\n"
+            return
+
+
 if __name__ == '__main__':
     print("\n\n ## WildFire REST API available at http://127.0.0.1:55555 ##\n\n")
     create_app().run(host="172.17.0.2", port=55555) # Default docker bridge address is 172.17.0.2
\ No newline at end of file
@@ -0,0 +1,76 @@
+# python libraries
+
+import contextlib
+import concurrent.futures
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+import headless
+
+
+# context manager that temporarily overrides configuration variables of common_fixed_variables (e.g. WIND_DIRECTION,
+# MU, DENSITY_PROB or NUM_AGENTS), restoring their previous values on exit. Variables derived from an overridden one
+# (side and N_OBSERVATIONS from UAV_OBSERVATION_RADIUS) are updated as well
+@contextlib.contextmanager
+def override(**values):
+    unknown = [name for name in values if not hasattr(common_fixed_variables, name)]
+    if unknown:
+        raise ValueError(f"Unknown configuration variables: {unknown}")
+    if "UAV_OBSERVATION_RADIUS" in values:
+        side = (values["UAV_OBSERVATION_RADIUS"] * 2) + 1
+        values = {**values, "side": side, "N_OBSERVATIONS": side * side}
+
+    previous = {name: getattr(common_fixed_variables, name) for name in values}
+    try:
+        for name, value in values.items():
+            setattr(common_fixed_variables, name, value)
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(common_fixed_variables, name, value)
+
+
+# function that runs one seeded episode with certain configuration overrides, and obtains its metrics: MR1 and UAV
+# integrity (MR3) of each UAV, and MR2 of the UAV team. It is executed by the workers of run_batch()
+def run_seeded_episode(seed, overrides=None, policy_factory=None, fire_backend=None):
+    overrides = overrides or {}
+    with override(**overrides):
+        policy = policy_factory() if policy_factory is not None else None
+        model = headless.run_episode(policy, fire_backend=fire_backend, seed=seed)
+    return {
+        "seed": seed,
+        "overrides": overrides,
+        "MR1": numpy.array(model.MR1_LIST),
+        "MR2": model.MR2_VALUE,
+        "integrity": numpy.array([uav.integrity for uav in model.uavs]),
+    }
+
+
+# function that runs one independent episode per seed across a pool of processes, and obtains the metrics of each of
+# them (see run_seeded_episode()), in the same order as seeds. overrides can be either one dict of configuration
+# overrides for all the episodes, or a list with a dict per episode. policy_factory is called once per episode to
+# create its policy (see headless.py), so it must be picklable (e.g. a module level function)
+def run_batch(seeds, overrides=None, policy_factory=None, fire_backend=None, processes=None):
+    if overrides is None or isinstance(overrides, dict):
+        overrides = [overrides] * len(seeds)
+    if len(overrides) != len(seeds):
+        raise ValueError(f"Expected {len(seeds)} configuration overrides, got {len(overrides)}")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(run_seeded_episode, seed, episode_overrides, policy_factory, fire_backend)
+                   for seed, episode_overrides in zip(seeds, overrides)]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    results = run_batch(range(8), {"NUM_AGENTS": 3}, fire_backend='array')
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} episodes in {elapsed:.2f} s ({len(results) / elapsed * 3600:.0f} episodes/h)")
+    for result in results:
+        print(f"seed {result['seed']}: MR1 {result['MR1'].round(2)}, MR2 {result['MR2']}, "
+              f"integrity {result['integrity'].round(2)}")
@@ -0,0 +1,221 @@
+# python libraries
+
+import timeit
+
+# own python modules
+
+import common_fixed_variables
+
+REPEAT = 5
+NUMBER = 200
+
+
+# function that times a statement, returning the best time (in seconds) of REPEAT executions of NUMBER loops
+def best_time(statement, number=NUMBER):
+    return min(timeit.repeat(statement, repeat=REPEAT, number=number)) / number
+
+
+# function that prints how long both the current and the new implementation take, and the obtained speedup
+def report(name, current, new, number=NUMBER):
+    current_time = best_time(current, number)
+    new_time = best_time(new, number)
+    print(f"{name}: {current_time * 1e6:.1f} us -> {new_time * 1e6:.1f} us ({current_time / new_time:.1f}x faster)")
+
+
+# micro-benchmark of distance_rate() against the DistanceRateKernel table lookup, for the whole neighbourhood of a
+# Fire agent cell (as done by Fire.probability_of_fire())
+def benchmark_distance_rate(radius=3):
+    pos = (25, 25)
+    kernel = common_fixed_variables.get_distance_rate_kernel(radius)
+    adjacent_cells = [(pos[0] + dx, pos[1] + dy) for dx, dy in kernel.offsets]
+
+    def current():
+        for adjacent in adjacent_cells:
+            common_fixed_variables.distance_rate(pos, adjacent, radius)
+
+    def new():
+        for adjacent in adjacent_cells:
+            kernel.rate(pos, adjacent)
+
+    report(f"distance_rate ({len(adjacent_cells)} neighbours)", current, new)
+
+
+# micro-benchmark of euclidean_distance() against the DistanceRateKernel table lookup, for every pair of UAV positions
+# (as done by WildFireModel.MR2())
+def benchmark_euclidean_distance(num_agents=10):
+    positions = [(25 + a, 25 - a) for a in range(num_agents)]
+    kernel = common_fixed_variables.get_distance_rate_kernel(common_fixed_variables.SECURITY_DISTANCE)
+
+    def current():
+        for p in positions:
+            for q in positions:
+                common_fixed_variables.euclidean_distance(p[0], p[1], q[0], q[1])
+
+    def new():
+        for p in positions:
+            for q in positions:
+                kernel.distance(p, q)
+
+    report(f"euclidean_distance ({num_agents} UAVs)", current, new)
+
+
+# micro-benchmark of the pairwise UAV distance loop MR2 used (each pair checked twice, with DistanceRateKernel
+# lookups) against the vectorized collision.close_pairs(), for a swarm of UAVs
+def benchmark_collision(num_agents=100):
+    import collision
+
+    positions = [(a % 25, (a * 7) % 50) for a in range(num_agents)]
+    distance = common_fixed_variables.SECURITY_DISTANCE
+    kernel = common_fixed_variables.get_distance_rate_kernel(distance)
+
+    def current():
+        counter = 0
+        for idx, p in enumerate(positions):
+            for q in positions[:idx] + positions[idx + 1:]:
+                if kernel.distance(p, q) < distance:
+                    counter += 1
+        return counter // 2
+
+    def new():
+        return len(collision.close_pairs(positions, distance)[1])
+
+    assert current() == new()
+    report(f"MR2 collision pairs ({num_agents} UAVs)", current, new, number=20)
+
+
+# micro-benchmark of random.SystemRandom draws (one OS entropy read each) against the buffered draws of a model
+# RandomStream, for the neighbourhood of a Fire agent cell (as done by Wind.change_direction())
+def benchmark_random_draw(radius=3):
+    import random
+
+    system_random = random.SystemRandom()
+    rng = common_fixed_variables.RandomStream(0)
+    draws = len(common_fixed_variables.get_distance_rate_kernel(radius).offsets)
+
+    def current():
+        for _ in range(draws):
+            system_random.random()
+
+    def new():
+        for _ in range(draws):
+            rng.random()
+
+    report(f"random draw ({draws} neighbours)", current, new)
+
+
+# benchmark of one time step of the Fire agents, activated all by mesa.time.SimultaneousActivation against only the
+# burning frontier activated by FrontierActivation, once the fire has spread for some time steps
+def benchmark_fire_step(warm_up_steps=20):
+    import mesa
+    import wildfire_model
+    from scheduler import FrontierActivation
+
+    models = []
+    for scheduler in (mesa.time.SimultaneousActivation, FrontierActivation):
+        model = wildfire_model.WildFireModel(fire_backend='agents')
+        fires = model.schedule.agents
+        model.schedule = scheduler(model)
+        for fire in fires:
+            model.schedule.add(fire)
+        for _ in range(warm_up_steps):
+            model.schedule.step()
+        models.append(model)
+
+    # each timed loop holds FIRE_SPREAD_SPEED time steps, so that fire spreads once in each of them
+    report(f"fire step ({common_fixed_variables.HEIGHT}x{common_fixed_variables.WIDTH} grid)",
+           models[0].schedule.step, models[1].schedule.step, number=common_fixed_variables.FIRE_SPREAD_SPEED)
+
+
+# benchmark of the UAV observations of a time step (the three neighbourhood walks of each UAV in the 'agents' backend,
+# against one vectorized slice of the terrain arrays for all UAVs in the 'array' backend)
+def benchmark_observation(num_agents=3):
+    import wildfire_model
+
+    default_num_agents = common_fixed_variables.NUM_AGENTS
+    common_fixed_variables.NUM_AGENTS = num_agents
+    models = [wildfire_model.WildFireModel(fire_backend=fire_backend) for fire_backend in ('agents', 'array')]
+    common_fixed_variables.NUM_AGENTS = default_num_agents
+
+    def observe(model):
+        model.observe()
+        model.observe(2)
+
+    report(f"UAV observation ({num_agents} UAVs)", lambda: observe(models[0]), lambda: observe(models[1]), number=10)
+
+
+# benchmark of the MR1 burning cell counts of a time step, summing the partial state lists of each UAV (as MR1 used to do)
+# against four lookups per UAV of the summed-area table of the burning array
+def benchmark_burning_counts(num_agents=3, fire_backend='array'):
+    import wildfire_model
+
+    default_num_agents = common_fixed_variables.NUM_AGENTS
+    common_fixed_variables.NUM_AGENTS = num_agents
+    model = wildfire_model.WildFireModel(fire_backend=fire_backend, headless=True)
+    common_fixed_variables.NUM_AGENTS = default_num_agents
+
+    def current():
+        return [sum(aux_state) for aux_state in model.state()]
+
+    def new():
+        # the table is rebuilt, as it would be once per time step
+        model.burning_table_cache = None
+        return model.burning_counts().tolist()
+
+    assert current() == new()
+    report(f"MR1 burning counts ({num_agents} UAVs)", current, new, number=20)
+
+
+# benchmark of encoding the monitor data of UAVs inside a large smoke plume as JSON (as /monitor does by default) against
+# its packed binary form (see monitor.pack_payload()), and of the payload sizes of both
+def benchmark_monitor_payload(num_agents=3, cells=400):
+    import json
+    import monitor
+    import wildfire_model
+
+    default_num_agents = common_fixed_variables.NUM_AGENTS
+    common_fixed_variables.NUM_AGENTS = num_agents
+    model = wildfire_model.WildFireModel(fire_backend='array', headless=True)
+    common_fixed_variables.NUM_AGENTS = default_num_agents
+    for uav in model.uavs:
+        uav.smoke_states = [(x % common_fixed_variables.HEIGHT, x // common_fixed_variables.HEIGHT) for x in range(cells)]
+    data = monitor.get_monitor_data(model)
+
+    print(f"monitor payload: {len(json.dumps(data))} bytes -> {len(monitor.pack_payload(data))} bytes")
+    report(f"monitor payload encoding ({num_agents} UAVs, {cells} smoke cells each)",
+           lambda: json.dumps(data), lambda: monitor.pack_payload(data), number=20)
+
+
+# function that obtains the memory (in bytes) allocated while creating a WildFireModel with a certain fire backend
+def model_memory(fire_backend):
+    import tracemalloc
+    import wildfire_model
+
+    tracemalloc.start()
+    model = wildfire_model.WildFireModel(fire_backend=fire_backend)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del model
+    return memory
+
+
+# benchmark of the memory used per grid cell by Fire agents in a MultiGrid, against the compact Terrain arrays
+def benchmark_memory():
+    import wildfire_model  # imported before measuring, so that module import doesn't count
+
+    cells = common_fixed_variables.HEIGHT * common_fixed_variables.WIDTH
+    agents_memory = model_memory('agents') / cells
+    array_memory = model_memory('array') / cells
+    print(f"memory per cell: {agents_memory:.0f} bytes -> {array_memory:.0f} bytes "
+          f"({agents_memory / array_memory:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    benchmark_distance_rate()
+    benchmark_euclidean_distance()
+    benchmark_collision()
+    benchmark_random_draw()
+    benchmark_fire_step()
+    benchmark_observation()
+    benchmark_burning_counts()
+    benchmark_monitor_payload()
+    benchmark_memory()
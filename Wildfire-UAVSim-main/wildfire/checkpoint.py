@@ -0,0 +1,107 @@
+# python libraries
+
+import json
+import numpy
+
+# own python modules
+
+import agents
+import common_fixed_variables
+from terrain import Terrain
+from wildfire_model import WildFireModel
+
+CHECKPOINT_VERSION = 1
+
+
+# function that saves the full state of a WildFireModel in a single uncompressed .npz file: the Terrain arrays of the
+# fire cells (regardless of the fire backend), UAV ids, positions and integrity, as arrays, and counters, metrics, wind
+# direction and random stream state, as a JSON header. The model can be resumed with load_checkpoint(), so that many
+# rollouts can be branched from the same mid-episode state without replaying its steps
+def save_checkpoint(model, path):
+    terrain = model.get_terrain()
+    generator_state, buffered = model.rng.get_state()
+    header = {
+        "version": CHECKPOINT_VERSION,
+        "fireBackend": model.fire_backend,
+        "shape": list(terrain.shape),
+        "evaluationTimestepsCounter": model.evaluation_timesteps_counter,
+        "newDirectionCounter": model.new_direction_counter,
+        "newDirection": [int(direction) for direction in model.new_direction],
+        "lastStepSeen": model.last_step_seen,
+        "MR1": model.MR1_LIST,
+        "MR2": model.MR2_VALUE,
+        "closePairs": model.close_pairs,
+        "scheduleSteps": model.schedule.steps,
+        "scheduleTime": model.schedule.time,
+        "engineStepsCounter": model.fire_engine.steps_counter if model.fire_engine is not None else None,
+        "windDirection": model.wind.wind_direction,
+        "generatorState": generator_state,
+        "uavDirections": [uav.selected_dir for uav in model.uavs],
+        "uavFireStates": [uav.fire_states for uav in model.uavs],
+        "uavSmokeStates": [uav.smoke_states for uav in model.uavs],
+    }
+    arrays = {f"terrain_{layer}": getattr(terrain, layer) for layer in Terrain.layers()}
+    numpy.savez(path, header=numpy.array(json.dumps(header)),
+                uav_ids=numpy.array([uav.unique_id for uav in model.uavs], dtype=numpy.int64),
+                uav_positions=numpy.array([uav.pos for uav in model.uavs], dtype=numpy.int64).reshape(-1, 2),
+                uav_integrity=numpy.array([uav.integrity for uav in model.uavs], dtype=float),
+                rng_buffer=numpy.array(buffered, dtype=float), **arrays)
+
+
+# function that creates a WildFireModel from a checkpoint saved with save_checkpoint(), in the same state the saved
+# model was. Grid size of the checkpoint must match the current HEIGHT and WIDTH
+def load_checkpoint(path, headless=True):
+    with numpy.load(path, allow_pickle=False) as checkpoint:
+        header = json.loads(checkpoint["header"].item())
+        if header["version"] != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {header['version']}")
+        shape = (common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH)
+        if tuple(header["shape"]) != shape:
+            raise ValueError(f"Checkpoint grid {tuple(header['shape'])} doesn't match the configured grid {shape}")
+
+        terrain = Terrain(*shape)
+        for layer in Terrain.layers():
+            getattr(terrain, layer)[:] = checkpoint[f"terrain_{layer}"]
+        uav_ids = checkpoint["uav_ids"].tolist()
+        uav_positions = checkpoint["uav_positions"].tolist()
+        uav_integrity = checkpoint["uav_integrity"].tolist()
+        buffered = checkpoint["rng_buffer"].tolist()
+
+    model = WildFireModel(fire_backend=header["fireBackend"], headless=headless, terrain=terrain)
+
+    # UAV agents are created again from the checkpoint, as their number might differ from the current NUM_AGENTS
+    for uav in model.uavs:
+        model.grid.remove_agent(uav)
+        model.schedule.remove(uav)
+    model.uavs = []
+    for idx, unique_id in enumerate(uav_ids):
+        uav = agents.UAV(unique_id, model)
+        uav.selected_dir = header["uavDirections"][idx]
+        uav.integrity = uav_integrity[idx]
+        uav.fire_states = [tuple(pos) for pos in header["uavFireStates"][idx]]
+        uav.smoke_states = [tuple(pos) for pos in header["uavSmokeStates"][idx]]
+        model.grid.place_agent(uav, tuple(uav_positions[idx]))
+        model.schedule.add(uav)
+        model.uavs.append(uav)
+    model.NUM_AGENTS = len(model.uavs)
+    model.unique_agents_id = max(uav_ids, default=model.unique_agents_id - 1) + 1
+
+    model.evaluation_timesteps_counter = header["evaluationTimestepsCounter"]
+    model.last_step_completed = model.evaluation_timesteps_counter
+    model.new_direction_counter = header["newDirectionCounter"]
+    model.new_direction = header["newDirection"]
+    model.last_step_seen = header["lastStepSeen"]
+    model.MR1_LIST = header["MR1"]
+    model.MR2_VALUE = header["MR2"]
+    model.close_pairs = [tuple(pair) for pair in header["closePairs"]]
+    model.schedule.steps = header["scheduleSteps"]
+    model.schedule.time = header["scheduleTime"]
+    if model.fire_engine is not None:
+        model.fire_engine.steps_counter = header["engineStepsCounter"]
+    else:
+        for agent in model.schedule.agents:
+            if type(agent) is agents.Fire:
+                agent.steps_counter = header["scheduleSteps"]
+    model.wind.wind_direction = header["windDirection"]
+    model.rng.set_state(header["generatorState"], buffered)
+    return model
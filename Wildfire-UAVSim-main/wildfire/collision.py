@@ -0,0 +1,29 @@
+# python libraries
+
+import functools
+import numpy
+
+
+# function that obtains the indexes (i, j) of every pair of n positions once, with i < j. They only depend on n, so
+# they are only obtained the first time n positions are checked
+@functools.lru_cache(maxsize=None)
+def pair_indexes(n):
+    return numpy.triu_indices(n, k=1)
+
+
+# function that obtains every pair of positions closer than a certain distance (e.g. SECURITY_DISTANCE, for the
+# collision risk avoidance metric MR2), with vectorized pairwise Euclidean distances. Each pair is obtained once, as the
+# indexes (i, j) of its positions, with i < j, and pairs are sorted from the closest to the farthest. It returns an
+# array with the pairs, shaped (number of pairs, 2), and an array with the distance of each of them
+def close_pairs(positions, distance):
+    x, y = numpy.array(positions, dtype=float).reshape(-1, 2).T.copy()
+    i, j = pair_indexes(len(x))
+    dx = x[i] - x[j]
+    dy = y[i] - y[j]
+    squared = (dx * dx) + (dy * dy)
+    # squared distances are compared, so that the square root is only obtained for close pairs
+    close = numpy.flatnonzero(squared < distance * distance)
+    pair_distances = numpy.sqrt(squared[close])
+    order = numpy.argsort(pair_distances, kind="stable")
+    close = close[order]
+    return numpy.stack((i[close], j[close]), axis=1), pair_distances[order]
@@ -1,9 +1,11 @@
-import random
+import math
+import functools
 import numpy
 
 # COMMON VARIABLES
 
-SYSTEM_RANDOM = random.SystemRandom()  # ... Not available on all systems ... (Python official doc)
+# size of the blocks of random numbers drawn at once by RandomStream.random()
+RANDOM_BUFFER_SIZE = 4096
 
 # simulator activators (environment conditions)
 
@@ -26,6 +28,11 @@ FUEL_BOTTOM_LIMIT = 7
 
 DENSITY_PROB = 1  # Tree density (Float number in the interval [0, 1])
 
+# Fire backend: 'agents' (one Mesa Fire agent per cell) or 'array' (vectorized NumPy engine, see fire_engine.py)
+FIRE_BACKEND = 'agents'
+# With the 'agents' backend, only activate Fire agents near the fire front (see scheduler.py), instead of all of them
+FRONTIER_SCHEDULING = True
+
 WIND_DIRECTION = 'south'
 # if FIXED_WIND == False (compose wind), then variables inside the if statement are set to be used in the project
 if not FIXED_WIND:
@@ -34,6 +41,9 @@ if not FIXED_WIND:
     SECOND_DIR = 'east'  # Introduce second wind direction (probability calculated based on first one),
     FIRST_DIR_PROB = 0.8  # Introduce first wind probability [0, 1]
 MU = 0.9  # Wind velocity (Float number in the interval [0, 1])
+# How compound wind (FIXED_WIND = False) changes direction: 'per_neighbour' draws a direction for every burning adjacent
+# cell of every cell, while 'per_tick' draws one direction for the whole grid once per time step (cheaper)
+WIND_MODE = 'per_neighbour'
 
 SMOKE_PRE_DISPELLING_COUNTER = 2
 
@@ -87,3 +97,79 @@ def distance_rate(s, s_, distance_limit):
     if m_d <= distance_limit:
         result = m_d ** -2.0
     return result
+
+
+# Class DistanceRateKernel holds a precomputed table with the Euclidean distance, and the grade of influence
+# (distance_rate), of every (dx, dy) offset inside a square of a certain radius, so that they are looked up instead of
+# being recomputed with NumPy norms for every pair of cells
+class DistanceRateKernel:
+
+    # constructor
+    def __init__(self, radius):
+        self.radius = radius
+        self.offsets = []
+        self.distances = {}
+        self.rates = {}
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                if dx == 0 and dy == 0:
+                    continue
+                m_d = math.sqrt(dx * dx + dy * dy)
+                self.offsets.append((dx, dy))
+                self.distances[(dx, dy)] = m_d
+                self.rates[(dx, dy)] = m_d ** -2.0 if m_d <= radius else 0
+
+    # same as euclidean_distance(), for positions s and s'. Offsets out of the table are calculated
+    def distance(self, s, s_):
+        dx = s_[0] - s[0]
+        dy = s_[1] - s[1]
+        m_d = self.distances.get((dx, dy))
+        if m_d is None:
+            m_d = math.sqrt(dx * dx + dy * dy)
+        return m_d
+
+    # same as distance_rate(), for positions s and s', with distance_limit being the kernel radius
+    def rate(self, s, s_):
+        return self.rates.get((s_[0] - s[0], s_[1] - s[1]), 0)
+
+
+# function that obtains the DistanceRateKernel of a certain radius, which is only built the first time it is requested
+@functools.lru_cache(maxsize=None)
+def get_distance_rate_kernel(radius):
+    return DistanceRateKernel(radius)
+
+
+# Class RandomStream holds the random number generator of a model, a seedable NumPy Generator (so that runs can be
+# reproduced). Single draws are handed out from blocks of RANDOM_BUFFER_SIZE numbers drawn in one vectorized call, and
+# whole arrays of draws can be obtained at once as well
+class RandomStream:
+
+    # constructor
+    def __init__(self, seed=None):
+        self.generator = numpy.random.default_rng(seed)
+        self.buffer = iter(())
+
+    # it gets a random float in [0, 1), or an array of them with a certain shape (size)
+    def random(self, size=None):
+        if size is not None:
+            return self.generator.random(size)
+        try:
+            return next(self.buffer)
+        except StopIteration:
+            self.buffer = iter(self.generator.random(RANDOM_BUFFER_SIZE).tolist())
+            return next(self.buffer)
+
+    # it gets the state of the stream (the Generator state, and the draws still buffered), so that it can be restored
+    def get_state(self):
+        buffered = list(self.buffer)
+        self.buffer = iter(buffered)
+        return self.generator.bit_generator.state, buffered
+
+    # it restores a state obtained with get_state()
+    def set_state(self, generator_state, buffered):
+        self.generator.bit_generator.state = generator_state
+        self.buffer = iter(list(buffered))
+
+    # it gets random integers in [low, high] (both included, like random.randint), with a certain shape (size)
+    def integers(self, low, high, size=None):
+        return self.generator.integers(low, high, size=size, endpoint=True)
@@ -0,0 +1,117 @@
+# python libraries
+
+import itertools
+from threading import Lock
+
+# own python modules
+
+from wildfire_model import WildFireModel
+from monitor import get_monitor_data, get_directions
+
+MAX_ENVIRONMENTS = 64
+# fire backends an environment can be created with (None for the FIRE_BACKEND of common_fixed_variables.py)
+FIRE_BACKENDS = (None, 'agents', 'array')
+
+
+# exception raised when an environment id is not in the pool
+class EnvironmentNotFound(LookupError):
+    pass
+
+
+# function that checks that an adaptation holds the "uavDetails" list get_directions() reads, with the "id" and the
+# "direction" of each UAV | ValueError if it doesn't
+def validate_adaptation(adaptation):
+    if not isinstance(adaptation, dict) or not isinstance(adaptation.get("uavDetails"), list):
+        raise ValueError("An adaptation must be a JSON object with a \"uavDetails\" list")
+    for uav in adaptation["uavDetails"]:
+        if not isinstance(uav, dict) or "id" not in uav or "direction" not in uav:
+            raise ValueError("Each UAV of an adaptation must have an \"id\" and a \"direction\"")
+
+
+# class EnvironmentPool holds independent headless WildFireModel instances (environments), addressed by an integer id,
+# so that a single REST API can serve many experiment runs in parallel (see the /envs endpoints in api.py). Unlike the
+# model of the Mesa ModularServer, an environment doesn't run in its own thread: it only advances a time step when it is
+# stepped with the UAV directions of an adaptation
+class EnvironmentPool:
+
+    # constructor
+    def __init__(self, max_environments=MAX_ENVIRONMENTS):
+        self.max_environments = max_environments
+        self.environments = {}
+        self.settings = {}
+        self.next_ids = itertools.count()
+        self.lock = Lock()
+
+    # method that creates a new environment, and returns its id | ValueError if the fire backend is unknown, or if the
+    # pool is full
+    def create(self, fire_backend=None, seed=None):
+        if fire_backend not in FIRE_BACKENDS:
+            raise ValueError(f"Unknown fire backend {fire_backend!r}, expected 'agents' or 'array'")
+        with self.lock:
+            if len(self.environments) >= self.max_environments:
+                raise ValueError(f"Environment pool is full ({self.max_environments} environments)")
+            env_id = next(self.next_ids)
+            self.environments[env_id] = WildFireModel(fire_backend=fire_backend, headless=True, seed=seed)
+            self.settings[env_id] = fire_backend
+        return env_id
+
+    # method that obtains the model of an environment | EnvironmentNotFound if there is no environment with that id
+    def get(self, env_id):
+        try:
+            return self.environments[env_id]
+        except KeyError:
+            raise EnvironmentNotFound(f"Environment {env_id} doesn't exist") from None
+
+    # method that starts a new episode in an environment, with the same fire backend, and returns its monitor data. The
+    # model is created again, so that its random stream can be seeded as well. It is created out of the lock, so the
+    # environment is looked up again before replacing its model, in case it was destroyed meanwhile
+    def reset(self, env_id, seed=None):
+        with self.lock:
+            self.get(env_id)
+            fire_backend = self.settings[env_id]
+        model = WildFireModel(fire_backend=fire_backend, headless=True, seed=seed)
+        with self.lock:
+            self.get(env_id)
+            self.environments[env_id] = model
+        return get_monitor_data(model)
+
+    # method that removes an environment from the pool
+    def destroy(self, env_id):
+        with self.lock:
+            self.get(env_id)
+            del self.environments[env_id]
+            del self.settings[env_id]
+
+    # method that obtains the ids of the environments in the pool
+    def get_ids(self):
+        with self.lock:
+            return sorted(self.environments)
+
+    # method that sets the UAV directions of an adaptation in an environment (as /execute does), executes its next time
+    # step, and returns the monitor data of the new time step. Once finished, environments don't advance anymore. The
+    # adaptation is checked before the environment is looked up
+    def step(self, env_id, adaptation):
+        validate_adaptation(adaptation)
+        model = self.get(env_id)
+        # the condition is only used as the lock of the model here, since nothing waits for environment time steps
+        with model.next_step_available:
+            if not model.finished():
+                model.new_direction = get_directions(adaptation, model)
+                model.step()
+            data = get_monitor_data(model)
+            data["finished"] = model.finished()
+        return data
+
+    # method that steps many environments in one call, given a list of adaptations, each one with the "id" of its
+    # environment, and returns the monitor data of each of them, in the same order. Every adaptation and id is checked
+    # before stepping any environment
+    def step_many(self, adaptations):
+        if not isinstance(adaptations, list):
+            raise ValueError("Adaptations must be a list")
+        for adaptation in adaptations:
+            validate_adaptation(adaptation)
+            if "id" not in adaptation:
+                raise ValueError("Each adaptation must have the \"id\" of its environment")
+        for adaptation in adaptations:
+            self.get(adaptation["id"])
+        return [{"id": adaptation["id"], **self.step(adaptation["id"], adaptation)} for adaptation in adaptations]
@@ -0,0 +1,263 @@
+# python libraries
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+from terrain import Terrain
+
+# wind directions a precomputed kernel is built for
+WIND_DIRECTIONS = ['east', 'west', 'north', 'south']
+
+
+# Class FireEngine holds the vectorized (array-based) fire backend. Instead of having one Fire agent per cell, burning,
+# fuel and smoke states of the whole grid are kept in the arrays of a Terrain, and the logic of Fire.step(),
+# Fire.advance() and Smoke.smoke_step() is applied to every cell at once
+class FireEngine:
+
+    # constructor
+    def __init__(self, model, width, height):
+        self.model = model
+        self.shape = (width, height)
+        self.moore = True
+        self.radius = 3
+        self.steps_counter = 0
+
+        # precomputed radius-3 kernel, as a list of (dx, dy) offsets and its distance rates
+        self.offsets, self.rates = self.build_kernel(self.radius)
+        # log(1 - partial probability) kernels, one with no wind and one per wind direction
+        self.log_kernels = self.build_log_kernels()
+
+        self.terrain = Terrain(width, height)
+        self.dispelling_lower_bound_start = common_fixed_variables.SMOKE_PRE_DISPELLING_COUNTER
+
+    # function that obtains the (dx, dy) offsets of the Moore neighbourhood of a cell, based on a radius, and the grade
+    # of influence (distance_rate) of each of them over the center cell
+    @staticmethod
+    def build_kernel(radius):
+        kernel = common_fixed_variables.get_distance_rate_kernel(radius)
+        return kernel.offsets, numpy.array([kernel.rates[offset] for offset in kernel.offsets])
+
+    # function that checks, for every kernel offset, if the center cell is on wind direction of the adjacent cell
+    def on_wind_direction(self, wind_direction):
+        dx = numpy.array([offset[0] for offset in self.offsets])
+        dy = numpy.array([offset[1] for offset in self.offsets])
+        if wind_direction == 'east':
+            return (dx < 0) & (dy == 0)
+        elif wind_direction == 'west':
+            return (dx > 0) & (dy == 0)
+        elif wind_direction == 'north':
+            return (dy < 0) & (dx == 0)
+        elif wind_direction == 'south':
+            return (dy > 0) & (dx == 0)
+        return numpy.zeros(len(self.offsets), dtype=bool)
+
+    # function that precomputes log(1 - aux_prob) for every kernel offset, where aux_prob is the partial probability
+    # caused by a burning adjacent cell, biased by wind in the same way as Wind.apply_wind() does
+    def build_log_kernels(self):
+        mu = common_fixed_variables.MU
+        aux_probs = {None: self.rates}
+        for wind_direction in WIND_DIRECTIONS:
+            on_wind = self.on_wind_direction(wind_direction)
+            aux_probs[wind_direction] = numpy.where(on_wind, self.rates + (mu * (1 - self.rates)),
+                                                    self.rates - (mu * self.rates))
+        # log(0) = -inf is kept on purpose: a burning adjacent cell with aux_prob = 1 makes cell s burn for sure
+        with numpy.errstate(divide='ignore'):
+            return {key: numpy.log(1 - aux_prob) for key, aux_prob in aux_probs.items()}
+
+    # function that creates the forest area, deciding which cells hold a "tree" and the fuel of each of them. The center
+    # cell always holds a tree, and it is the only one burning at the beginning
+    def set_fire_cells(self):
+        terrain = self.terrain
+        x_c = int(self.shape[0] / 2)
+        y_c = int(self.shape[1] / 2)
+        terrain.tree[:] = self.model.rng.random(self.shape) < common_fixed_variables.DENSITY_PROB
+        terrain.tree[x_c, y_c] = True
+        fuel = self.model.rng.integers(common_fixed_variables.FUEL_BOTTOM_LIMIT,
+                                       common_fixed_variables.FUEL_UPPER_LIMIT, self.shape)
+        terrain.fuel[:] = numpy.where(terrain.tree, fuel, 0)
+        terrain.burning[:] = False
+        terrain.burning[x_c, y_c] = True
+        terrain.dispelling_counter_start[:] = terrain.fuel
+        terrain.dispelling_counter[:] = terrain.fuel
+        return int(terrain.tree.sum())
+
+    # function that sets the forest area from an existing Terrain (e.g. a checkpoint), and returns its number of trees
+    def set_terrain(self, terrain):
+        self.terrain = terrain
+        return int(terrain.tree.sum())
+
+    # function that obtains the slices of the center cells s, and of their adjacent cells s', for a given offset, so
+    # that out of bounds adjacent cells are skipped (grid is not a torus)
+    @staticmethod
+    def shift_slices(dx, dy, shape):
+        width, height = shape
+        center = (slice(max(0, -dx), width - max(0, dx)), slice(max(0, -dy), height - max(0, dy)))
+        adjacent = (slice(max(0, dx), width + min(0, dx)), slice(max(0, dy), height + min(0, dy)))
+        return center, adjacent
+
+    # function that checks, for every cell, if its smoke counters would change in a smoke step even if it is not
+    # burning (pre-dispelling counter already started, or smoke active)
+    def smoke_in_progress(self):
+        terrain = self.terrain
+        lower_bound = terrain.dispelling_lower_bound
+        not_started = ~terrain.smoke & (terrain.dispelling_counter == terrain.dispelling_counter_start)
+        pre_dispelling = ((0 < lower_bound) & (lower_bound < self.dispelling_lower_bound_start)) | (lower_bound == 0)
+        return terrain.tree & (terrain.smoke | (not_started & pre_dispelling))
+
+    # function that obtains the active window of the grid: the bounding box of burning cells and cells with smoke in
+    # progress, expanded by the fire radius. Cells out of it can't change their state in the next step, so they are
+    # not evaluated (per-step cost follows the fire, not the grid size). None is returned if nothing is active
+    def active_window(self):
+        active = self.terrain.burning & self.terrain.tree
+        if common_fixed_variables.ACTIVATE_SMOKE:
+            active = active | self.smoke_in_progress()
+        rows = numpy.flatnonzero(active.any(axis=1))
+        cols = numpy.flatnonzero(active.any(axis=0))
+        if len(rows) == 0:
+            return None
+        return (slice(max(0, rows[0] - self.radius), min(self.shape[0], rows[-1] + self.radius + 1)),
+                slice(max(0, cols[0] - self.radius), min(self.shape[1], cols[-1] + self.radius + 1)))
+
+    # function that calculates probability of every cell s of a window being burned in next time step (p_t+1(s)), as
+    # 1 - prod(1 - aux_prob) over the burning adjacent cells s'. The product is obtained as a log-space convolution of
+    # the burning array with the precomputed kernel
+    def probability_of_fire(self, window=(slice(None), slice(None))):
+        burning = self.terrain.burning[window] & self.terrain.tree[window]
+        log_keep = numpy.zeros(burning.shape)
+        if not common_fixed_variables.ACTIVATE_WIND:
+            log_kernel, log_kernel_second = self.log_kernels[None], None
+        elif common_fixed_variables.FIXED_WIND or common_fixed_variables.WIND_MODE == 'per_tick':
+            # wind direction of the whole time step (see Wind.step()), applied as one kernel to every cell
+            log_kernel, log_kernel_second = self.log_kernels[self.model.wind.wind_direction], None
+        else:
+            log_kernel = self.log_kernels[common_fixed_variables.FIRST_DIR]
+            log_kernel_second = self.log_kernels[common_fixed_variables.SECOND_DIR]
+
+        for k, (dx, dy) in enumerate(self.offsets):
+            center, adjacent = self.shift_slices(dx, dy, burning.shape)
+            adjacent_burning = burning[adjacent]
+            if log_kernel_second is None:
+                term = log_kernel[k]
+            else:
+                # compound wind: like Wind.change_direction(), direction is drawn for every pair of cells (s, s')
+                first_dir = self.model.rng.random(adjacent_burning.shape) < common_fixed_variables.FIRST_DIR_PROB
+                term = numpy.where(first_dir, log_kernel[k], log_kernel_second[k])
+            log_keep[center] += numpy.where(adjacent_burning, term, 0.0)
+
+        # if cell s has no fuel remaining, it can't burn
+        return numpy.where(self.terrain.fuel[window] > 0, 1 - numpy.exp(log_keep), 0.0)
+
+    # function that updates smoke state and its counters of every cell of a window, in the same way
+    # Smoke.smoke_step() does
+    def smoke_step(self, window=(slice(None), slice(None))):
+        terrain = self.terrain
+        smoke = terrain.smoke[window]
+        burning = terrain.burning[window]
+        lower_bound = terrain.dispelling_lower_bound[window]
+        lower_bound_start = self.dispelling_lower_bound_start
+        counter = terrain.dispelling_counter[window]
+        counter_start = terrain.dispelling_counter_start[window]
+
+        # if smoke isn't activated yet
+        not_started = terrain.tree[window] & ~smoke & (counter == counter_start)
+        # if pre-dispelling smoke counter can start (cell is burning), or if it already started
+        pre_dispelling = (burning & (lower_bound == lower_bound_start)) | \
+                         ((0 < lower_bound) & (lower_bound < lower_bound_start))
+        subtract_lower_bound = not_started & pre_dispelling
+        # if pre-dispelling smoke counter already finished, start smoke counter (activate smoke)
+        activate = not_started & ~pre_dispelling & (lower_bound == 0)
+
+        # if dispelling counter can start, or if it already started
+        dispelling = smoke & (0 < counter) & (counter <= counter_start)
+        # if dispelling counter already finished, smoke is stopped
+        deactivate = smoke & ~dispelling & (counter == 0)
+
+        # window slices are views, so the terrain arrays are updated in place
+        lower_bound[subtract_lower_bound] -= 1
+        counter[dispelling] -= 1
+        smoke[activate] = True
+        smoke[deactivate] = False
+
+    # same as Fire.step(), for every cell of the active window of the grid
+    def step(self):
+        self.steps_counter += 1
+        # make fire spread slower
+        if self.steps_counter % common_fixed_variables.FIRE_SPREAD_SPEED == 0:
+            self.terrain.own()
+            terrain = self.terrain
+            terrain.cell_prob[:] = 0
+            terrain.next_burning[:] = False
+            window = self.active_window()
+            if window is None:
+                return
+            cell_prob = self.probability_of_fire(window)
+            terrain.cell_prob[window] = cell_prob
+            generated = self.model.rng.random(cell_prob.shape)
+            # set next burning state
+            terrain.next_burning[window] = generated < cell_prob
+            # if possible, subtract BURNING_RATE from fuel of the corresponding cells
+            terrain.fuel[terrain.burning & (terrain.fuel > 0)] -= common_fixed_variables.BURNING_RATE
+            # smoke step
+            if common_fixed_variables.ACTIVATE_SMOKE:
+                self.smoke_step(window)
+
+    # same as Fire.advance(), for every cell of the grid
+    def advance(self):
+        # make fire spread slower
+        if self.steps_counter % common_fixed_variables.FIRE_SPREAD_SPEED == 0:
+            self.terrain.own()
+            self.terrain.burning[:] = self.terrain.next_burning
+
+    # function that obtains a read-only view of the cell located in pos, or None if there is no tree on it
+    def get_cell(self, pos):
+        if not self.terrain.tree[pos]:
+            return None
+        return FireCell(self, pos)
+
+
+# Class FireCell is a read-only view of one cell of the FireEngine, exposing the same methods as a Fire agent does, so
+# that UAV observations and the graphical interface can work with both fire backends
+class FireCell:
+    __slots__ = ("engine", "pos", "smoke")
+
+    # constructor
+    def __init__(self, engine, pos):
+        self.engine = engine
+        self.pos = pos
+        self.smoke = SmokeCell(engine, pos)
+
+    # checks if the corresponding cell is burning | True if burning, False if not
+    def is_burning(self):
+        return bool(self.engine.terrain.burning[self.pos])
+
+    # get the corresponding cell remaining fuel | Integer value
+    def get_fuel(self):
+        return round(float(self.engine.terrain.fuel[self.pos]))
+
+    # get the corresponding cell burning probability
+    def get_prob(self):
+        return float(self.engine.terrain.cell_prob[self.pos])
+
+
+# Class SmokeCell is a read-only view of the smoke of one cell of the FireEngine, exposing the same methods as Smoke
+class SmokeCell:
+    __slots__ = ("engine", "pos")
+
+    # constructor
+    def __init__(self, engine, pos):
+        self.engine = engine
+        self.pos = pos
+
+    # it gets the remaining dispelling counter value
+    def get_dispelling_counter_value(self):
+        return int(self.engine.terrain.dispelling_counter[self.pos])
+
+    # it gets the remaining pre-dispelling counter value
+    def get_dispelling_counter_start_value(self):
+        return int(self.engine.terrain.dispelling_counter_start[self.pos])
+
+    # it gets if smoke is active | True if active, False if not
+    def is_smoke_active(self):
+        return bool(self.engine.terrain.smoke[self.pos])
@@ -0,0 +1,51 @@
+# python libraries
+
+import time
+
+# own python modules
+
+import common_fixed_variables
+from wildfire_model import WildFireModel
+from monitor import get_monitor_data, get_directions
+
+# Headless runner: it drives a WildFireModel in-process, at full CPU speed, without the Mesa ModularServer, the REST
+# API (Flask) or the Condition handshake of WildFireModel.step(), and without importing matplotlib or the
+# visualization modules. Before each time step, a policy obtains the UAV directions from the same data /monitor returns
+#
+# A policy is any callable that receives the monitor data (a dict, as returned by /monitor) and returns an adaptation
+# (a dict, as sent to /execute), e.g. {"uavDetails": [{"id": 2500, "direction": 1}, ...]}. UAVs missing from the
+# adaptation keep their current direction, and if there is no policy every UAV keeps its direction
+
+
+# function that wraps a UPISAS Strategy (or any object with knowledge, analyze() and plan()) as a policy, so that it can
+# be evaluated without the HTTP loop of monitor() and execute()
+def strategy_policy(strategy):
+    def policy(monitor_data):
+        strategy.knowledge.fresh_data = monitor_data
+        strategy.analyze()
+        strategy.plan()
+        return strategy.knowledge.plan_data
+    return policy
+
+
+# function that runs one episode (BATCH_SIZE time steps) of a headless WildFireModel, seeded with seed, and returns the
+# model, so that MR1_LIST, MR2_VALUE and the UAV agents can be read afterwards
+def run_episode(policy=None, fire_backend=None, seed=None):
+    model = WildFireModel(fire_backend=fire_backend, headless=True, seed=seed)
+    while not model.finished():
+        if policy is not None:
+            model.new_direction = get_directions(policy(get_monitor_data(model)), model)
+        model.step()
+    return model
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    episode = run_episode()
+    elapsed = time.perf_counter() - start
+    print(f"{common_fixed_variables.BATCH_SIZE} steps in {elapsed:.2f} s "
+          f"({common_fixed_variables.BATCH_SIZE / elapsed:.1f} steps/s)")
+    print(" --- MR1 --- ")
+    print(episode.MR1_LIST)
+    print(" --- MR2 --- ")
+    print(episode.MR2_VALUE)
@@ -8,6 +8,7 @@ from Canvas_Grid_Visualization import CanvasGrid
 
 import wildfire_model
 import agents
+from fire_engine import FireCell
 
 from common_fixed_variables import *
 
@@ -18,11 +19,11 @@ def agent_portrayal(agent):
     portrayal = {"Shape": "rect", "Filled": True, "h": 1, "w": 1}
     # showing the probability map
     if PROBABILITY_MAP:
-        if type(agent) is agents.Fire:
+        if isinstance(agent, (agents.Fire, FireCell)):
             idx = int(round(agent.get_prob(), 1) * 10)
             portrayal.update({"Color": BLACK_AND_WHITE_COLORS[idx], "Layer": 0})
     else:
-        if type(agent) is agents.Fire:  # showing smoke
+        if isinstance(agent, (agents.Fire, FireCell)):  # showing smoke
             if agent.smoke.is_smoke_active():
                 # the two following lines of code could be used to set the normalized index for different smoke colors.
                 # only one color is used by default.
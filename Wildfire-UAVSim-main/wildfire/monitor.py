@@ -0,0 +1,189 @@
+import collections
+import itertools
+import json
+import struct
+import weakref
+
+import numpy
+
+from wildfire_model import WildFireModel
+import common_fixed_variables as values
+from agents import UAV
+
+
+# number of time steps whose dynamic values are kept per model, so that /monitor/delta can compare against them
+MONITOR_HISTORY_SIZE = 256
+
+# dynamic values served for each model, by time step (see record_dynamic_values())
+monitor_history = weakref.WeakKeyDictionary()
+
+# mimetype of the packed binary form of the monitor and adaptation options data (see pack_payload()), and the UAV
+# details fields whose cell coordinates are packed
+PACKED_MIMETYPE = "application/vnd.wildfire.packed"
+PACKED_FIELDS = ("fireStates", "smokeStates")
+
+
+# The current step is the last one the model completed, so that a step is never reported while the model is still
+# executing it (the time step counter is increased halfway through WildFireModel.step())
+def get_monitor_data(model: WildFireModel):
+    monitor_data = {
+        "currentStep": model.last_step_completed,
+        "constants": get_constants(),
+        "dynamicValues": record_dynamic_values(model)
+    }
+
+    return monitor_data
+
+
+def get_constants():
+    return {
+        "fixedWind": values.FIXED_WIND,
+        "activateSmoke": values.ACTIVATE_SMOKE,
+        "activateWind": values.ACTIVATE_WIND,
+        "windDirection": values.WIND_DIRECTION,
+        "firstDirection": values.FIRST_DIR,
+        "secondDirection": values.SECOND_DIR,
+        "firstDirStrength": values.FIRST_DIR_PROB,
+        "windVelocity": values.MU,
+        "simulationDuration": values.BATCH_SIZE,
+        "width": values.WIDTH,
+        "height": values.HEIGHT,
+        "burningRate": values.BURNING_RATE,
+        "fireSpreadSpeed": values.FIRE_SPREAD_SPEED,
+        "fuelUpperLimit": values.FUEL_UPPER_LIMIT,
+        "fuelBottomLimit": values.FUEL_BOTTOM_LIMIT,
+        "densityProbability": values.DENSITY_PROB,
+        "smokePreDispellingCounter": values.SMOKE_PRE_DISPELLING_COUNTER,
+        "numUAV": values.NUM_AGENTS,
+        "observationRadius": values.UAV_OBSERVATION_RADIUS,
+        "securityDistance": values.SECURITY_DISTANCE
+    }
+
+
+def get_dynamic_values(model: WildFireModel) -> dict:
+    return {
+        "MR1": model.MR1_LIST,
+        "MR2": model.MR2_VALUE,
+        "uavDetails": get_uav_details(model)[1]
+    }
+
+
+# Obtains the dynamic values of the current step, and keeps them so that later deltas can be computed against them
+def record_dynamic_values(model: WildFireModel) -> dict:
+    dynamic_values = get_dynamic_values(model)
+    history = monitor_history.setdefault(model, collections.OrderedDict())
+    history[model.last_step_completed] = dynamic_values
+    history.move_to_end(model.last_step_completed)
+    while len(history) > MONITOR_HISTORY_SIZE:
+        history.popitem(last=False)
+    return dynamic_values
+
+
+# Obtains only the dynamic values which changed since a given step: top level values are sent whole, and UAV details
+# only with the fields that changed (plus their id). If the values of that step aren't known (e.g. it was never
+# served, or it is too old), all the dynamic values are sent, and "full" is True
+def get_monitor_delta(model: WildFireModel, since: int = None) -> dict:
+    previous = monitor_history.get(model, {}).get(since)
+    dynamic_values = record_dynamic_values(model)
+    delta = {
+        "currentStep": model.last_step_completed,
+        "since": since,
+        "full": previous is None,
+        "dynamicValues": dynamic_values
+    }
+    if previous is None:
+        return delta
+
+    changed = {}
+    for key, value in dynamic_values.items():
+        if key == "uavDetails":
+            previous_uavs = {uav["id"]: uav for uav in previous[key]}
+            changed_uavs = []
+            for uav in value:
+                previous_uav = previous_uavs.get(uav["id"], {})
+                changed_fields = {field: field_value for field, field_value in uav.items()
+                                  if field == "id" or previous_uav.get(field) != field_value}
+                if len(changed_fields) > 1:
+                    changed_uavs.append(changed_fields)
+            if changed_uavs:
+                changed[key] = changed_uavs
+        elif previous.get(key) != value:
+            changed[key] = value
+    delta["dynamicValues"] = changed
+    return delta
+
+
+# Packs monitor or adaptation options data in a binary form, so that every observed cell coordinate isn't encoded (and
+# decoded) as JSON: a little-endian uint32 with the length of a JSON header, the JSON header (the same data, with the
+# number of cells instead of the cells of each PACKED_FIELDS field of the UAV details, and the packed fields under
+# "packed"), and then the cells themselves, as little-endian int16 (x, y) pairs, in the order of the UAV details and
+# PACKED_FIELDS. The data is not modified
+def pack_payload(data: dict) -> bytes:
+    header = dict(data)
+    if "dynamicValues" in header:
+        header["dynamicValues"] = container = dict(header["dynamicValues"])
+    else:
+        container = header
+    cells = []
+    packed_uavs = []
+    for uav in container.get("uavDetails", []):
+        packed_uav = dict(uav)
+        for field in PACKED_FIELDS:
+            packed_uav[field] = len(uav[field])
+            cells.append(uav[field])
+        packed_uavs.append(packed_uav)
+    if "uavDetails" in container:
+        container["uavDetails"] = packed_uavs
+    header["packed"] = list(PACKED_FIELDS)
+
+    coordinates = itertools.chain.from_iterable(itertools.chain.from_iterable(cells))
+    encoded_header = json.dumps(header).encode()
+    return struct.pack("<I", len(encoded_header)) + encoded_header + numpy.fromiter(coordinates, dtype="<i2").tobytes()
+
+
+def get_adaptation_options(model: WildFireModel):
+    all_details = get_uav_details(model)[1]
+    relevant_details = []
+    for uav in all_details:
+        uav.pop("x")
+        uav.pop("y")
+        relevant_details.append(uav)
+
+    adaptation_opt = {
+        "uavDetails": relevant_details
+    }
+    return adaptation_opt
+
+
+def get_uav_details(model: WildFireModel) -> tuple[list[UAV], list[dict]]:
+    uavs = model.uavs
+    burning_counts = model.burning_counts().tolist()
+    uav_details = []
+    for uav, burning_count in zip(uavs, burning_counts):
+        uav_details.append({
+            "id": uav.unique_id,
+            "x": uav.pos[0],
+            "y": uav.pos[1],
+            "direction": uav.selected_dir,
+            "fireStates": uav.fire_states,
+            "smokeStates": uav.smoke_states,
+            "burningCount": burning_count,
+            "Integrity(MR3)": round(uav.integrity, 2),
+        })
+    return uavs, uav_details
+
+
+def get_directions(adaptation: dict, model: WildFireModel) -> list:
+    directions = []
+    for model_uav in model.uavs:
+        found = False
+        # Try to find the direction in the adaptation execute
+        for exec_uav in adaptation["uavDetails"]:
+            if exec_uav["id"] == model_uav.unique_id:
+                found = True
+                directions.append(exec_uav["direction"])
+
+        # otherwise let it keep its current direction
+        if not found:
+            directions.append(model_uav.selected_dir)
+    return directions
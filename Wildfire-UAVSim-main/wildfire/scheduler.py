@@ -0,0 +1,122 @@
+# python libraries
+
+import mesa
+
+# own python modules
+
+import agents
+import common_fixed_variables
+
+
+# Class FrontierActivation is a Mesa scheduler with the same simultaneous activation as
+# mesa.time.SimultaneousActivation, but Fire agents are only activated while they are in the burning frontier: burning
+# cells, cells with fuel within Fire.radius of a burning cell, and cells whose smoke is still evolving. Any other Fire
+# agent would not change its state in step() and advance(), so it is skipped, and the cost of each time step follows
+# the fire perimeter instead of the whole grid. Cells join and leave the frontier incrementally, as fire spreads and
+# fuel runs out
+class FrontierActivation(mesa.time.SimultaneousActivation):
+
+    # constructor
+    def __init__(self, model):
+        super().__init__(model)
+        # Fire agents by grid position, and any other agents (UAVs) by unique id
+        self.fires = {}
+        self.others = {}
+        # positions of burning Fire agents, and number of burning cells within Fire.radius of each position
+        self.burning_cells = set()
+        self.exposure = {}
+        # positions of the Fire agents to be activated in the next step
+        self.frontier = set()
+        # positions of the Fire agents which left the frontier, whose probability of fire is zeroed in the next step
+        # fire spreads in, when stepping them would have calculated it
+        self.left_frontier = set()
+
+    # Mesa framework native method, which is overwritten. Fire agents must be already placed in the grid
+    def add(self, agent):
+        super().add(agent)
+        if type(agent) is agents.Fire:
+            self.fires[agent.pos] = agent
+            if agent.is_burning():
+                self.ignite(agent)
+            elif self.is_active(agent):
+                self.frontier.add(agent.pos)
+            elif agent.cell_prob != 0:
+                self.left_frontier.add(agent.pos)
+        else:
+            self.others[agent.unique_id] = agent
+
+    # Mesa framework native method, which is overwritten
+    def remove(self, agent):
+        super().remove(agent)
+        if type(agent) is agents.Fire:
+            if agent.pos in self.burning_cells:
+                self.extinguish(agent)
+            self.fires.pop(agent.pos, None)
+            self.frontier.discard(agent.pos)
+            self.left_frontier.discard(agent.pos)
+        else:
+            self.others.pop(agent.unique_id, None)
+
+    # function that registers a Fire agent that started burning, adding its active neighbourhood to the frontier. The
+    # frontier is kept as the set of active Fire agents (see is_active()), so it only depends on the state of the grid
+    def ignite(self, fire):
+        self.burning_cells.add(fire.pos)
+        self.frontier.add(fire.pos)
+        for dx, dy in fire.kernel.offsets:
+            pos = (fire.pos[0] + dx, fire.pos[1] + dy)
+            self.exposure[pos] = self.exposure.get(pos, 0) + 1
+            if pos in self.fires and self.is_active(self.fires[pos]):
+                self.frontier.add(pos)
+
+    # function that registers a Fire agent that stopped burning. Its neighbourhood will leave the frontier once no
+    # other burning cell is near
+    def extinguish(self, fire):
+        self.burning_cells.discard(fire.pos)
+        for dx, dy in fire.kernel.offsets:
+            pos = (fire.pos[0] + dx, fire.pos[1] + dy)
+            self.exposure[pos] -= 1
+            if self.exposure[pos] == 0:
+                del self.exposure[pos]
+
+    # function that checks if a Fire agent must stay in the frontier | True if its state might change in the next step
+    def is_active(self, fire):
+        if fire.is_burning():
+            return True
+        if fire.pos in self.exposure and fire.fuel > 0:
+            return True
+        return common_fixed_variables.ACTIVATE_SMOKE and not fire.smoke.is_idle()
+
+    # Mesa framework native method, which is overwritten: step all frontier Fire agents and the other agents, then
+    # advance them, and update the frontier with the new burning states
+    def step(self):
+        # sorted, so that the activation order (and so the random draws order) doesn't depend on the frontier history
+        fires = [self.fires[pos] for pos in sorted(self.frontier)]
+        others = list(self.others.values())
+        # with no burning cell near, or no fuel, the probability of fire of the cells which left the frontier is 0
+        if (self.steps + 1) % common_fixed_variables.FIRE_SPREAD_SPEED == 0:
+            for pos in self.left_frontier - self.frontier:
+                self.fires[pos].cell_prob = 0.0
+            self.left_frontier.clear()
+        for fire in fires:
+            # cells that were out of the frontier catch up with the spread clock (see FIRE_SPREAD_SPEED)
+            fire.steps_counter = self.steps
+            fire.step()
+        for agent in others:
+            agent.step()
+        for fire in fires:
+            fire.advance()
+        for agent in others:
+            agent.advance()
+
+        for fire in fires:
+            if fire.is_burning() and fire.pos not in self.burning_cells:
+                self.ignite(fire)
+            elif not fire.is_burning() and fire.pos in self.burning_cells:
+                self.extinguish(fire)
+        for fire in fires:
+            if not self.is_active(fire):
+                self.frontier.discard(fire.pos)
+                self.left_frontier.add(fire.pos)
+
+        self.steps += 1
+        self.time += 1
@@ -0,0 +1,68 @@
+# python libraries
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+
+
+# Class Terrain holds the static fire cells of the grid (the forest area) as a compact struct of arrays: one typed NumPy
+# array per Fire and Smoke attribute, indexed as [x, y] like Mesa grid positions. It replaces one Fire agent (and its
+# Smoke object) per cell, which are much bigger Python objects, so that big grids (e.g. 1000x1000) fit in memory
+class Terrain:
+    __slots__ = ("shape", "tree", "fuel", "burning", "next_burning", "cell_prob", "smoke", "dispelling_counter",
+                 "dispelling_counter_start", "dispelling_lower_bound", "shared")
+
+    # arrays which never change once the forest area is created, so forked terrains always share them
+    IMMUTABLE_LAYERS = ("tree", "dispelling_counter_start")
+
+    # constructor
+    def __init__(self, width, height):
+        self.shape = (width, height)
+        # fuel is kept as an integer unless a non integer BURNING_RATE is used
+        fuel_dtype = numpy.int16 if isinstance(common_fixed_variables.BURNING_RATE, int) else numpy.float32
+
+        # True where there is a "tree" (a cell that can burn), False otherwise
+        self.tree = numpy.zeros(self.shape, dtype=bool)
+        self.fuel = numpy.zeros(self.shape, dtype=fuel_dtype)
+        self.burning = numpy.zeros(self.shape, dtype=bool)
+        self.next_burning = numpy.zeros(self.shape, dtype=bool)
+        self.cell_prob = numpy.zeros(self.shape, dtype=numpy.float32)
+
+        # smoke
+        self.smoke = numpy.zeros(self.shape, dtype=bool)
+        self.dispelling_counter = numpy.zeros(self.shape, dtype=numpy.int16)
+        self.dispelling_counter_start = numpy.zeros(self.shape, dtype=numpy.int16)
+        self.dispelling_lower_bound = numpy.full(self.shape, common_fixed_variables.SMOKE_PRE_DISPELLING_COUNTER,
+                                                 dtype=numpy.int16)
+        # True while the arrays might be shared with a forked terrain (see fork())
+        self.shared = False
+
+    # function that obtains the names of the arrays of the terrain
+    @classmethod
+    def layers(cls):
+        return [name for name in cls.__slots__ if name not in ("shape", "shared")]
+
+    # function that obtains the memory used by the terrain arrays, in bytes
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.layers())
+
+    # function that obtains a copy-on-write clone of the terrain: both terrains share every array until one of them is
+    # about to change its state, and then it copies the mutable arrays (see own())
+    def fork(self):
+        clone = Terrain.__new__(Terrain)
+        clone.shape = self.shape
+        for name in self.layers():
+            setattr(clone, name, getattr(self, name))
+        clone.shared = self.shared = True
+        return clone
+
+    # function that must be called before changing any array of the terrain. If they might be shared with a forked
+    # terrain, the mutable arrays are copied first
+    def own(self):
+        if self.shared:
+            for name in self.layers():
+                if name not in self.IMMUTABLE_LAYERS:
+                    setattr(self, name, getattr(self, name).copy())
+            self.shared = False
@@ -0,0 +1,69 @@
+# python libraries
+
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import batch
+import common_fixed_variables
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "BATCH_SIZE": 8}
+
+
+# override() patches configuration variables of common_fixed_variables, and always restores them
+class TestOverride(unittest.TestCase):
+
+    def test_restores_variables(self):
+        previous = (common_fixed_variables.MU, common_fixed_variables.WIND_DIRECTION)
+        with batch.override(MU=0.1, WIND_DIRECTION='north'):
+            self.assertEqual((common_fixed_variables.MU, common_fixed_variables.WIND_DIRECTION), (0.1, 'north'))
+        self.assertEqual((common_fixed_variables.MU, common_fixed_variables.WIND_DIRECTION), previous)
+
+    def test_restores_variables_when_the_body_raises(self):
+        previous = (common_fixed_variables.UAV_OBSERVATION_RADIUS, common_fixed_variables.side,
+                    common_fixed_variables.N_OBSERVATIONS)
+        with self.assertRaises(RuntimeError):
+            with batch.override(UAV_OBSERVATION_RADIUS=2):
+                # derived variables are overridden as well
+                self.assertEqual((common_fixed_variables.side, common_fixed_variables.N_OBSERVATIONS), (5, 25))
+                raise RuntimeError("episode failed")
+        self.assertEqual((common_fixed_variables.UAV_OBSERVATION_RADIUS, common_fixed_variables.side,
+                          common_fixed_variables.N_OBSERVATIONS), previous)
+
+    def test_unknown_variables(self):
+        previous = common_fixed_variables.MU
+        with self.assertRaises(ValueError):
+            with batch.override(MU=0.1, NOT_A_VARIABLE=1):
+                pass
+        self.assertEqual(common_fixed_variables.MU, previous)
+
+
+# run_batch() runs one episode per seed and configuration, in worker processes, with the same results as in-process
+class TestRunBatch(unittest.TestCase):
+
+    def test_one_result_per_configuration_and_seed(self):
+        seeds = [0, 1, 0]
+        overrides = [{**SMALL_GRID, "NUM_AGENTS": 2}, {**SMALL_GRID, "NUM_AGENTS": 2}, {**SMALL_GRID, "NUM_AGENTS": 3}]
+        results = batch.run_batch(seeds, overrides, fire_backend='array', processes=2)
+        self.assertEqual([(result["seed"], result["overrides"]) for result in results], list(zip(seeds, overrides)))
+        self.assertEqual([len(result["MR1"]) for result in results], [2, 2, 3])
+        for result, seed, episode_overrides in zip(results, seeds, overrides):
+            expected = batch.run_seeded_episode(seed, episode_overrides, fire_backend='array')
+            numpy.testing.assert_array_equal(result["MR1"], expected["MR1"])
+            numpy.testing.assert_array_equal(result["integrity"], expected["integrity"])
+            self.assertEqual(result["MR2"], expected["MR2"])
+
+    def test_one_configuration_for_every_seed(self):
+        results = batch.run_batch([3, 4], {**SMALL_GRID, "NUM_AGENTS": 1}, fire_backend='array', processes=2)
+        self.assertEqual([(result["seed"], len(result["MR1"])) for result in results], [(3, 1), (4, 1)])
+
+    def test_configuration_count_must_match_seeds(self):
+        with self.assertRaises(ValueError):
+            batch.run_batch([0, 1], [SMALL_GRID])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# python libraries
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import checkpoint
+import common_fixed_variables
+from terrain import Terrain
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 3}
+
+
+# a model resumed from a checkpoint must go on exactly as the model it was saved from
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "state.npz")
+
+    def assert_same_model(self, model, expected, step):
+        message = f"at step {step}"
+        terrain, expected_terrain = model.get_terrain(), expected.get_terrain()
+        for layer in Terrain.layers():
+            numpy.testing.assert_array_equal(getattr(terrain, layer), getattr(expected_terrain, layer),
+                                             f"{layer} differs {message}")
+        self.assertEqual(model.evaluation_timesteps_counter, expected.evaluation_timesteps_counter, message)
+        self.assertEqual(model.MR1_LIST, expected.MR1_LIST, message)
+        self.assertEqual(model.MR2_VALUE, expected.MR2_VALUE, message)
+        self.assertEqual(model.close_pairs, expected.close_pairs, message)
+        self.assertEqual(model.wind.wind_direction, expected.wind.wind_direction, message)
+        self.assertEqual([(uav.unique_id, uav.pos, uav.integrity, uav.fire_states, uav.smoke_states)
+                          for uav in model.uavs],
+                         [(uav.unique_id, uav.pos, uav.integrity, uav.fire_states, uav.smoke_states)
+                          for uav in expected.uavs], message)
+
+    def test_save_load_continue(self):
+        for fire_backend in ("agents", "array"):
+            model = WildFireModel(fire_backend=fire_backend, headless=True, seed=11)
+            for step in range(9):
+                model.new_direction = [step % 4, (step + 1) % 4, 4 if step % 2 else 1]
+                model.step()
+            checkpoint.save_checkpoint(model, self.path)
+            resumed = checkpoint.load_checkpoint(self.path)
+            self.assert_same_model(resumed, model, 9)
+            for step in range(10, 30):
+                directions = [step % 4, 1, 2]
+                model.new_direction = list(directions)
+                resumed.new_direction = list(directions)
+                model.step()
+                resumed.step()
+                self.assert_same_model(resumed, model, step)
+
+    def test_grid_size_must_match(self):
+        checkpoint.save_checkpoint(WildFireModel(fire_backend='array', headless=True, seed=1), self.path)
+        with mock.patch.multiple(common_fixed_variables, WIDTH=20, HEIGHT=20):
+            with self.assertRaises(ValueError):
+                checkpoint.load_checkpoint(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
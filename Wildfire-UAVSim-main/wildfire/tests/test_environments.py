@@ -0,0 +1,117 @@
+# python libraries
+
+import json
+import unittest
+from unittest import mock
+
+# own python modules
+
+import api
+import common_fixed_variables
+import environments
+import main
+from environments import EnvironmentPool, EnvironmentNotFound
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 3}
+
+
+# EnvironmentPool rejects unknown fire backends and malformed adaptations, which are not missing environments
+class TestEnvironmentPool(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = EnvironmentPool()
+
+    def test_fire_backends(self):
+        for fire_backend in (None, 'agents', 'array'):
+            env_id = self.pool.create(fire_backend, seed=1)
+            expected = fire_backend or common_fixed_variables.FIRE_BACKEND
+            self.assertEqual(self.pool.get(env_id).fire_backend, expected)
+        for fire_backend in ('bogus', 'Array', 1):
+            with self.assertRaises(ValueError):
+                self.pool.create(fire_backend)
+        self.assertEqual(len(self.pool.get_ids()), 3)
+
+    def test_unknown_environment(self):
+        with self.assertRaises(EnvironmentNotFound):
+            self.pool.get(0)
+        with self.assertRaises(EnvironmentNotFound):
+            self.pool.step(0, {"uavDetails": []})
+        with self.assertRaises(EnvironmentNotFound):
+            self.pool.destroy(0)
+
+    def test_malformed_adaptations(self):
+        env_id = self.pool.create('array', seed=1)
+        for adaptation in (None, {}, {"uavDetails": {}}, {"uavDetails": [{"id": 1}]}, {"uavDetails": [3]}):
+            with self.assertRaises(ValueError):
+                self.pool.step(env_id, adaptation)
+            # the body is checked before the environment, so that it is never reported as missing
+            with self.assertRaises(ValueError):
+                self.pool.step(env_id + 1, adaptation)
+        for adaptations in ({}, [{"uavDetails": []}], [{"id": env_id}]):
+            with self.assertRaises(ValueError):
+                self.pool.step_many(adaptations)
+        self.assertEqual(self.pool.get(env_id).evaluation_timesteps_counter, 0)
+
+    def test_reset_of_a_destroyed_environment(self):
+        env_id = self.pool.create('array', seed=1)
+        environments_model = environments.WildFireModel
+
+        # the environment is destroyed while its new model is being created
+        def destroy_while_creating(*args, **kwargs):
+            self.pool.destroy(env_id)
+            return environments_model(*args, **kwargs)
+
+        with mock.patch.object(environments, "WildFireModel", side_effect=destroy_while_creating):
+            with self.assertRaises(EnvironmentNotFound):
+                self.pool.reset(env_id, seed=2)
+        self.assertEqual(self.pool.get_ids(), [])
+        with self.assertRaises(EnvironmentNotFound):
+            self.pool.reset(env_id)
+
+
+# status codes of the /envs endpoints: 400 for invalid requests, and 404 for unknown environments only
+class TestEnvironmentEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # the graphical interface model isn't needed by the /envs endpoints
+        with mock.patch.object(main, "main", lambda: None):
+            self.client = api.create_app().test_client()
+
+    def test_create(self):
+        self.assertEqual(self.client.post("/envs", json={"fireBackend": "bogus"}).status_code, 400)
+        response = self.client.post("/envs", json={"fireBackend": "array", "seed": 1})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.data), {"id": 0})
+
+    def test_step(self):
+        env_id = json.loads(self.client.post("/envs", json={"fireBackend": "array"}).data)["id"]
+        adaptation = {"uavDetails": [{"id": 256, "direction": 1}]}
+        for body in ({}, {"uavDetails": [{"direction": 1}]}, "not json"):
+            self.assertEqual(self.client.put(f"/envs/{env_id}/step", json=body).status_code, 400)
+        self.assertEqual(self.client.put(f"/envs/{env_id + 1}/step", json=adaptation).status_code, 404)
+        response = self.client.put(f"/envs/{env_id}/step", json=adaptation)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)["currentStep"], 1)
+
+    def test_step_many(self):
+        env_id = json.loads(self.client.post("/envs", json={"fireBackend": "array"}).data)["id"]
+        for body in ({}, {"envs": {}}, {"envs": [{"uavDetails": []}]}, {"envs": [{"id": env_id}]}):
+            self.assertEqual(self.client.put("/envs/step", json=body).status_code, 400)
+        body = {"envs": [{"id": env_id + 1, "uavDetails": []}]}
+        self.assertEqual(self.client.put("/envs/step", json=body).status_code, 404)
+        response = self.client.put("/envs/step", json={"envs": [{"id": env_id, "uavDetails": []}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([env["currentStep"] for env in json.loads(response.data)["envs"]], [1])
+
+    def test_destroy(self):
+        self.assertEqual(self.client.delete("/envs/0").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
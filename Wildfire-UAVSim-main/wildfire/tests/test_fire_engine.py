@@ -0,0 +1,170 @@
+# python libraries
+
+import itertools
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import agents
+import common_fixed_variables
+import fire_engine
+import headless
+import wildfire_model
+from fire_engine import FireEngine
+
+# seeds of the episodes compared between fire backends, on a grid small enough for the 'agents' backend to be quick
+SEEDS = range(24)
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "BATCH_SIZE": 20, "NUM_AGENTS": 0}
+# critical value of the two-sample Kolmogorov-Smirnov statistic at a 1% significance level, times sqrt(n / 2)
+KS_CRITICAL_VALUE = 1.628
+
+
+# function that runs an episode and obtains its number of burned cells (cells that lost fuel) and of cells with smoke
+def burned_and_smoke_cells(fire_backend, seed):
+    terrain = headless.run_episode(fire_backend=fire_backend, seed=seed).get_terrain()
+    burned = terrain.tree & (terrain.fuel < terrain.dispelling_counter_start)
+    return int(burned.sum()), int(terrain.smoke.sum())
+
+
+# function that obtains the two-sample Kolmogorov-Smirnov statistic: the largest distance between the empirical
+# cumulative distributions of two samples
+def ks_statistic(a, b):
+    values = numpy.union1d(a, b)
+    cdf_a = numpy.searchsorted(numpy.sort(a), values, side="right") / len(a)
+    cdf_b = numpy.searchsorted(numpy.sort(b), values, side="right") / len(b)
+    return numpy.abs(cdf_a - cdf_b).max()
+
+
+# the 'array' backend draws its random numbers in another order than the Fire agents, so episodes with the same seed
+# differ, but the distributions of their outcomes must be the same
+class TestFireBackendStatistics(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burned_and_smoke_distributions(self):
+        outcomes = {backend: numpy.array([burned_and_smoke_cells(backend, seed) for seed in SEEDS])
+                    for backend in ("agents", "array")}
+        for column, name in enumerate(("burned cells", "smoke cells")):
+            agents_outcomes = outcomes["agents"][:, column]
+            array_outcomes = outcomes["array"][:, column]
+            # means within 3 standard errors of their difference
+            standard_error = numpy.sqrt((agents_outcomes.var(ddof=1) + array_outcomes.var(ddof=1)) / len(SEEDS))
+            self.assertLess(abs(agents_outcomes.mean() - array_outcomes.mean()), 3 * standard_error, name)
+            # and distributions the Kolmogorov-Smirnov test can't tell apart
+            self.assertLess(ks_statistic(agents_outcomes, array_outcomes),
+                            KS_CRITICAL_VALUE * numpy.sqrt(2 / len(SEEDS)), name)
+
+
+# fixed burning layouts, for which the probability of fire of every cell is calculated by the Fire agents one at a time
+# and by the shifted kernel slices of the FireEngine, with no wind and with a fixed wind in each direction
+class TestProbabilityOfFire(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # function that obtains an 'agents' backend model whose Fire agents are set to a random burning layout, in which
+    # some cells (including the grid corners) have no fuel left
+    @staticmethod
+    def model_with_layout(seed):
+        model = wildfire_model.WildFireModel(fire_backend='agents', headless=True, seed=seed)
+        rng = numpy.random.default_rng(seed)
+        for agent in model.schedule.agents:
+            if type(agent) is agents.Fire:
+                agent.burning = bool(rng.random() < 0.3)
+                agent.fuel = 0 if rng.random() < 0.1 or agent.pos in ((0, 0), (15, 15)) else agent.fuel
+        return model
+
+    def assert_same_probabilities(self, model, message):
+        engine = FireEngine(model, common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH)
+        engine.set_terrain(model.get_terrain())
+        expected = numpy.zeros(engine.shape)
+        for agent in model.schedule.agents:
+            if type(agent) is agents.Fire:
+                expected[agent.pos] = agent.probability_of_fire()
+        self.assertTrue((expected > 0).any() and (expected < 1).any(), message)
+        numpy.testing.assert_allclose(engine.probability_of_fire(), expected, rtol=1e-12, atol=1e-15,
+                                      err_msg=message)
+
+    def test_no_wind(self):
+        with mock.patch.object(common_fixed_variables, "ACTIVATE_WIND", False):
+            for seed in range(4):
+                self.assert_same_probabilities(self.model_with_layout(seed), f"no wind, layout {seed}")
+
+    def test_fixed_wind(self):
+        with mock.patch.multiple(common_fixed_variables, ACTIVATE_WIND=True, FIXED_WIND=True):
+            for seed in range(4):
+                model = self.model_with_layout(seed)
+                for wind_direction in fire_engine.WIND_DIRECTIONS:
+                    model.wind.wind_direction = wind_direction
+                    self.assert_same_probabilities(model, f"{wind_direction} wind, layout {seed}")
+
+    def test_single_burning_cell(self):
+        # the probability around a single burning cell is its kernel, so a mirrored or shifted kernel is caught even
+        # where a layout would average it out
+        with mock.patch.multiple(common_fixed_variables, ACTIVATE_WIND=True, FIXED_WIND=True):
+            model = self.model_with_layout(0)
+            for agent in model.schedule.agents:
+                if type(agent) is agents.Fire:
+                    agent.burning = agent.pos == (5, 9)
+                    agent.fuel = max(agent.fuel, 1)
+            for wind_direction in fire_engine.WIND_DIRECTIONS:
+                model.wind.wind_direction = wind_direction
+                self.assert_same_probabilities(model, f"{wind_direction} wind, single burning cell")
+
+
+# every combination of smoke state and counters a cell can hold, updated by Smoke.smoke_step() one cell at a time and
+# by FireEngine.smoke_step() for the whole grid at once
+class TestSmokeStep(unittest.TestCase):
+
+    def setUp(self):
+        lower_bound_start = common_fixed_variables.SMOKE_PRE_DISPELLING_COUNTER
+        self.cells = [(smoke, burning, lower_bound, counter_start, counter)
+                      for smoke, burning in itertools.product((False, True), repeat=2)
+                      for lower_bound in range(lower_bound_start + 1)
+                      for counter_start in range(3)
+                      for counter in range(counter_start + 1)]
+        self.engine = FireEngine(None, len(self.cells), 1)
+        self.smokes = []
+        terrain = self.engine.terrain
+        for i, (smoke, burning, lower_bound, counter_start, counter) in enumerate(self.cells):
+            terrain.tree[i, 0] = True
+            terrain.burning[i, 0] = burning
+            terrain.smoke[i, 0] = smoke
+            terrain.dispelling_lower_bound[i, 0] = lower_bound
+            terrain.dispelling_counter_start[i, 0] = counter_start
+            terrain.dispelling_counter[i, 0] = counter
+            cell_smoke = agents.Smoke(fire_cell_fuel=counter_start)
+            cell_smoke.smoke = smoke
+            cell_smoke.dispelling_lower_bound = lower_bound
+            cell_smoke.dispelling_counter = counter
+            self.smokes.append(cell_smoke)
+
+    def assert_same_smoke(self):
+        terrain = self.engine.terrain
+        for i, cell_smoke in enumerate(self.smokes):
+            self.assertEqual((bool(terrain.smoke[i, 0]), int(terrain.dispelling_lower_bound[i, 0]),
+                              int(terrain.dispelling_counter[i, 0])),
+                             (cell_smoke.smoke, cell_smoke.dispelling_lower_bound, cell_smoke.dispelling_counter),
+                             f"initial cell state {self.cells[i]}")
+
+    def test_smoke_step_matches_smoke_agents(self):
+        # a few steps, so that cells go through pre-dispelling, smoke and dispelled states, with fire going out halfway
+        for step in range(6):
+            if step == 3:
+                self.engine.terrain.burning[:] = False
+            for i, cell_smoke in enumerate(self.smokes):
+                cell_smoke.smoke_step(bool(self.engine.terrain.burning[i, 0]))
+            self.engine.smoke_step()
+            self.assert_same_smoke()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# python libraries
+
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+from terrain import Terrain
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 3}
+
+
+# function that obtains a copy of the state of a model which stepping a fork of it must leave unchanged
+def snapshot(model):
+    terrain = model.fire_engine.terrain
+    return {"terrain": {layer: getattr(terrain, layer).copy() for layer in Terrain.layers()},
+            "counters": (model.evaluation_timesteps_counter, model.schedule.steps, model.fire_engine.steps_counter),
+            "metrics": (list(model.MR1_LIST), model.MR2_VALUE, list(model.close_pairs)),
+            "uavs": [(uav.unique_id, uav.pos, uav.integrity, list(uav.fire_states)) for uav in model.uavs],
+            "grid": [((x, y), agent.unique_id) for agent, x, y in model.grid.coord_iter() if agent is not None],
+            "rng": model.rng.get_state()}
+
+
+# function that steps a model with the same UAV directions every time, and obtains its state after each step
+def rollout(model, steps):
+    states = []
+    for step in range(steps):
+        model.new_direction = [step % 4, 1, 4]
+        model.step()
+        states.append(snapshot(model))
+    return states
+
+
+# WildFireModel.fork() shares the Terrain of the model copy-on-write, and must not alter the model when it is stepped
+class TestFork(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.model = WildFireModel(fire_backend='array', headless=True, seed=4)
+        rollout(self.model, 6)
+
+    def assert_same_state(self, state, expected):
+        for layer in Terrain.layers():
+            numpy.testing.assert_array_equal(state["terrain"][layer], expected["terrain"][layer], layer)
+        for key in ("counters", "metrics", "uavs", "grid"):
+            self.assertEqual(state[key], expected[key], key)
+
+    def test_fork_is_isolated(self):
+        before = snapshot(self.model)
+        terrain = self.model.fire_engine.terrain
+        shared_layers = {layer: getattr(terrain, layer) for layer in Terrain.layers()}
+        fork = self.model.fork()
+        rollout(fork, 10)
+        self.assertNotEqual(snapshot(fork)["counters"], before["counters"])
+        # neither the model nor the arrays its Terrain shared with the fork changed
+        self.assert_same_state(snapshot(self.model), before)
+        self.assertEqual(self.model.rng.get_state(), before["rng"])
+        for layer, array in shared_layers.items():
+            numpy.testing.assert_array_equal(array, before["terrain"][layer], layer)
+        self.assertIsNot(fork.fire_engine.terrain.burning, terrain.burning)
+        self.assertTrue(all(uav.model is self.model for uav in self.model.uavs))
+        # and the model can still be stepped as if it had never been forked
+        rollout(self.model, 2)
+
+    def test_moving_a_uav_in_the_fork(self):
+        # the model grid has its empty cells and neighbourhoods cached when it is forked
+        empties = set(self.model.grid.empties)
+        self.model.grid.get_neighborhood(self.model.uavs[0].pos, moore=True)
+        before = snapshot(self.model)
+        fork = self.model.fork()
+        fork_uav = fork.uavs[0]
+        target = sorted(fork.grid.empties)[0]
+        fork.grid.move_agent(fork_uav, target)
+        fork.grid.get_neighborhood(target, moore=True, radius=2)
+
+        self.assertEqual(fork_uav.pos, target)
+        self.assertIn(before["uavs"][0][1], fork.grid.empties)
+        self.assertNotIn(target, fork.grid.empties)
+        # neither the cells, the empty cells nor the neighbourhood cache of the model grid changed
+        self.assert_same_state(snapshot(self.model), before)
+        self.assertEqual(set(self.model.grid.empties), empties)
+        self.assertIs(self.model.grid[target[0]][target[1]], None)
+        self.assertNotIn((target, True, False, 2), self.model.grid._neighborhood_cache)
+
+    def test_fork_continues_the_model(self):
+        # a fork with no seed continues the random stream of the model, so it steps exactly as the model does
+        fork = self.model.fork()
+        for state, expected in zip(rollout(fork, 10), rollout(self.model, 10)):
+            self.assert_same_state(state, expected)
+
+    def test_fork_is_deterministic_for_a_seed(self):
+        first = rollout(self.model.fork(seed=21), 10)
+        second = rollout(self.model.fork(seed=21), 10)
+        for state, expected in zip(first, second):
+            self.assert_same_state(state, expected)
+        other_seed = rollout(self.model.fork(seed=22), 10)
+        self.assertFalse(all(numpy.array_equal(state["terrain"]["burning"], expected["terrain"]["burning"])
+                             for state, expected in zip(other_seed, first)))
+
+    def test_only_array_backend_forks(self):
+        with self.assertRaises(ValueError):
+            WildFireModel(fire_backend='agents', headless=True, seed=4).fork()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# python libraries
+
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+import headless
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "BATCH_SIZE": 12, "NUM_AGENTS": 3}
+
+
+# policy that turns every UAV to another direction on each time step, so that UAVs move around the grid
+def turning_policy(monitor_data):
+    step = monitor_data["currentStep"]
+    return {"uavDetails": [{"id": uav["id"], "direction": (step + idx) % 5}
+                           for idx, uav in enumerate(monitor_data["dynamicValues"]["uavDetails"])]}
+
+
+# function that obtains the metrics of an episode, and the final positions of its UAVs
+def episode_metrics(model):
+    return {"MR1": model.MR1_LIST, "MR2": model.MR2_VALUE, "integrity": [uav.integrity for uav in model.uavs],
+            "positions": [uav.pos for uav in model.uavs]}
+
+
+# headless episodes are reproducible from their seed, and last BATCH_SIZE time steps
+class TestRunEpisode(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_seed_same_metrics(self):
+        for fire_backend in ("agents", "array"):
+            metrics = [episode_metrics(headless.run_episode(turning_policy, fire_backend=fire_backend, seed=seed))
+                       for seed in (4, 4, 5)]
+            self.assertEqual(metrics[0], metrics[1], fire_backend)
+            self.assertNotEqual(metrics[0], metrics[2], fire_backend)
+            self.assertGreater(sum(metrics[0]["MR1"]), 0, fire_backend)
+
+    def test_episode_stops_at_the_step_limit(self):
+        model = headless.run_episode(turning_policy, fire_backend='array', seed=4)
+        self.assertTrue(model.finished())
+        self.assertEqual(model.evaluation_timesteps_counter, common_fixed_variables.BATCH_SIZE + 1)
+        # a finished headless model doesn't advance anymore
+        terrain = model.get_terrain().burning.copy()
+        model.step()
+        self.assertEqual(model.evaluation_timesteps_counter, common_fixed_variables.BATCH_SIZE + 1)
+        numpy.testing.assert_array_equal(model.get_terrain().burning, terrain)
+
+    def test_step_limit_follows_batch_size(self):
+        with mock.patch.object(common_fixed_variables, "BATCH_SIZE", 5):
+            model = headless.run_episode(fire_backend='array', seed=4)
+        self.assertEqual(model.evaluation_timesteps_counter, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
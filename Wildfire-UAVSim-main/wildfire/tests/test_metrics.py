@@ -0,0 +1,91 @@
+# python libraries
+
+import math
+import random
+import unittest
+from unittest import mock
+
+# own python modules
+
+import collision
+import common_fixed_variables
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 5}
+
+
+# function that counts the UAV pairs closer than distance as MR2() used to: each UAV checks every other one, so each
+# pair is counted twice, and the count is halved
+def count_close_pairs_twice(positions, distance):
+    counter = 0
+    for idx, pos in enumerate(positions):
+        for other in positions[:idx] + positions[idx + 1:]:
+            if math.sqrt((pos[0] - other[0]) ** 2 + (pos[1] - other[1]) ** 2) < distance:
+                counter += 1
+    return counter // 2
+
+
+# collision risk avoidance metric (MR2), from the vectorized pairwise distances of collision.close_pairs()
+class TestCollisionRisk(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_close_pairs(self):
+        # pairs at a distance of exactly 10 are not close, and the closest pairs come first
+        positions = [(0, 0), (0, 10), (6, 8), (1, 1), (15, 15)]
+        pairs, distances = collision.close_pairs(positions, 10)
+        self.assertEqual(pairs.tolist(), [[0, 3], [1, 2], [2, 3], [1, 3]])
+        self.assertEqual(distances.tolist(), [math.sqrt(2), math.sqrt(40), math.sqrt(74), math.sqrt(82)])
+        self.assertEqual(len(pairs), count_close_pairs_twice(positions, 10))
+
+    def test_mr2_matches_double_count(self):
+        rng = random.Random(5)
+        model = WildFireModel(fire_backend='array', headless=True, seed=5)
+        expected = 0
+        for _ in range(20):
+            cells = rng.sample([(x, y) for x in range(16) for y in range(16)], len(model.uavs))
+            # UAVs are moved away first, so that no two of them ever share a cell of the SingleGrid
+            for uav in model.uavs:
+                model.grid.remove_agent(uav)
+            for uav, cell in zip(model.uavs, cells):
+                model.grid.place_agent(uav, cell)
+            model.MR2()
+            close = count_close_pairs_twice(cells, common_fixed_variables.SECURITY_DISTANCE)
+            expected += close
+            self.assertEqual(len(model.close_pairs), close)
+            self.assertEqual(model.MR2_VALUE, expected)
+        self.assertGreater(expected, 0)
+
+
+# effective wildfire monitoring metric (MR1), from the burning cells each UAV observes, counted with the summed-area
+# table of WildFireModel.burning_counts()
+class TestBurningCounts(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_counts_match_the_state(self):
+        for fire_backend in ("agents", "array"):
+            model = WildFireModel(fire_backend=fire_backend, headless=True, seed=2)
+            # UAVs spread over the grid, from its corners to its center, and moving every step
+            for uav, cell in zip(model.uavs, [(0, 0), (15, 15), (8, 3), (3, 12), (12, 8)]):
+                model.grid.move_agent(uav, cell)
+            model.new_direction = [0, 1, 2, 3, 0]
+            burning_seen = 0
+            for _ in range(16):
+                model.step()
+                # the table is only built once per step, so the counts must follow the steps
+                self.assertEqual(model.burning_counts().tolist(), [sum(state) for state in model.state()])
+                windows = model.observe(2)["burning"].reshape(len(model.uavs), -1)
+                self.assertEqual(model.burning_counts(2).tolist(), windows.sum(axis=1).tolist())
+                burning_seen += sum(model.burning_counts().tolist())
+            self.assertGreater(burning_seen, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# python libraries
+
+import copy
+import json
+import os
+import struct
+import sys
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+import monitor
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 3}
+
+# the UAV clients rebuild monitor data from deltas with UPISAS apply_delta(), and decode packed payloads with UPISAS
+# unpack_payload(), which can be tested against when UPISAS is installed, or checked out next to the simulator
+UPISAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "UPISAS")
+if os.path.isdir(UPISAS_PATH) and UPISAS_PATH not in sys.path:
+    sys.path.append(UPISAS_PATH)
+try:
+    from UPISAS import apply_delta, unpack_payload
+except ImportError:
+    apply_delta = unpack_payload = None
+
+
+# function that obtains data as a client receives it, once encoded as JSON and decoded (e.g. tuples become lists)
+def as_served(data):
+    return json.loads(json.dumps(data))
+
+
+# /monitor/delta only serves the dynamic values which changed since a step served before
+class TestMonitorDelta(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.model = WildFireModel(fire_backend='array', headless=True, seed=8)
+
+    def step(self, step):
+        self.model.new_direction = [step % 4, 1, 4 if step % 3 else 0]
+        self.model.step()
+
+    @unittest.skipIf(apply_delta is None, "UPISAS is not available")
+    def test_applied_delta_reproduces_the_monitor_data(self):
+        served = as_served(monitor.get_monitor_data(self.model))
+        changed_fields = set()
+        for step in range(20):
+            self.step(step)
+            delta = as_served(monitor.get_monitor_delta(self.model, since=served["currentStep"]))
+            self.assertFalse(delta["full"])
+            self.assertEqual(delta["since"], served["currentStep"])
+            dynamic_values = apply_delta(served["dynamicValues"], delta["dynamicValues"])
+            expected = as_served(monitor.get_dynamic_values(self.model))
+            self.assertEqual(dynamic_values, expected)
+            served = {"currentStep": delta["currentStep"], "dynamicValues": dynamic_values}
+            changed_fields.update(field for uav in delta["dynamicValues"].get("uavDetails", []) for field in uav)
+        # the deltas did carry partial UAV details, not just whole payloads
+        self.assertTrue({"x", "fireStates", "smokeStates"} <= changed_fields)
+
+    @unittest.skipIf(apply_delta is None, "UPISAS is not available")
+    def test_delta_since_an_older_step(self):
+        served = as_served(monitor.get_monitor_data(self.model))
+        for step in range(5):
+            self.step(step)
+        delta = as_served(monitor.get_monitor_delta(self.model, since=served["currentStep"]))
+        self.assertFalse(delta["full"])
+        self.assertEqual(apply_delta(served["dynamicValues"], delta["dynamicValues"]),
+                         as_served(monitor.get_dynamic_values(self.model)))
+
+    def test_unchanged_and_unknown_steps(self):
+        current_step = monitor.get_monitor_data(self.model)["currentStep"]
+        self.assertEqual(monitor.get_monitor_delta(self.model, since=current_step)["dynamicValues"], {})
+        delta = monitor.get_monitor_delta(self.model, since=current_step + 100)
+        self.assertTrue(delta["full"])
+        self.assertEqual(as_served(delta["dynamicValues"]), as_served(monitor.get_dynamic_values(self.model)))
+
+
+# packed payloads hold the same data as the JSON ones, with the cell coordinates of the UAV details as int16 pairs
+class TestPackedPayload(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.model = WildFireModel(fire_backend='array', headless=True, seed=8)
+        for step in range(12):
+            self.model.new_direction = [step % 4, 1, 4]
+            self.model.step()
+        # monitor data (UAV details under "dynamicValues") and adaptation options (UAV details at the top level)
+        self.payloads = [monitor.get_monitor_data(self.model), monitor.get_adaptation_options(self.model)]
+        self.assertTrue(all(uav["smokeStates"] for uav in self.payloads[0]["dynamicValues"]["uavDetails"]))
+
+    def test_layout(self):
+        for data in self.payloads:
+            unchanged = copy.deepcopy(data)
+            content = monitor.pack_payload(data)
+            self.assertEqual(data, unchanged)
+            header_length, = struct.unpack_from("<I", content)
+            header = json.loads(content[4:4 + header_length])
+            self.assertEqual(header.pop("packed"), list(monitor.PACKED_FIELDS))
+            container = data.get("dynamicValues", data)
+            cells = [cell for uav in container["uavDetails"] for field in monitor.PACKED_FIELDS for cell in uav[field]]
+            coordinates = numpy.frombuffer(content[4 + header_length:], dtype="<i2").reshape(-1, 2)
+            self.assertEqual(coordinates.tolist(), as_served(cells))
+            for uav, packed_uav in zip(container["uavDetails"], header.get("dynamicValues", header)["uavDetails"]):
+                self.assertEqual(packed_uav, {**as_served(uav), **{field: len(uav[field])
+                                                                   for field in monitor.PACKED_FIELDS}})
+
+    @unittest.skipIf(unpack_payload is None, "UPISAS is not available")
+    def test_unpack_round_trip(self):
+        for data in self.payloads:
+            self.assertEqual(unpack_payload(monitor.pack_payload(data)), as_served(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# python libraries
+
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 3}
+# corners of the small grid the UAVs are moved to, so that most of their observation windows are out of the grid
+CORNERS = [(0, 0), (15, 15), (0, 15)]
+
+
+# function that obtains the window of cells a UAV observes one cell at a time, as UAV.surrounding_states() used to:
+# every cell of its Moore neighbourhood in the grid is looked up, and cells out of the grid are left as zero
+def observe_cell_by_cell(model, uav, radius):
+    side = (radius * 2) + 1
+    windows = {"burning": numpy.zeros((side, side), dtype=bool), "smoke": numpy.zeros((side, side), dtype=bool),
+               "fuel": numpy.zeros((side, side), dtype=int)}
+    for cell in model.grid.get_neighborhood(uav.pos, moore=True, include_center=True, radius=radius):
+        fire = model.get_fire_at(cell)
+        if fire is not None:
+            i = cell[0] - uav.pos[0] + radius
+            j = cell[1] - uav.pos[1] + radius
+            windows["burning"][i, j] = fire.is_burning()
+            windows["smoke"][i, j] = fire.smoke.is_smoke_active()
+            windows["fuel"][i, j] = fire.get_fuel()
+    return windows
+
+
+# WildFireModel.observe() slices every observation window at once, zero padding the cells out of the grid
+class TestObserve(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # function that obtains a model in which fire and smoke spread for a while, with its UAVs in the grid corners
+    def model_with_uavs_in_corners(self, fire_backend):
+        model = WildFireModel(fire_backend=fire_backend, headless=True, seed=3)
+        for _ in range(12):
+            model.step()
+        for uav, corner in zip(model.uavs, CORNERS):
+            model.grid.move_agent(uav, corner)
+        return model
+
+    def test_corner_windows_match_cell_by_cell_lookups(self):
+        for fire_backend in ("agents", "array"):
+            model = self.model_with_uavs_in_corners(fire_backend)
+            for radius in (2, common_fixed_variables.UAV_OBSERVATION_RADIUS):
+                windows = model.observe(radius)
+                for idx, uav in enumerate(model.uavs):
+                    expected = observe_cell_by_cell(model, uav, radius)
+                    for layer in ("burning", "smoke", "fuel"):
+                        numpy.testing.assert_array_equal(windows[layer][idx], expected[layer],
+                                                         f"{fire_backend} {layer} window of radius {radius}")
+            # the windows do hold burning and smoke cells, besides the zero padding
+            windows = model.observe()
+            self.assertTrue(windows["burning"].any() and windows["smoke"].any())
+            self.assertTrue((windows["fuel"][0, :common_fixed_variables.UAV_OBSERVATION_RADIUS] == 0).all())
+
+    def test_smoke_coordinates_in_corners(self):
+        model = self.model_with_uavs_in_corners("array")
+        radius = common_fixed_variables.UAV_OBSERVATION_RADIUS
+        for uav in model.uavs:
+            uav.surrounding_smoke()
+            expected = [cell for cell in model.grid.get_neighborhood(uav.pos, moore=True, include_center=True,
+                                                                     radius=radius)
+                        if model.get_fire_at(cell) is not None and model.get_fire_at(cell).smoke.is_smoke_active()]
+            self.assertEqual(uav.smoke_states, expected)
+
+
+# UAV agents share the windows of one WildFireModel.observe() call per time step, instead of each observing its own
+class TestSharedObservations(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # function that steps a model moving its UAVs around, and returns the observed states of the UAVs of every step
+    @staticmethod
+    def run_uavs(model, steps=15):
+        observed = []
+        for step in range(steps):
+            model.new_direction = [(step + idx) % 5 for idx in range(len(model.uavs))]
+            model.step()
+            observed.append([(uav.pos, uav.integrity, uav.fire_states, uav.smoke_states) for uav in model.uavs])
+        return observed
+
+    def test_one_observation_per_step(self):
+        for fire_backend in ("agents", "array"):
+            model = WildFireModel(fire_backend=fire_backend, headless=True, seed=5)
+            with mock.patch.object(model, "observe", wraps=model.observe) as observe:
+                self.run_uavs(model)
+            self.assertEqual(observe.call_count, 15)
+            # every UAV is observed in the same call, with the observation radius (radius 2 windows are its center)
+            self.assertEqual({call.args for call in observe.call_args_list},
+                             {(common_fixed_variables.UAV_OBSERVATION_RADIUS,)})
+
+    def test_same_states_as_observing_each_uav(self):
+        for fire_backend in ("agents", "array"):
+            shared = WildFireModel(fire_backend=fire_backend, headless=True, seed=5)
+            on_its_own = WildFireModel(fire_backend=fire_backend, headless=True, seed=5)
+            on_its_own.uav_observation = lambda uav, radius: {layer: windows[0] for layer, windows in
+                                                              on_its_own.observe(radius, [uav]).items()}
+            observed = self.run_uavs(shared)
+            self.assertEqual(observed, self.run_uavs(on_its_own), fire_backend)
+            # the UAVs do move, and observe burning cells
+            self.assertNotEqual(observed[0][0][0], observed[-1][0][0])
+            self.assertTrue(any(uav[2] for step in observed for uav in step))
+
+
+if __name__ == '__main__':
+    unittest.main()
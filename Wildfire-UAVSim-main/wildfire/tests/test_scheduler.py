@@ -0,0 +1,88 @@
+# python libraries
+
+import unittest
+from unittest import mock
+
+import numpy
+
+# own python modules
+
+import common_fixed_variables
+from scheduler import FrontierActivation
+from terrain import Terrain
+from wildfire_model import WildFireModel
+
+SMALL_GRID = {"WIDTH": 16, "HEIGHT": 16, "NUM_AGENTS": 0}
+
+
+# function that creates a headless 'agents' model, with or without frontier scheduling, whose scalar random draws (fire
+# spread and wind direction) all return the same value, so that they don't depend on the order agents are activated in
+def model_with_fixed_draws(frontier_scheduling, draw, seed=0):
+    with mock.patch.object(common_fixed_variables, "FRONTIER_SCHEDULING", frontier_scheduling):
+        model = WildFireModel(fire_backend='agents', headless=True, seed=seed)
+    random = model.rng.random
+    model.rng.random = lambda size=None: random(size) if size is not None else draw
+    return model
+
+
+# same as model_with_fixed_draws(), for the 'array' backend, whose fire spread draws are arrays. If whole_grid is True,
+# every cell is evaluated in each step instead of the active window of the FireEngine only
+def array_model_with_fixed_draws(whole_grid, draw, seed=0):
+    model = WildFireModel(fire_backend='array', headless=True, seed=seed)
+    model.rng.random = lambda size=None: numpy.full(size, draw) if size is not None else draw
+    if whole_grid:
+        model.fire_engine.active_window = lambda: (slice(None), slice(None))
+    return model
+
+
+# test cases comparing the fire cells of two models on a small grid, layer by layer
+class TerrainTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(common_fixed_variables, **SMALL_GRID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_same_terrain(self, terrain, expected, step):
+        for layer in Terrain.layers():
+            numpy.testing.assert_array_equal(getattr(terrain, layer), getattr(expected, layer),
+                                             f"{layer} differs at step {step}")
+
+
+# FrontierActivation skips the Fire agents whose state can't change, so with draws that don't depend on the
+# activation order, it must evolve the grid exactly as stepping every Fire agent does
+class TestFrontierActivation(TerrainTestCase):
+
+    def test_same_states_as_stepping_every_cell(self):
+        for draw in (0.1, 0.5, 0.9):
+            frontier = model_with_fixed_draws(True, draw)
+            full = model_with_fixed_draws(False, draw)
+            self.assertIsInstance(frontier.schedule, FrontierActivation)
+            self.assertNotIsInstance(full.schedule, FrontierActivation)
+            for step in range(30):
+                frontier.step()
+                full.step()
+                self.assert_same_terrain(frontier.get_terrain(), full.get_terrain(), step)
+            # the fire spread, went out in some cells, and smoke appeared, so every frontier transition was exercised
+            terrain = full.get_terrain()
+            self.assertTrue((terrain.fuel < terrain.dispelling_counter_start).sum() > 1)
+            dispelling = terrain.dispelling_counter < terrain.dispelling_counter_start
+            self.assertTrue(terrain.smoke.any() or dispelling.any())
+
+
+# likewise, FireEngine only evaluates the active window of the grid, which must evolve it exactly as evaluating every
+# cell does
+class TestActiveWindow(TerrainTestCase):
+
+    def test_same_states_as_evaluating_every_cell(self):
+        for draw in (0.1, 0.5, 0.9):
+            window = array_model_with_fixed_draws(False, draw)
+            whole = array_model_with_fixed_draws(True, draw)
+            for step in range(30):
+                window.step()
+                whole.step()
+                self.assert_same_terrain(window.get_terrain(), whole.get_terrain(), step)
+
+
+if __name__ == '__main__':
+    unittest.main()
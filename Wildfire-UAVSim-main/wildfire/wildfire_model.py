@@ -1,8 +1,9 @@
 # python libraries
 
 import sys
+import copy
 import mesa
-import matplotlib.pyplot as plt
+import numpy
 from threading import Condition  # used to block waiting for REST API commands
 
 # own python modules
@@ -10,19 +11,34 @@ from threading import Condition  # used to block waiting for REST API commands
 import agents
 
 import common_fixed_variables
+import collision
+from fire_engine import FireEngine
+from terrain import Terrain
+from scheduler import FrontierActivation
 
 
 # class WildFireModel holds methods for managing the main logic of the grid, such as the main execution loop,
 # setting agents, methods for checking the state of the grid, etc
 class WildFireModel(mesa.Model):
 
-    # constructor
-    def __init__(self):
+    # constructor. A headless model (see headless.py) neither waits for the REST API before each step nor uses
+    # matplotlib, and it is stepped in-process until finished() is True. All the randomness of the simulation is drawn
+    # from the model random stream, so that a model with the same seed can be reproduced. If a Terrain is given, fire
+    # cells are set from it instead of creating a random forest area (see checkpoint.py)
+    def __init__(self, fire_backend=None, headless=False, seed=None, terrain=None):
 
-        plt.ion()
+        self.headless = headless
+        if not headless:
+            import matplotlib.pyplot as plt
+            plt.ion()
 
         # attributes intialization
 
+        # 'agents' or 'array', see FIRE_BACKEND in common_fixed_variables.py
+        self.fire_backend = fire_backend if fire_backend is not None else common_fixed_variables.FIRE_BACKEND
+        self.fire_engine = None
+        self.rng = common_fixed_variables.RandomStream(seed)
+
         self.new_direction_counter = None
         self.datacollector = None
         self.grid = None
@@ -31,40 +47,69 @@ class WildFireModel(mesa.Model):
         self.evaluation_timesteps_counter = None
         self.NUM_AGENTS = common_fixed_variables.NUM_AGENTS
 
+        self.uavs = []
         self.MR1_LIST = [0.0 for i in range(0, self.NUM_AGENTS)]
         self.MR2_VALUE = 0
+        self.close_pairs = []
         self.next_step_available = Condition()
         self.last_step_seen = -1
+        self.last_step_completed = None
 
-        self.reset()
+        self.reset(terrain)
 
     # reset method with attributes initialization. This method should be used whenever it is needed to reset the
     # environment in execution time. For example, when the graphical interface is up, and reset button is pressed, this
     # method is called
-    def reset(self):
+    def reset(self, terrain=None):
 
         self.unique_agents_id = 0
         # Inverted width and height order, because of matrix accessing purposes, like in many examples:
         #   https://snyk.io/advisor/python/Mesa/functions/mesa.space.MultiGrid
         # set some Mesa framework management
-        self.grid = mesa.space.MultiGrid(common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH, False)
-        self.schedule = mesa.time.SimultaneousActivation(self)
-        # set Fire and wind agents (Smoke are created inside Fire agents as well)
-        self.set_fire_agents()
-        self.wind = agents.Wind()
+        # with the 'array' backend, fire cells live in a Terrain, and the grid only holds UAV agents (one per cell at
+        # most, see UAV.not_UAV_adjacent()), so a lighter SingleGrid is enough
+        if self.fire_backend == 'array':
+            self.grid = mesa.space.SingleGrid(common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH, False)
+        else:
+            self.grid = mesa.space.MultiGrid(common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH, False)
+        if self.fire_backend != 'array' and common_fixed_variables.FRONTIER_SCHEDULING:
+            self.schedule = FrontierActivation(self)
+        else:
+            self.schedule = mesa.time.SimultaneousActivation(self)
+        # set Fire and wind agents (Smoke are created inside Fire agents as well). With the 'array' backend, fire and
+        # smoke are held by the Terrain of a FireEngine instead, and only UAV agents are placed in the grid
+        if self.fire_backend == 'array':
+            self.fire_engine = FireEngine(self, common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH)
+            # UAV unique ids are kept the same as in the 'agents' backend
+            if terrain is not None:
+                self.unique_agents_id += self.fire_engine.set_terrain(terrain)
+            else:
+                self.unique_agents_id += self.fire_engine.set_fire_cells()
+        else:
+            self.fire_engine = None
+            if terrain is not None:
+                self.set_fire_agents_from(terrain)
+            else:
+                self.set_fire_agents()
+        self.wind = agents.Wind(self.rng)
 
         x_center = int(common_fixed_variables.HEIGHT / 2)
         y_center = int(common_fixed_variables.WIDTH / 2)
 
         self.new_direction_counter = 0
         self.evaluation_timesteps_counter = 0
+        self.last_step_completed = 0
+        self.burning_table_cache = None
+        self.observations_cache = None
 
         # create and configure UAV agents in the grid
+        self.uavs = []
         for a in range(0, self.NUM_AGENTS):
             aux_UAV = agents.UAV(self.unique_agents_id, self)
             y_center += a if a % 2 == 0 else -a
             self.grid.place_agent(aux_UAV, (x_center, y_center + 1))
             self.schedule.add(aux_UAV)
+            self.uavs.append(aux_UAV)
             self.unique_agents_id += 1
 
         # set Mesa framework management
@@ -78,128 +123,315 @@ class WildFireModel(mesa.Model):
         y_c = int(common_fixed_variables.WIDTH / 2)
         x = [x_c]
         y = [y_c]
+        # tree and fuel draws of the whole grid are obtained at once
+        shape = (common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH)
+        trees = (self.rng.random(shape) < common_fixed_variables.DENSITY_PROB).tolist()
+        fuels = self.rng.integers(common_fixed_variables.FUEL_BOTTOM_LIMIT, common_fixed_variables.FUEL_UPPER_LIMIT,
+                                  shape).tolist()
         for i in range(common_fixed_variables.HEIGHT):
             for j in range(common_fixed_variables.WIDTH):
                 # decides to put a "tree" (fire agent) or not, if less than DENSITY_PROB
                 # or if it is in the center of the grid
-                if common_fixed_variables.SYSTEM_RANDOM.random() < common_fixed_variables.DENSITY_PROB or (i in x and j in y):
+                if trees[i][j] or (i in x and j in y):
                     # only if it is in the center of the grid, Fire agent is set burning at the beginning, otherwise
                     # it is set to not burning
                     if i in x and j in y:
-                        self.new_fire_agent(i, j, True)
+                        self.new_fire_agent(i, j, True, fuels[i][j])
                     else:
-                        self.new_fire_agent(i, j, False)
+                        self.new_fire_agent(i, j, False, fuels[i][j])
+
+    # function that creates the fire agents of the cells holding a tree in a Terrain, with the same states as the
+    # Terrain cells, in the same order set_fire_agents() creates them
+    def set_fire_agents_from(self, terrain):
+        for i, j in numpy.argwhere(terrain.tree).tolist():
+            fire = agents.Fire(self.unique_agents_id, self, bool(terrain.burning[i, j]),
+                               terrain.fuel[i, j].item())
+            fire.next_burning_state = bool(terrain.next_burning[i, j])
+            fire.cell_prob = float(terrain.cell_prob[i, j])
+            fire.smoke.smoke = bool(terrain.smoke[i, j])
+            fire.smoke.dispelling_counter = int(terrain.dispelling_counter[i, j])
+            fire.smoke.dispelling_counter_start_value = int(terrain.dispelling_counter_start[i, j])
+            fire.smoke.dispelling_lower_bound = int(terrain.dispelling_lower_bound[i, j])
+            self.unique_agents_id += 1
+            self.grid.place_agent(fire, (i, j))
+            self.schedule.add(fire)
+
+    # function that obtains the fire cells of the grid as a Terrain, regardless of the fire backend. With the 'array'
+    # backend, the Terrain of the FireEngine itself is returned
+    def get_terrain(self):
+        if self.fire_engine is not None:
+            return self.fire_engine.terrain
+        terrain = Terrain(common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH)
+        for agent in self.schedule.agents:
+            if type(agent) is agents.Fire:
+                terrain.tree[agent.pos] = True
+                terrain.fuel[agent.pos] = agent.fuel
+                terrain.burning[agent.pos] = agent.burning
+                terrain.next_burning[agent.pos] = bool(agent.next_burning_state)
+                terrain.cell_prob[agent.pos] = agent.cell_prob
+                terrain.smoke[agent.pos] = agent.smoke.smoke
+                terrain.dispelling_counter[agent.pos] = agent.smoke.dispelling_counter
+                terrain.dispelling_counter_start[agent.pos] = agent.smoke.dispelling_counter_start_value
+                terrain.dispelling_lower_bound[agent.pos] = agent.smoke.dispelling_lower_bound
+        return terrain
+
+    # function that obtains a lightweight clone of the model in its current state, e.g. for a planner to run k-step
+    # rollouts of candidate UAV actions in-process. The clone shares the Terrain arrays of the fire cells copy-on-write
+    # (see Terrain.fork()), and only copies UAV agents and counters, so it costs far less than reset(). It is always
+    # headless. Its random stream continues the same draws as the model one, unless a seed is given. Only the 'array'
+    # backend can be forked, since with the 'agents' backend the fire state is spread over a Fire agent per cell
+    def fork(self, seed=None):
+        if self.fire_engine is None:
+            raise ValueError("Only a WildFireModel with the 'array' fire backend can be forked")
+        clone = copy.copy(self)
+        clone.headless = True
+        clone.next_step_available = Condition()
+        clone.datacollector = mesa.DataCollector()
+        clone.rng = common_fixed_variables.RandomStream(seed)
+        if seed is None:
+            clone.rng.set_state(*self.rng.get_state())
+        clone.wind = copy.copy(self.wind)
+        clone.wind.rng = clone.rng
+        clone.observations_cache = None
+        clone.fire_engine = copy.copy(self.fire_engine)
+        clone.fire_engine.model = clone
+        clone.fire_engine.terrain = self.fire_engine.terrain.fork()
+        clone.MR1_LIST = list(self.MR1_LIST)
+        clone.new_direction = list(self.new_direction)
+        clone.close_pairs = list(self.close_pairs)
+
+        # the grid only holds UAV agents, so its cells are copied (instead of creating a new grid cell by cell), and the
+        # UAV agents are replaced by their clones
+        clone.grid = copy.copy(self.grid)
+        clone.grid._grid = [column.copy() for column in self.grid._grid]
+        # the lazily built state of the Mesa grid isn't shared either: empty cells are found again the first time they
+        # are needed, and neighbourhoods are cached again
+        clone.grid._empties = set()
+        clone.grid._empties_built = False
+        clone.grid._neighborhood_cache = {}
+        clone.schedule = mesa.time.SimultaneousActivation(clone)
+        clone.schedule.steps = self.schedule.steps
+        clone.schedule.time = self.schedule.time
+        clone.uavs = []
+        for uav in self.uavs:
+            clone_uav = copy.copy(uav)
+            clone_uav.model = clone
+            clone.grid._grid[uav.pos[0]][uav.pos[1]] = clone_uav
+            clone.schedule.add(clone_uav)
+            clone.uavs.append(clone_uav)
+        return clone
 
     # function that creates new fire agent in a concrete cell
-    def new_fire_agent(self, pos_x, pos_y, burning):
+    def new_fire_agent(self, pos_x, pos_y, burning, fuel=None):
         # creates new Fire agent
-        source_fire = agents.Fire(self.unique_agents_id, self, burning)
+        source_fire = agents.Fire(self.unique_agents_id, self, burning, fuel)
         # set Fire agent unique id, incremented from the one used before it
         self.unique_agents_id += 1
-        # add to scheduler
-        self.schedule.add(source_fire)
         # place agent in the grid
         self.grid.place_agent(source_fire, tuple([pos_x, pos_y]))
+        # add to scheduler (once placed, since FrontierActivation tracks Fire agents by position)
+        self.schedule.add(source_fire)
+
+    # function that obtains the fire in a concrete cell, regardless of the fire backend: a Fire agent, a FireCell view
+    # of the FireEngine, or None if there is no tree on it
+    def get_fire_at(self, pos):
+        if self.fire_engine is not None:
+            return self.fire_engine.get_cell(pos)
+        for agent in self.grid.get_cell_list_contents([pos]):
+            if type(agent) is agents.Fire:
+                return agent
+        return None
+
+    # function that obtains, for a list of UAV agents (all of them by default), the window of cells each one observes
+    # (a square of side 2 * radius + 1 centered on it), for the burning, smoke and fuel layers. Windows are returned
+    # in a dictionary of arrays indexed as [uav, dx + radius, dy + radius], and cells out of the grid are zero padded.
+    # With the 'array' backend, all windows are obtained in a single vectorized slice of the terrain arrays
+    def observe(self, radius=None, uavs=None):
+        radius = common_fixed_variables.UAV_OBSERVATION_RADIUS if radius is None else radius
+        uavs = self.uavs if uavs is None else uavs
+        side = (radius * 2) + 1
+        if self.fire_engine is None:
+            return self.observe_agents(radius, uavs)
+
+        terrain = self.fire_engine.terrain
+        width, height = terrain.shape
+        positions = numpy.array([uav.pos for uav in uavs], dtype=int).reshape(-1, 2)
+        offsets = numpy.arange(-radius, radius + 1)
+        xs = positions[:, 0, None] + offsets
+        ys = positions[:, 1, None] + offsets
+        inside = ((xs >= 0) & (xs < width))[:, :, None] & ((ys >= 0) & (ys < height))[:, None, :]
+        xs = numpy.clip(xs, 0, width - 1)[:, :, None]
+        ys = numpy.clip(ys, 0, height - 1)[:, None, :]
+        windows = {}
+        for layer in ("burning", "smoke", "fuel"):
+            windows[layer] = numpy.where(inside, getattr(terrain, layer)[xs, ys], 0).reshape(len(uavs), side, side)
+        return windows
+
+    # function that obtains the windows of radius observe() returns for a UAV agent. The windows of all UAVs are
+    # observed at once, with the observation radius (or a larger radius, if asked for), once per time step, and each UAV
+    # agent gets the center of its own row. Fire cells don't change while UAV agents advance, and each UAV observes
+    # before moving, so the shared windows hold the same cells the UAV would observe on its own. They are observed again
+    # if the UAV has moved since (e.g. if a UAV observes out of its advance() method)
+    def uav_observation(self, uav, radius):
+        index = self.uavs.index(uav)
+        cached = self.observations_cache
+        if cached is None or cached[0] != self.evaluation_timesteps_counter or cached[1] < radius or \
+                cached[2][index] != uav.pos:
+            observed_radius = max(radius, common_fixed_variables.UAV_OBSERVATION_RADIUS)
+            cached = (self.evaluation_timesteps_counter, observed_radius, [agent.pos for agent in self.uavs],
+                      self.observe(observed_radius))
+            self.observations_cache = cached
+        center = slice(cached[1] - radius, cached[1] + radius + 1)
+        return {layer: windows[index, center, center] for layer, windows in cached[3].items()}
+
+    # same as observe(), for the 'agents' backend, in which each observed cell has to be looked up in the grid
+    def observe_agents(self, radius, uavs):
+        side = (radius * 2) + 1
+        windows = {"burning": numpy.zeros((len(uavs), side, side), dtype=bool),
+                   "smoke": numpy.zeros((len(uavs), side, side), dtype=bool),
+                   "fuel": numpy.zeros((len(uavs), side, side), dtype=int)}
+        for idx, uav in enumerate(uavs):
+            adjacent_cells = self.grid.get_neighborhood(uav.pos, moore=True, include_center=True, radius=radius)
+            for cell in adjacent_cells:
+                fire = self.get_fire_at(cell)
+                if fire is not None:
+                    i = cell[0] - uav.pos[0] + radius
+                    j = cell[1] - uav.pos[1] + radius
+                    windows["burning"][idx, i, j] = fire.is_burning()
+                    windows["smoke"][idx, i, j] = fire.smoke.is_smoke_active()
+                    windows["fuel"][idx, i, j] = fire.get_fuel()
+        return windows
+
+    # function that obtains the burning state of every cell of the grid, as a boolean array indexed as [x, y]
+    def burning_array(self):
+        if self.fire_engine is not None:
+            return self.fire_engine.terrain.burning
+        burning = numpy.zeros((common_fixed_variables.HEIGHT, common_fixed_variables.WIDTH), dtype=bool)
+        if isinstance(self.schedule, FrontierActivation):
+            positions = list(self.schedule.burning_cells)
+        else:
+            positions = [agent.pos for agent in self.schedule.agents if type(agent) is agents.Fire and agent.burning]
+        if positions:
+            burning[tuple(numpy.array(positions).T)] = True
+        return burning
+
+    # function that obtains the summed-area table (integral image) of the burning array, in which table[x, y] is the
+    # number of burning cells in [0, x) x [0, y). It is only built once per time step, and shared by every window count
+    def burning_table(self):
+        if self.burning_table_cache is None or self.burning_table_cache[0] != self.evaluation_timesteps_counter:
+            table = numpy.zeros((common_fixed_variables.HEIGHT + 1, common_fixed_variables.WIDTH + 1), dtype=numpy.int32)
+            table[1:, 1:] = self.burning_array().cumsum(axis=0, dtype=numpy.int32).cumsum(axis=1)
+            self.burning_table_cache = (self.evaluation_timesteps_counter, table)
+        return self.burning_table_cache[1]
+
+    # function that obtains, for a list of UAV agents (all of them by default), the number of burning cells each one
+    # observes, in the window of observe(). Each count takes four lookups of the summed-area table, whatever the radius
+    def burning_counts(self, radius=None, uavs=None):
+        radius = common_fixed_variables.UAV_OBSERVATION_RADIUS if radius is None else radius
+        uavs = self.uavs if uavs is None else uavs
+        table = self.burning_table()
+        positions = numpy.array([uav.pos for uav in uavs], dtype=int).reshape(-1, 2)
+        # window bounds, clipped to the grid (cells out of it are not burning)
+        x0 = numpy.clip(positions[:, 0] - radius, 0, common_fixed_variables.HEIGHT)
+        x1 = numpy.clip(positions[:, 0] + radius + 1, 0, common_fixed_variables.HEIGHT)
+        y0 = numpy.clip(positions[:, 1] - radius, 0, common_fixed_variables.WIDTH)
+        y1 = numpy.clip(positions[:, 1] + radius + 1, 0, common_fixed_variables.WIDTH)
+        return table[x1, y1] - table[x0, y1] - table[x1, y0] + table[x0, y0]
 
     # manage directions obtained from the new_direction attribute, and make the UAV team move over the forest area
     def set_drone_dirs(self):
         # used for selecting the corresponding direction from new_direction attribute, for each UAV
         self.new_direction_counter = 0
-        # searches for all UAV agents in scheduler, and set their new directions
-        for agent in self.schedule.agents:
-            if type(agent) is agents.UAV:
-                agent.selected_dir = self.new_direction[self.new_direction_counter]
-                self.new_direction_counter += 1
+        # searches for all UAV agents, and set their new directions
+        for agent in self.uavs:
+            agent.selected_dir = self.new_direction[self.new_direction_counter]
+            self.new_direction_counter += 1
 
     # this method obtains effective wildfire monitoring metric (MR1) for time step t
-    def MR1(self, state):
-        # total amount of burning cells from state variable
-        MR1_reward = [sum(aux_state) for aux_state in state]
+    def MR1(self):
+        # total amount of burning cells observed by each UAV
+        MR1_reward = self.burning_counts().tolist()
         # normalized reward amount for each UAV state
         reward = [common_fixed_variables.normalize(float(reward), common_fixed_variables.N_OBSERVATIONS, 1, 0) for reward in MR1_reward]
         # MR1_list with added rewards
         self.MR1_LIST = [a + b for a, b in zip(self.MR1_LIST, reward)]
 
-    # this method obtains collision risk avoidance metric (MR2) for time step t
+    # this method obtains collision risk avoidance metric (MR2) for time step t, as the number of UAV pairs closer than
+    # SECURITY_DISTANCE. These pairs are kept in close_pairs, as (unique id, unique id, distance) tuples, closest first
     def MR2(self):
-        counter = 0
-        # get UAV agents from scheduler
-        UAV_agents = [agent for agent in self.schedule.agents if type(agent) is agents.UAV]
-
-        # checks number of interactions for each UAV with others
-        for idx, agent in enumerate(UAV_agents):
-            aux_agents_positions = UAV_agents.copy()
-            del aux_agents_positions[idx]
-
-            # checks number of interactions for one UAV
-            for a in aux_agents_positions:
-                x1 = agent.pos[0]
-                y1 = agent.pos[1]
-                x2 = a.pos[0]
-                y2 = a.pos[1]
-                # Euclidean distance between two UAV grid positions
-                distance = common_fixed_variables.euclidean_distance(x1, y1, x2, y2)
-                # if distance between the two UAV is less than the defined security distance, add 1 to the counter
-                if distance < common_fixed_variables.SECURITY_DISTANCE:
-                    counter += 1
-        self.MR2_VALUE += counter // 2  # remove duplicate interactions
-
-    # method for obtaining each UAV partial observation
+        pairs, distances = collision.close_pairs([agent.pos for agent in self.uavs],
+                                                 common_fixed_variables.SECURITY_DISTANCE)
+        self.close_pairs = [(self.uavs[i].unique_id, self.uavs[j].unique_id, float(distance))
+                            for (i, j), distance in zip(pairs.tolist(), distances)]
+        self.MR2_VALUE += len(self.close_pairs)
+
+    # method for obtaining each UAV partial observation, as a list of N_OBSERVATIONS burning cell states per UAV (cells
+    # that cannot be observed, when a UAV reaches an edge/corner, are zero padded by observe())
     def state(self):
-        states = []
-        # this for loop obtains the amount of burning cells for each agent
-        for agent in self.schedule.agents:
-            if type(agent) is agents.UAV:
-                surrounding_states = agent.surrounding_states()
-                states.append(surrounding_states)
-
-        # this for loop adds zeros in those positions of the list that would correspond to cells that cannot be
-        # observed. This is done when a UAV reaches an edge/corner, not getting the list in the corresponding format
-        # Mesa framework asks for
-        for st, _ in enumerate(states):
-            counter = len(states[st])
-            for i in range(counter, common_fixed_variables.N_OBSERVATIONS):
-                states[st].append(0)
-        return states
+        windows = self.observe(common_fixed_variables.UAV_OBSERVATION_RADIUS)["burning"]
+        return windows.reshape(len(self.uavs), -1).astype(int).tolist()
+
+    # checks if the simulation ended (BATCH_SIZE time steps were executed) | True if ended, False if not
+    def finished(self):
+        return common_fixed_variables.BATCH_SIZE == self.evaluation_timesteps_counter - 1
 
     # Mesa framework native method, which is overwritten, necessary for setting next state of the simulation
     def step(self):
         # Wait for REST API update
-        with (self.next_step_available):
-            while (self.last_step_seen < self.evaluation_timesteps_counter):
-                print(f"[WildFireModel.step()] Last step seen: {self.last_step_seen}. Waiting for info for {self.evaluation_timesteps_counter}...")
-                self.next_step_available.wait()
-        print(f"[WildFireModel.step()] Information received for step {self.evaluation_timesteps_counter}.")
+        if not self.headless:
+            with (self.next_step_available):
+                while (self.last_step_seen < self.evaluation_timesteps_counter):
+                    print(f"[WildFireModel.step()] Last step seen: {self.last_step_seen}. Waiting for info for {self.evaluation_timesteps_counter}...")
+                    self.next_step_available.wait()
+            print(f"[WildFireModel.step()] Information received for step {self.evaluation_timesteps_counter}.")
 
         self.datacollector.collect(self)
 
         # check if simulation ended, if so print MR1 and MR2 overall metrics,
         # and finish loop. Otherwise, keep executing.
-        if common_fixed_variables.BATCH_SIZE == self.evaluation_timesteps_counter - 1:
+        if self.finished():
+            if self.headless:
+                return
             print(" --- MR1 --- ")
             print(self.MR1_LIST)
             print(" --- MR2 --- ")
             print(self.MR2_VALUE)
             sys.exit(0)
 
-        if sum(isinstance(i, agents.UAV) for i in self.schedule.agents) > 0:
-            state = self.state()  # s_t
+        if len(self.uavs) > 0:
+            # MR1 counts burning cells straight from burning_table(), so the partial state is only needed by an
+            # algorithm using it
+            # state = self.state()  # s_t
 
             """This is implements random movement. Removed and replaced with movements from REST API /execute (PUT)"""
             # # self.new_direction is used to execute previous obtained a_t
-            # self.new_direction = [common_fixed_variables.SYSTEM_RANDOM.choice(range(0, common_fixed_variables.N_ACTIONS))
+            # self.new_direction = [self.rng.integers(0, common_fixed_variables.N_ACTIONS - 1)
             #                       for i in range(0, self.NUM_AGENTS)]  # a_t
 
             # TODO: algorithm/s calculation with partial state
             # reward = self.algorithm(state) # r_t+1
 
             # TODO: an EXAMPLE can be seen. However, your own implementations can be applied as well.
-            self.MR1(state)
+            self.MR1()
             self.MR2()
 
             # It sets new directions for the UAV team
             self.set_drone_dirs()
 
         self.evaluation_timesteps_counter += 1
+        # with WIND_MODE = 'per_tick', wind direction is drawn once for the whole time step
+        if common_fixed_variables.ACTIVATE_WIND:
+            self.wind.step()
+        # with the 'array' backend, the whole grid fire state is updated before UAV agents, the same way Fire agents
+        # step() and advance() are executed before UAV agents advance() by the scheduler
+        if self.fire_engine is not None:
+            self.fire_engine.step()
+            self.fire_engine.advance()
         # execute each agent step() method
         self.schedule.step()
+
+        # notify whoever waits for the new time step (e.g. /events and /step REST API endpoints) that its state is
+        # complete, and it can be monitored until the model waits for the next UAV directions
+        with self.next_step_available:
+            self.last_step_completed = self.evaluation_timesteps_counter
+            self.next_step_available.notify_all()